@@ -0,0 +1,128 @@
+"""
+KafkaBatchConsumer 拉取方式微基准：不连接 Kafka，用假的 consumer 返回预生成的消息。
+对比：
+- QUEUE：async for 逐条拉取，经 asyncio.Queue + wait_for 组批
+- GETMANY：getmany 批量拉取直接组批
+- PARALLEL：getmany 拉取，按分区并发处理；process_func 含 I/O 等待时差异明显
+
+运行：python -m performance.bench_kafka_consumer
+"""
+
+import asyncio
+import time
+
+from smartutils.infra.mq.cli import KafkaBatchConsumer, KafkaConsumeMode
+
+N = 200_000
+PARTITIONS = 4
+BATCH_SIZE = 1000
+# 模拟 broker 单次 fetch 返回的每分区消息数
+FETCH_SIZE = 500
+# 模拟 process_func 每批的 I/O 等待秒数，如写数据库
+IO_LATENCY = 0.005
+
+
+class FakeMsg:
+    __slots__ = ("topic", "partition", "offset", "value")
+
+    def __init__(self, partition: int, offset: int):
+        self.topic = "bench"
+        self.partition = partition
+        self.offset = offset
+        self.value = b'{"id": 1, "name": "bench"}'
+
+
+class FakeConsumer:
+    def __init__(self):
+        self._msgs = {
+            p: [FakeMsg(p, i) for i in range(N // PARTITIONS)]
+            for p in range(PARTITIONS)
+        }
+        self._pos = dict.fromkeys(self._msgs, 0)
+
+    async def start(self): ...
+
+    async def stop(self): ...
+
+    async def commit(self, offsets): ...
+
+    async def getmany(self, timeout_ms=0, max_records=None):
+        ret = {}
+        budget = max_records or N
+        for p, msgs in self._msgs.items():
+            pos = self._pos[p]
+            take = min(FETCH_SIZE, budget, len(msgs) - pos)
+            if take > 0:
+                ret[p] = msgs[pos : pos + take]
+                self._pos[p] = pos + take
+                budget -= take
+        if not ret:
+            await asyncio.sleep(timeout_ms / 1000)
+        return ret
+
+    async def __aiter__(self):
+        while True:
+            for msgs in (await self.getmany(timeout_ms=10)).values():
+                for msg in msgs:
+                    yield msg
+
+
+class FakeKafkaCli:
+    def consumer(self, *args, **kwargs):
+        return FakeConsumer()
+
+
+async def run(mode: KafkaConsumeMode, io_latency: float = 0) -> float:
+    done = asyncio.Event()
+    count = 0
+
+    async def process_func(messages):
+        nonlocal count
+        if io_latency:
+            await asyncio.sleep(io_latency)
+        count += len(messages)
+        if count >= N:
+            done.set()
+
+    consumer = KafkaBatchConsumer(
+        FakeKafkaCli(),  # type: ignore
+        process_func,
+        topic="bench",
+        group_id="bench",
+        batch_size=BATCH_SIZE,
+        timeout=1,
+        mode=mode,
+    )
+    start = time.perf_counter()
+    task = asyncio.create_task(consumer.start())
+    await done.wait()
+    cost = time.perf_counter() - start
+    await consumer.stop()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        ...
+    return cost
+
+
+async def main():
+    for io_latency in (0, IO_LATENCY):
+        print(
+            f"consume {N} messages, batch_size={BATCH_SIZE}, "
+            f"io={io_latency * 1000:.0f}ms/batch      cost(s)   msg/s"
+        )
+        costs = {}
+        for mode in KafkaConsumeMode:
+            costs[mode] = min([await run(mode, io_latency) for _ in range(3)])
+            cost = costs[mode]
+            print(f"  {mode.value:<53}{cost:>8.3f}{N / cost:>10.0f}")
+        base = costs[KafkaConsumeMode.QUEUE]
+        for mode in (KafkaConsumeMode.GETMANY, KafkaConsumeMode.PARALLEL):
+            name = f"{mode.value} speedup"
+            print(f"  {name:<53}{base / costs[mode]:>8.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Kafka 消息批量反序列化微基准，不连接 Kafka。
+对比：
+- 原方式：utf-8 解码为 str 后，业务函数再 orjson.loads / model_validate_json
+- KafkaDeserializer：bytes 直接解析；MODEL 整批一次 validate_json
+- 进程池：大批次分片到 ProcessPoolExecutor，事件循环阻塞时间只剩分片与结果回收
+
+运行：python -m performance.bench_kafka_deserializer
+"""
+
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import orjson
+from pydantic import BaseModel
+
+from smartutils.infra.mq.deserializer import KafkaDeserializer, KafkaValueFormat
+
+N = 50_000
+ROUNDS = 5
+
+
+class Item(BaseModel):
+    sku: str
+    qty: int
+    price: float
+
+
+class Order(BaseModel):
+    id: int
+    user: str
+    items: List[Item]
+    tags: List[str]
+
+
+VALUES = [
+    orjson.dumps(
+        {
+            "id": i,
+            "user": f"user-{i}",
+            "items": [
+                {"sku": f"sku-{j}", "qty": j, "price": j * 1.5} for j in range(5)
+            ],
+            "tags": ["a", "b", "c"],
+        }
+    )
+    for i in range(N)
+]
+
+
+async def bench(func) -> Tuple[float, float]:
+    """:return: (每批耗时毫秒, 期间事件循环最长阻塞毫秒)"""
+    costs, lags = [], []
+    for _ in range(ROUNDS):
+        lag = 0.0
+        running = True
+
+        async def ticker():
+            nonlocal lag
+            last = time.perf_counter()
+            while running:
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                lag = max(lag, now - last)
+                last = now
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        await func()
+        costs.append(time.perf_counter() - start)
+        running = False
+        await task
+        lags.append(lag)
+    return min(costs) * 1000, min(lags) * 1000
+
+
+async def main():
+    as_str = KafkaDeserializer()
+    as_json = KafkaDeserializer(KafkaValueFormat.JSON)
+    as_model = KafkaDeserializer(KafkaValueFormat.MODEL, model=Order)
+
+    async def old_json():
+        return [orjson.loads(s) for s in await as_str(VALUES)]
+
+    async def old_model():
+        return [Order.model_validate_json(s) for s in await as_str(VALUES)]
+
+    print(f"deserialize {N} messages per batch           cost(ms)  loop blocked(ms)")
+    rows = [
+        ("str + orjson.loads", old_json),
+        ("JSON", lambda: as_json(VALUES)),
+        ("str + model_validate_json", old_model),
+        ("MODEL (one validate_json per batch)", lambda: as_model(VALUES)),
+    ]
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        pooled = KafkaDeserializer(
+            KafkaValueFormat.MODEL, model=Order, executor=executor, workers=4
+        )
+        await pooled(VALUES)  # 预热进程池
+        rows.append(("MODEL + ProcessPoolExecutor(4)", lambda: pooled(VALUES)))
+        for name, func in rows:
+            cost, lag = await bench(func)
+            print(f"  {name:<40}{cost:>10.1f}{lag:>18.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
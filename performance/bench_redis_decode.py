@@ -0,0 +1,87 @@
+"""
+AsyncRedisCli 调用开销微基准：不连接 Redis，用假的底层客户端返回固定结果。
+对比：
+- 属性访问：每次构建 proxy_wrapper vs 首次构建后缓存
+- 返回值解码：通用递归 DecodeBytes.post vs 按命令的 post_for
+
+运行：python -m performance.bench_redis_decode
+"""
+
+import asyncio
+import timeit
+
+from smartutils.config.schema.redis import RedisConf
+from smartutils.design import proxy_wrapper
+from smartutils.infra.cache.common.decode import DecodeBytes
+from smartutils.infra.cache.redis_cli import AsyncRedisCli
+
+N = 10_000
+ROUNDS = 20
+
+RESULTS = {
+    "get": b"x" * 64,
+    "hgetall": {f"field{i}".encode(): f"value{i}".encode() for i in range(N)},
+    "lrange": [f"item{i}".encode() for i in range(N)],
+    "zrange": [(f"member{i}".encode(), float(i)) for i in range(N)],
+}
+
+
+class FakeRedis:
+    def __getattr__(self, name):
+        ret = RESULTS.get(name, 1)
+
+        async def command(*args, **kwargs):
+            return ret
+
+        return command
+
+
+def bench(stmt, number) -> float:
+    """:return: 单次耗时微秒"""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def bench_decode():
+    decode = DecodeBytes(False)
+    print(f"decode ({N} items)            generic(us)   table(us)   speedup")
+    for command, result in RESULTS.items():
+        post = decode.post_for(command)
+        old = bench(lambda: decode.post(result), ROUNDS)
+        new = bench(lambda: post(result), ROUNDS)
+        print(f"  {command:<28}{old:>11.1f}{new:>12.1f}{old / new:>9.1f}x")
+
+
+def bench_getattr():
+    cli = AsyncRedisCli(RedisConf(host="127.0.0.1", db=0), "bench")
+    cli._redis = FakeRedis()  # type: ignore
+    decode = cli._decode_bytes
+
+    def old():
+        return proxy_wrapper(
+            getattr(cli._redis, "incr"), pre=decode.pre, post=decode.post
+        )
+
+    def new():
+        return cli.incr
+
+    old_us = bench(old, 100_000)
+    new_us = bench(new, 100_000)
+    print("getattr                       per call(us)   cached(us)  speedup")
+    print(f"  incr{old_us:>35.3f}{new_us:>13.3f}{old_us / new_us:>9.1f}x")
+
+    async def call_all():
+        for _ in range(1000):
+            await cli.incr("k")
+
+    loop = asyncio.new_event_loop()
+    cost = min(
+        timeit.repeat(lambda: loop.run_until_complete(call_all()), number=1, repeat=5)
+    )
+    loop.close()
+    print(f"  await cli.incr end to end: {cost / 1000 * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    bench_getattr()
+    print()
+    bench_decode()
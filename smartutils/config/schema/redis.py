@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import Field
+from pydantic import Field, model_validator
 
 from smartutils.config.const import ConfKey
 from smartutils.config.factory import ConfFactory, ConfMeta
@@ -22,6 +22,14 @@ class RedisConf(HostConf):
     health_check_interval: int = Field(default=30, alias="health_check_sec", gt=0)
     retry_on_timeout: bool = True
     decode_responses: bool = False
+    # 集群模式：host/port 为任一启动节点，使用 RedisCluster 客户端
+    cluster: bool = False
+
+    @model_validator(mode="after")
+    def check_cluster_db(self):
+        if self.cluster and self.db != 0:
+            raise ValueError("cluster模式db必须为0")
+        return self
 
     @property
     def url(self) -> str:
@@ -29,5 +37,9 @@ class RedisConf(HostConf):
 
     @property
     def kw(self) -> dict:
-        params = self.model_dump(exclude={"host", "port"})
+        exclude = {"host", "port", "cluster"}
+        if self.cluster:
+            # RedisCluster 不支持选库，超时重试由集群客户端按节点重试处理
+            exclude |= {"db", "retry_on_timeout"}
+        params = self.model_dump(exclude=exclude)
         return params
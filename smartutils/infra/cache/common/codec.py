@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import dataclasses
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Optional, Type, TypeVar, Union
+from uuid import UUID
+
+import orjson
+from pydantic import BaseModel
+
+from smartutils.error.sys import LibraryUsageError
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+if TYPE_CHECKING:  # pragma: no cover
+    import lz4.frame as lz4_frame
+    import msgpack
+
+__all__ = ["CodecFormat", "Compression", "RedisCodec"]
+
+T = TypeVar("T")
+
+
+class CodecFormat(str, Enum):
+    JSON = "json"
+    MSGPACK = "msgpack"
+
+
+class Compression(str, Enum):
+    NONE = "none"
+    ZLIB = "zlib"
+    LZ4 = "lz4"
+
+
+_FORMATS = list(CodecFormat)
+_COMPRESSIONS = list(Compression)
+# 头字节 = 1 + 格式序号 * 4 + 压缩序号，均小于 0x20；
+# JSON 文本首字节不会与之冲突，无头字节的值按旧的 to_json 数据解析
+_JSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_UUID | orjson.OPT_SERIALIZE_NUMPY
+)
+
+
+def _header(fmt: CodecFormat, compression: Compression) -> int:
+    return 1 + _FORMATS.index(fmt) * 4 + _COMPRESSIONS.index(compression)
+
+
+# 头字节 -> (格式, 压缩)；不在表中的首字节（含 JSON 前导空白 \t\n\r）按旧 JSON 数据解析
+_HEADERS = {_header(f, c): (f, c) for f in _FORMATS for c in _COMPRESSIONS}
+
+
+def _default(obj):
+    # orjson 原生支持 dataclass/datetime/UUID/Enum，只需处理 pydantic 模型
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not serializable: {type(obj)}")
+
+
+def _msgpack_default(obj):
+    # msgpack 只接收基础类型，pydantic 按 json 模式导出
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Type is not serializable: {type(obj)}")
+
+
+class RedisCodec:
+    """
+    Redis 值编解码：序列化 + 超过阈值时压缩，首字节记录格式与压缩方式。
+    - 支持 dict/list/基础类型、dataclass、pydantic 模型；解码时传入类型可直接还原对象。
+    - 直接处理 bytes，不经过 DecodeBytes 的字符串解码。
+    - 兼容旧的 to_json 存储值（无头字节的 JSON）。
+
+    用法：
+    ```
+    codec = RedisCodec(CodecFormat.MSGPACK, Compression.LZ4, threshold=512)
+    await cli.set_obj("user:1", user, ex=60, codec=codec)
+    user = await cli.get_obj("user:1", User, codec=codec)
+    ```
+    """
+
+    def __init__(
+        self,
+        fmt: CodecFormat = CodecFormat.JSON,
+        compression: Compression = Compression.ZLIB,
+        threshold: int = 1024,
+        level: int = 6,
+    ):
+        """
+        :param fmt: 序列化格式
+        :param compression: 压缩算法
+        :param threshold: 序列化后超过该字节数才压缩
+        :param level: zlib 压缩级别
+        """
+        self.fmt = CodecFormat(fmt)
+        self.compression = Compression(compression)
+        if self.fmt == CodecFormat.MSGPACK and msgpack is None:
+            raise LibraryUsageError("RedisCodec depend on msgpack, install first!")
+        if self.compression == Compression.LZ4 and lz4_frame is None:
+            raise LibraryUsageError("RedisCodec depend on lz4, install first!")
+        if threshold < 0:
+            raise LibraryUsageError("RedisCodec require threshold >= 0.")
+        self.threshold = threshold
+        self.level = level
+
+    def _dumps(self, obj) -> bytes:
+        if self.fmt == CodecFormat.MSGPACK:
+            return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+        return orjson.dumps(obj, option=_JSON_OPTIONS, default=_default)
+
+    @staticmethod
+    def _loads(fmt: CodecFormat, data: Union[bytes, memoryview]) -> Any:
+        if fmt == CodecFormat.MSGPACK:
+            if msgpack is None:
+                raise LibraryUsageError("RedisCodec depend on msgpack, install first!")
+            return msgpack.unpackb(data, raw=False)
+        return orjson.loads(data)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == Compression.LZ4:
+            return lz4_frame.compress(data)
+        return zlib.compress(data, self.level)
+
+    @staticmethod
+    def _decompress(compression: Compression, data: memoryview) -> bytes:
+        if compression == Compression.LZ4:
+            if lz4_frame is None:
+                raise LibraryUsageError("RedisCodec depend on lz4, install first!")
+            return lz4_frame.decompress(data)
+        return zlib.decompress(data)
+
+    def encode(self, obj) -> bytes:
+        data = self._dumps(obj)
+        compression = Compression.NONE
+        if self.compression != Compression.NONE and len(data) > self.threshold:
+            compressed = self._compress(data)
+            # 压缩无收益时保留原文
+            if len(compressed) < len(data):
+                data, compression = compressed, self.compression
+        return bytes((_header(self.fmt, compression),)) + data
+
+    @classmethod
+    def decode(
+        cls, data: Optional[Union[bytes, str]], type_: Optional[Type[T]] = None
+    ) -> Optional[Union[T, Any]]:
+        """
+        按头字节解码，与编码时的 codec 配置无关。
+        :param type_: pydantic 模型或 dataclass，传入时还原为该类型
+        :return: key 不存在(None)时为 None
+        """
+        if data is None:
+            return None
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        codec = _HEADERS.get(data[0]) if data else None
+        if codec is None:
+            obj = orjson.loads(data)
+        else:
+            fmt, compression = codec
+            body = memoryview(data)[1:]
+            if compression != Compression.NONE:
+                body = memoryview(cls._decompress(compression, body))
+            obj = cls._loads(fmt, body)
+        if type_ is None or obj is None:
+            return obj
+        if issubclass(type_, BaseModel):
+            return type_.model_validate(obj)
+        if dataclasses.is_dataclass(type_):
+            return type_(**obj)
+        return type_(obj)  # type: ignore
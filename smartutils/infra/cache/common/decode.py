@@ -1,3 +1,126 @@
+from typing import Any, Callable, Dict, Optional
+
+# 返回值类型与 RedisManager 文档中的返回值总结一致
+# 只返回 int/float/bool 的命令，无需解码
+_PLAIN_COMMANDS = frozenset(
+    {
+        "incr",
+        "incrby",
+        "incrbyfloat",
+        "decr",
+        "decrby",
+        "hincrby",
+        "hincrbyfloat",
+        "zincrby",
+        "zscore",
+        "zrank",
+        "zrevrank",
+        "setex",
+        "psetex",
+        "setnx",
+        "mset",
+        "msetnx",
+        "strlen",
+        "sadd",
+        "srem",
+        "scard",
+        "sismember",
+        "llen",
+        "lpush",
+        "rpush",
+        "lrem",
+        "zadd",
+        "zrem",
+        "zcard",
+        "zcount",
+        "hset",
+        "hdel",
+        "hlen",
+        "hexists",
+        "delete",
+        "unlink",
+        "exists",
+        "expire",
+        "pexpire",
+        "expireat",
+        "ttl",
+        "pttl",
+        "persist",
+        "touch",
+        "publish",
+        "pfadd",
+        "pfcount",
+        "setbit",
+        "getbit",
+        "bitcount",
+        "bitpos",
+        "xack",
+        "xlen",
+        "dbsize",
+    }
+)
+# 返回单个字符串（或 None）的命令
+_SCALAR_COMMANDS = frozenset(
+    {
+        "get",
+        "set",
+        "getset",
+        "getdel",
+        "getex",
+        "getrange",
+        "hget",
+        "lindex",
+        "lpop",
+        "rpop",
+        "spop",
+        "srandmember",
+        "rpoplpush",
+        "lmove",
+        "blmove",
+        "randomkey",
+        "type",
+        "xadd",
+        "echo",
+    }
+)
+# 返回字符串序列的命令，元素为容器时（如 sort groups、bzpopmax）递归解码
+_SEQ_COMMANDS = frozenset(
+    {
+        "mget",
+        "hmget",
+        "hkeys",
+        "hvals",
+        "lrange",
+        "smembers",
+        "sinter",
+        "sunion",
+        "sdiff",
+        "keys",
+        "zrangebylex",
+        "bzpopmax",
+        "bzpopmin",
+        "blpop",
+        "brpop",
+        "sort",
+    }
+)
+# 返回有序集合成员的命令，withscores 时元素为 (member, score) 元组，score 已是数值
+_SCORED_COMMANDS = frozenset(
+    {
+        "zrange",
+        "zrevrange",
+        "zrangebyscore",
+        "zrevrangebyscore",
+        "zpopmax",
+        "zpopmin",
+    }
+)
+# 返回字符串字典的命令
+_MAPPING_COMMANDS = frozenset({"hgetall"})
+
+_CONTAINERS = (list, tuple, set, dict)
+
+
 class DecodeBytes:
     def __init__(self, redis_decode_responses: bool):
         self._redis_decode_responses = redis_decode_responses
@@ -17,8 +140,52 @@ class DecodeBytes:
             return typ(self._do(item) for item in obj)
         return obj
 
+    def _scalar(self, obj):
+        if obj.__class__ is bytes:
+            return obj.decode("utf-8")
+        if isinstance(obj, _CONTAINERS):
+            # 如 lpop/spop 传入 count
+            return self._do(obj)
+        return obj
+
+    def _seq(self, obj):
+        typ = obj.__class__
+        if typ is not list and typ is not tuple and typ is not set:
+            return self._scalar(obj)
+        ret = [
+            (
+                x.decode("utf-8")
+                if x.__class__ is bytes
+                else (self._do(x) if isinstance(x, _CONTAINERS) else x)
+            )
+            for x in obj
+        ]
+        return ret if typ is list else typ(ret)
+
+    def _scored(self, obj):
+        if obj.__class__ is not list:
+            return self._seq(obj)
+        return [
+            (
+                (x[0].decode("utf-8") if x[0].__class__ is bytes else x[0], x[1])
+                if x.__class__ is tuple
+                else (x.decode("utf-8") if x.__class__ is bytes else self._scalar(x))
+            )
+            for x in obj
+        ]
+
+    def _mapping(self, obj):
+        if obj.__class__ is not dict:
+            return self._do(obj)
+        return {
+            (k.decode("utf-8") if k.__class__ is bytes else self._do(k)): (
+                v.decode("utf-8") if v.__class__ is bytes else self._do(v)
+            )
+            for k, v in obj.items()
+        }
+
     def pre(self, args=None, kwargs=None):
-        if not kwargs:
+        if not kwargs or self._kwargs_key not in kwargs:
             return args, kwargs
 
         # 从参数中，去掉自定义flag，避免redis方法调用报错
@@ -33,3 +200,30 @@ class DecodeBytes:
             return result
 
         return self._do(result)
+
+    def post_for(self, command: str) -> Optional[Callable[..., Any]]:
+        """
+        按命令返回值类型选择解码函数，参数同 post；无需解码时返回 None。
+        未登记的命令使用通用递归解码。
+        """
+        if self._redis_decode_responses or command in _PLAIN_COMMANDS:
+            return None
+        decoders: Dict[frozenset, Callable[[Any], Any]] = {
+            _SCALAR_COMMANDS: self._scalar,
+            _SEQ_COMMANDS: self._seq,
+            _SCORED_COMMANDS: self._scored,
+            _MAPPING_COMMANDS: self._mapping,
+        }
+        decode = self._do
+        for commands, decoder in decoders.items():
+            if command in commands:
+                decode = decoder
+                break
+        key = self._kwargs_key
+
+        def post(result, args=None, kwargs=None):
+            if kwargs and not kwargs.get(key, True):
+                return result
+            return decode(result)
+
+        return post
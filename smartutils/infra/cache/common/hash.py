@@ -0,0 +1,27 @@
+import hashlib
+from typing import List, Tuple, Union
+
+HashItem = Union[str, bytes, int]
+
+
+def to_bytes(item: HashItem) -> bytes:
+    if isinstance(item, bytes):
+        return item
+    return str(item).encode("utf-8")
+
+
+def double_hash(item: HashItem) -> Tuple[int, int]:
+    """
+    一次 blake2b 得到两个 64 位哈希，供 Kirsch-Mitzenmacher 双重哈希生成多个位置。
+    h2 取奇数，与 2 的幂取模时也能遍历所有位置。
+    """
+    digest = hashlib.blake2b(to_bytes(item), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return h1, h2
+
+
+def hash_positions(item: HashItem, k: int, m: int) -> List[int]:
+    """元素在 [0, m) 内的 k 个位置：(h1 + i * h2) % m。"""
+    h1, h2 = double_hash(item)
+    return [(h1 + i * h2) % m for i in range(k)]
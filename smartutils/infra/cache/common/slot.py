@@ -0,0 +1,28 @@
+__all__ = ["hash_tag", "tag_key"]
+
+
+def hash_tag(key: str) -> str:
+    """
+    参与槽位/分片计算的部分，规则同 Redis Cluster 哈希标签：
+    key 中第一个 {...} 非空时只按括号内内容计算，如 user:{42}:profile 与 user:{42}:orders 同槽。
+    """
+    start = key.find("{")
+    if start == -1:
+        return key
+    end = key.find("}", start + 1)
+    if end == -1 or end == start + 1:
+        return key
+    return key[start + 1 : end]
+
+
+def tag_key(key: str) -> str:
+    """
+    集群模式下为 key 补哈希标签，重复调用结果不变：
+    - 已有哈希标签的 key 不变；
+    - 否则以第一个 ':' 之前的命名空间为标签，如 orders:queue -> {orders}:queue，
+      同一命名空间下的 queue/pending 等 key 落在同一槽；无 ':' 时整个 key 为标签。
+    """
+    if hash_tag(key) != key:
+        return key
+    ns, sep, rest = key.partition(":")
+    return f"{{{ns}}}{sep}{rest}"
@@ -1,5 +1,10 @@
+import re
 import sys
-from typing import TYPE_CHECKING, Optional, Set
+import uuid
+from array import array
+from collections.abc import AsyncGenerator
+from enum import Enum
+from typing import TYPE_CHECKING, Any, List, Optional, Set, Tuple, Union
 
 from smartutils.error.sys import LibraryUsageError
 from smartutils.infra.cache.common.decode import DecodeBytes
@@ -12,6 +17,55 @@ except ImportError:
 if TYPE_CHECKING:  # pragma: no cover
     from redis.asyncio import Redis
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 每个字节值中为 1 的位序号，Redis 位序为高位在前
+_BYTE_BITS = tuple(
+    tuple(i for i in range(8) if byte & (0x80 >> i)) for byte in range(256)
+)
+_NONZERO_RUNS = re.compile(rb"[^\x00]+")
+
+# 有 numpy 时为 numpy.ndarray(int64)，否则为 array("q")
+BitArray = Union["np.ndarray", array]
+
+
+def _decode_chunk(chunk: bytes, base_bit: int) -> BitArray:
+    """解码一段 bitmap 中为 1 的位，返回绝对下标。"""
+    if np is not None:
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        # 只展开非零字节，稀疏 bitmap 下远快于整体 unpackbits
+        nonzero = np.flatnonzero(data)
+        bits = np.unpackbits(data[nonzero]).reshape(-1, 8).astype(bool)
+        offsets = nonzero.astype(np.int64)[:, None] * 8 + np.arange(8)
+        return offsets[bits] + base_bit
+    ret = array("q")
+    # 正则在 C 层跳过全零区间，稀疏 bitmap 只遍历非零字节
+    for m in _NONZERO_RUNS.finditer(chunk):
+        bit = base_bit + m.start() * 8
+        for byte in m.group():
+            ret.extend([bit + i for i in _BYTE_BITS[byte]])
+            bit += 8
+    return ret
+
+
+def _concat(parts: List[BitArray]) -> BitArray:
+    if np is not None:
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    ret = array("q")
+    for part in parts:
+        ret.extend(part)
+    return ret
+
+
+class BitOp(str, Enum):
+    AND = "AND"
+    OR = "OR"
+    XOR = "XOR"
+    NOT = "NOT"
+
 
 class RedisBitmap:
     """
@@ -22,6 +76,7 @@ class RedisBitmap:
         self._redis: Redis = redis_cli
         self._decode_bytes = decode_bytes
         self._test_corner_case = False
+        self.tmp_prefix = "smartutils:bitmap:tmp"
 
     def _check(self):
         if self._decode_bytes.redis_decode_responses and not self._test_corner_case:
@@ -47,31 +102,238 @@ class RedisBitmap:
         result = await self._redis.getbit(key, offset)
         return bool(result)
 
+    async def iter_set_bits(
+        self,
+        key: str,
+        max_offset: Optional[int] = None,
+        chunk_bytes: int = 1 << 20,
+        start: int = 0,
+    ) -> AsyncGenerator[BitArray, None]:
+        """
+        分块流式读取 bitmap 中为 1 的bit下标，每块一个有序数组。
+        每块先 BITPOS 跳过全零区间，再 GETRANGE 读取 chunk_bytes 字节；
+        有 numpy 时用 unpackbits 解码并返回 numpy 数组，否则查表解码返回 array("q")。
+        :param key: bitmap键
+        :param max_offset: 最大bit下标（含），None 为不限
+        :param chunk_bytes: 单次 GETRANGE 字节数
+        :param start: 起始bit下标（含）
+        """
+        self._check()
+        if chunk_bytes <= 0:
+            raise LibraryUsageError("RedisBitmap chunk_bytes must be positive.")
+        size = await self._redis.strlen(key)
+        if max_offset is not None:
+            size = min(size, max_offset // 8 + 1)
+        byte = start // 8
+        while byte < size:
+            pos = await self._redis.bitpos(key, 1, byte)
+            if pos < 0 or pos // 8 >= size:
+                return
+            byte = pos // 8
+            end = min(byte + chunk_bytes, size)
+            chunk = await self._redis.getrange(key, byte, end - 1)
+            if isinstance(chunk, str):  # pragma: no cover
+                # 兼容String返回
+                logger.error("RedisBitmap string unexcepted!!!")
+                chunk = chunk.encode()
+            if not chunk:
+                return
+            bits = _decode_chunk(chunk, byte * 8)
+            if max_offset is not None and len(bits) and bits[-1] > max_offset:
+                bits = bits[: self._bisect_right(bits, max_offset)]
+            if len(bits) and bits[0] < start:
+                bits = bits[self._bisect_right(bits, start - 1) :]
+            if len(bits):
+                yield bits
+            byte += len(chunk)
+
+    @staticmethod
+    def _bisect_right(bits: Any, offset: int) -> int:
+        if np is not None and isinstance(bits, np.ndarray):
+            return int(np.searchsorted(bits, offset, side="right"))
+        lo, hi = 0, len(bits)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bits[mid] <= offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    async def get_set_bits(
+        self,
+        key: str,
+        max_offset: Optional[int] = None,
+        chunk_bytes: int = 1 << 20,
+    ) -> BitArray:
+        """
+        获取 bitmap 中为 1 的bit下标，返回紧凑有序数组，比 set 节省数倍内存。
+        参数同 iter_set_bits。
+        """
+        parts = [
+            bits async for bits in self.iter_set_bits(key, max_offset, chunk_bytes)
+        ]
+        return _concat(parts)
+
     async def get_all_set_bits(
         self, key: str, max_offset: int = sys.maxsize
     ) -> Optional[Set[int]]:
         """
         获取bitmap中所有为 1 的bit下标（即所有set用户、资源编号等）。
+        大 bitmap 请使用 iter_set_bits/get_set_bits 避免构建 set。
         :param key: bitmap键
         :param max_offset: 最大遍历bit（业务方根据ID最大值传递)
-        :return: 被置1的bit集合
+        :return: 被置1的bit集合，key不存在时为None
         """
         self._check()
-        bitmap = await self._redis.get(key)
-        if not bitmap:
+        if not await self._redis.strlen(key):
             return None
-        if isinstance(bitmap, str):  # pragma: no cover
-            # 兼容String返回
-            logger.error("RedisBitmap string unexcepted!!!")
-            bitmap = bitmap.encode()
-        result = set()
-        for byte_index, byte in enumerate(bitmap):
-            if not byte:
-                continue
-            for bit_index in range(8):
-                idx = byte_index * 8 + bit_index
-                if idx > max_offset:
-                    return result
-                if byte & (1 << (7 - bit_index)):
-                    result.add(idx)
-        return result
+        bits = await self.get_set_bits(key, max_offset)
+        return set(bits.tolist())
+
+    def _tmp_key(self) -> str:
+        return f"{self.tmp_prefix}:{uuid.uuid4().hex}"
+
+    @staticmethod
+    def _check_op(op: BitOp, keys: List[str]):
+        if not keys:
+            raise LibraryUsageError("RedisBitmap bitop require keys.")
+        if op == BitOp.NOT and len(keys) != 1:
+            raise LibraryUsageError("RedisBitmap bitop NOT require exactly one key.")
+
+    async def bitop(
+        self,
+        op: BitOp,
+        keys: List[str],
+        dest: Optional[str] = None,
+        ttl: Optional[int] = 60,
+    ) -> str:
+        """
+        服务端 BITOP，结果写入 dest，与过期时间在同一事务内设置。
+        注意 NOT 结果长度与源相同，超出源长度的位不会被置1，求差集请用 difference。
+        :param op: AND/OR/XOR/NOT
+        :param keys: 源bitmap键
+        :param dest: 结果键，默认生成临时键
+        :param ttl: 结果过期秒数，None 为不过期
+        :return: 结果键
+        """
+        op = BitOp(op)
+        self._check_op(op, keys)
+        dest = dest or self._tmp_key()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.bitop(op.value, dest, *keys)
+            if ttl:
+                pipe.expire(dest, ttl)
+            await pipe.execute()
+        return dest
+
+    async def difference(
+        self,
+        key: str,
+        excludes: List[str],
+        dest: Optional[str] = None,
+        ttl: Optional[int] = 60,
+    ) -> str:
+        """
+        差集 key AND NOT (excludes...)，按 key XOR (key AND excludes) 计算，与各键长度无关。
+        一次事务往返完成，中间结果不离开 Redis。
+        :return: 结果键
+        """
+        if not excludes:
+            raise LibraryUsageError("RedisBitmap difference require excludes.")
+        dest = dest or self._tmp_key()
+        tmp = self._tmp_key()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            if len(excludes) > 1:
+                pipe.bitop(BitOp.OR.value, tmp, *excludes)
+                pipe.bitop(BitOp.AND.value, tmp, key, tmp)
+            else:
+                pipe.bitop(BitOp.AND.value, tmp, key, excludes[0])
+            pipe.bitop(BitOp.XOR.value, dest, key, tmp)
+            pipe.delete(tmp)
+            if ttl:
+                pipe.expire(dest, ttl)
+            await pipe.execute()
+        return dest
+
+    async def count(
+        self,
+        key: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        mode: Optional[str] = None,
+    ) -> int:
+        """
+        BITCOUNT 统计为 1 的位数。
+        :param start: 起始位置（含），默认按字节
+        :param end: 结束位置（含）
+        :param mode: "BYTE"/"BIT"，BIT 需 Redis 7+
+        """
+        return await self._redis.bitcount(key, start, end, mode)  # type: ignore
+
+    async def op_count(
+        self,
+        op: BitOp,
+        keys: List[str],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> int:
+        """
+        BITOP 后 BITCOUNT 并删除临时结果，一次事务往返，只返回计数。
+        :param start: BITCOUNT 起始字节（含）
+        :param end: BITCOUNT 结束字节（含）
+        """
+        op = BitOp(op)
+        self._check_op(op, keys)
+        tmp = self._tmp_key()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.bitop(op.value, tmp, *keys)
+            pipe.bitcount(tmp, start, end)
+            pipe.delete(tmp)
+            ret = await pipe.execute()
+        return ret[1]
+
+    async def page(
+        self,
+        key: str,
+        cursor: int = 0,
+        limit: int = 1000,
+        chunk_bytes: int = 1 << 16,
+    ) -> Tuple[BitArray, Optional[int]]:
+        """
+        从 cursor 开始取最多 limit 个为 1 的bit下标，无状态分页。
+        :param cursor: 起始bit下标（含），首页为 0
+        :return: (本页下标数组, 下一页cursor，None 表示已取完)
+        """
+        if limit <= 0:
+            raise LibraryUsageError("RedisBitmap page limit must be positive.")
+        parts: List[BitArray] = []
+        n = 0
+        async for bits in self.iter_set_bits(
+            key, chunk_bytes=chunk_bytes, start=cursor
+        ):
+            need = limit - n
+            if len(bits) >= need:
+                parts.append(bits[:need])
+                return _concat(parts), int(bits[need - 1]) + 1
+            parts.append(bits)
+            n += len(bits)
+        return _concat(parts), None
+
+    async def iter_pages(
+        self, key: str, page_size: int = 1000, chunk_bytes: int = 1 << 16
+    ) -> AsyncGenerator[BitArray, None]:
+        """
+        按页迭代为 1 的bit下标，通常用于 bitop 的结果键。
+        用法：
+        ```
+        dest = await cli.bitmap.difference(active, [churned])
+        async for uids in cli.bitmap.iter_pages(dest, 500):
+            ...
+        ```
+        """
+        cursor: Optional[int] = 0
+        while cursor is not None:
+            bits, cursor = await self.page(key, cursor, page_size, chunk_bytes)
+            if len(bits):
+                yield bits
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING, Iterable, List
+
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.hash import HashItem, hash_positions
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["RedisBloomFilter"]
+
+# Redis 字符串最大 512MB
+_MAX_BITS = 1 << 32
+
+
+class RedisBloomFilter:
+    """
+    基于 Redis bitmap 的布隆过滤器，无需 RedisBloom 模块。
+    - 位数与哈希数按 capacity/error_rate 计算，同一 key 的参数必须一致。
+    - 哈希位置在客户端计算，每批元素的设置/检查在一次 Lua 调用内完成；
+      多批通过 Lua pipeline 一次往返发送，单次 Lua 调用不会长时间阻塞 Redis。
+    - 判定存在可能误判（概率约 error_rate），判定不存在一定准确。
+
+    用法：
+    ```
+    seen = cli.bloom_filter("crawler:seen", capacity=10_000_000, error_rate=0.001)
+    new_flags = await seen.add_many(urls)
+    ```
+    """
+
+    def __init__(
+        self,
+        redis_cli: Redis,
+        key: str,
+        capacity: int,
+        error_rate: float = 0.01,
+        batch_size: int = 1000,
+    ):
+        """
+        :param key: bitmap键
+        :param capacity: 预期元素数，超出后误判率上升
+        :param error_rate: 目标误判率
+        :param batch_size: 单次 Lua 调用处理的元素数
+        """
+        if capacity <= 0 or batch_size <= 0:
+            raise LibraryUsageError("RedisBloomFilter require positive capacity.")
+        if not 0 < error_rate < 1:
+            raise LibraryUsageError("RedisBloomFilter require 0 < error_rate < 1.")
+        self._redis: Redis = redis_cli
+        self.key = key
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._batch_size = batch_size
+        self.bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        if self.bits > _MAX_BITS:
+            raise LibraryUsageError(
+                f"RedisBloomFilter {key} need {self.bits} bits, exceed 512MB."
+            )
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+
+    @property
+    def memory_bytes(self) -> int:
+        """填满后占用的 Redis 内存字节数（不含 key 开销）。"""
+        return (self.bits + 7) // 8
+
+    async def _run(self, name: LuaName, items: List[HashItem]) -> List[bool]:
+        if not items:
+            return []
+        pipe = LuaManager.pipeline(self._redis)
+        for i in range(0, len(items), self._batch_size):
+            args: List[int] = [self.hashes]
+            for item in items[i : i + self._batch_size]:
+                args.extend(hash_positions(item, self.hashes, self.bits))
+            pipe.call(name, keys=[self.key], args=args)
+        return [bool(flag) for ret in await pipe.execute() for flag in ret]
+
+    async def add(self, item: HashItem) -> bool:
+        """:return: 是否新增，False 表示（可能）已存在"""
+        return (await self.add_many([item]))[0]
+
+    async def add_many(self, items: Iterable[HashItem]) -> List[bool]:
+        """
+        批量添加。
+        :return: 每个元素是否新增，同批内重复元素只有第一个为 True
+        """
+        return await self._run(LuaName.BLOOM_ADD, list(items))
+
+    async def contains(self, item: HashItem) -> bool:
+        return (await self.contains_many([item]))[0]
+
+    async def contains_many(self, items: Iterable[HashItem]) -> List[bool]:
+        """批量查询，返回每个元素是否（可能）存在。"""
+        return await self._run(LuaName.BLOOM_CONTAINS, list(items))
+
+    async def approx_count(self) -> int:
+        """按已置位数估算元素数：-m/k * ln(1 - X/m)。"""
+        ones = await self._redis.bitcount(self.key)
+        if ones >= self.bits:
+            return self.capacity
+        return round(-self.bits / self.hashes * math.log(1 - ones / self.bits))
+
+    async def clear(self) -> int:
+        return await self._redis.delete(self.key)  # type: ignore
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.decode import DecodeBytes
+from smartutils.infra.cache.common.hash import HashItem, double_hash
+from smartutils.infra.cache.common.slot import hash_tag
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["RedisCountMinSketch"]
+
+
+class RedisCountMinSketch:
+    """
+    Count-Min sketch 频次估计，用于热点 key/URL 等 heavy hitter 统计。
+    - depth 行 x width 列 u32 饱和计数器，存放在一个字符串中（BITFIELD），内存 width*depth*4 字节。
+    - 估计值不小于真实值，超出量以高概率不超过 总计数 * e / width。
+    - topk > 0 时在 topk_key 有序集合中维护估计值最大的 topk 个元素，
+      topk_key 与 key 哈希标签相同，集群模式下位于同一槽。
+    - 每批累加一次 Lua 调用，多批一次往返。
+
+    用法：
+    ```
+    cms = cli.count_min_sketch("hot:url", width=2000, depth=5, topk=100)
+    await cms.add_many(urls)
+    hot = await cms.top(10)
+    ```
+    """
+
+    def __init__(
+        self,
+        redis_cli: Redis,
+        decode_bytes: DecodeBytes,
+        key: str,
+        width: int = 2000,
+        depth: int = 5,
+        topk: int = 0,
+        batch_size: int = 500,
+    ):
+        """
+        :param key: 计数器键
+        :param width: 每行计数器数，可由 dimensions 按误差计算
+        :param depth: 行数（哈希数）
+        :param topk: 维护的热点数，0 为不维护
+        :param batch_size: 单次 Lua 调用处理的元素数
+        """
+        if width <= 0 or depth <= 0 or topk < 0 or batch_size <= 0:
+            raise LibraryUsageError(
+                "RedisCountMinSketch require positive width/depth/batch_size."
+            )
+        self._redis: Redis = redis_cli
+        self._decode_bytes = decode_bytes
+        self.key = key
+        # 无哈希标签时以整个 key 为标签，{key}:topk 与 key 同槽
+        tag = hash_tag(key)
+        self.topk_key = f"{key}:topk" if tag != key else f"{{{key}}}:topk"
+        self.width = width
+        self.depth = depth
+        self.topk = topk
+        self._batch_size = batch_size
+
+    @staticmethod
+    def dimensions(epsilon: float, delta: float) -> Tuple[int, int]:
+        """
+        按误差要求计算 (width, depth)：
+        以 1 - delta 的概率，估计误差不超过 epsilon * 总计数。
+        """
+        if not (0 < epsilon < 1 and 0 < delta < 1):
+            raise LibraryUsageError(
+                "RedisCountMinSketch require 0 < epsilon/delta < 1."
+            )
+        return math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.width * self.depth * 4
+
+    def _offsets(self, item: HashItem) -> List[str]:
+        h1, h2 = double_hash(item)
+        return [
+            f"#{row * self.width + (h1 + row * h2) % self.width}"
+            for row in range(self.depth)
+        ]
+
+    async def incrby(self, counts: Mapping[HashItem, int]) -> Dict[HashItem, int]:
+        """
+        批量累加。
+        :param counts: 元素 -> 增量
+        :return: 元素 -> 累加后的估计值
+        """
+        items = list(counts.items())
+        if not items:
+            return {}
+        pipe = LuaManager.pipeline(self._redis)
+        for i in range(0, len(items), self._batch_size):
+            args: List = [self.depth, self.topk]
+            for item, n in items[i : i + self._batch_size]:
+                if n <= 0:
+                    raise LibraryUsageError(
+                        f"RedisCountMinSketch incrby {item} require positive count."
+                    )
+                args.extend([item, n, *self._offsets(item)])
+            pipe.call(LuaName.CMS_INCRBY, keys=[self.key, self.topk_key], args=args)
+        rets = [est for ret in await pipe.execute() for est in ret]
+        return {item: int(est) for (item, _), est in zip(items, rets)}
+
+    async def incr(self, item: HashItem, n: int = 1) -> int:
+        return (await self.incrby({item: n}))[item]
+
+    async def add_many(self, items: Iterable[HashItem]) -> Dict[HashItem, int]:
+        """每次出现计数 1，重复元素先在本地合并。"""
+        return await self.incrby(Counter(items))
+
+    async def estimate_many(self, items: Iterable[HashItem]) -> List[int]:
+        """批量查询估计值，一次往返的 BITFIELD_RO。"""
+        items = list(items)
+        if not items:
+            return []
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for i in range(0, len(items), self._batch_size):
+                args: List[str] = []
+                for item in items[i : i + self._batch_size]:
+                    for offset in self._offsets(item):
+                        args.extend(["GET", "u32", offset])
+                pipe.execute_command("BITFIELD_RO", self.key, *args)
+            rets = await pipe.execute()
+        vals = [int(v) for ret in rets for v in ret]
+        return [
+            min(vals[i * self.depth : (i + 1) * self.depth]) for i in range(len(items))
+        ]
+
+    async def estimate(self, item: HashItem) -> int:
+        return (await self.estimate_many([item]))[0]
+
+    async def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        估计值最大的元素，需 topk > 0。
+        :return: [(元素, 估计值)]，按估计值降序
+        """
+        if not self.topk:
+            raise LibraryUsageError("RedisCountMinSketch top require topk > 0.")
+        n = min(n or self.topk, self.topk)
+        ret = await self._redis.zrevrange(self.topk_key, 0, n - 1, withscores=True)
+        return [(self._decode_bytes.post(m), int(s)) for m, s in ret]
+
+    async def clear(self) -> int:
+        return await self._redis.delete(self.key, self.topk_key)  # type: ignore
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from smartutils.error.sys import LibraryUsageError
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["KeyInfo", "PrefixStat", "KeyspaceReport", "RedisKeyspace"]
+
+
+def _str(val) -> str:
+    # key 可能不是合法 utf-8，分析场景不因个别 key 中断
+    if isinstance(val, bytes):
+        return val.decode("utf-8", "backslashreplace")
+    return val
+
+
+@dataclass
+class KeyInfo:
+    """
+    :param key: key 名
+    :param type: string/list/set/zset/hash/stream 等
+    :param ttl: 剩余秒数，-1 表示未设置过期
+    :param memory: MEMORY USAGE 字节数，未采集或服务端禁用时为 None
+    """
+
+    key: str
+    type: str
+    ttl: int
+    memory: Optional[int] = None
+
+
+@dataclass
+class PrefixStat:
+    """
+    :param prefix: key 前缀
+    :param keys: key 数
+    :param memory: 内存字节数之和
+    :param no_ttl: 未设置过期的 key 数
+    :param types: 类型 -> key 数
+    :param biggest_key: 该前缀下内存最大的 key
+    """
+
+    prefix: str
+    keys: int = 0
+    memory: int = 0
+    no_ttl: int = 0
+    types: Dict[str, int] = field(default_factory=dict)
+    biggest_key: str = ""
+    biggest_memory: int = 0
+
+
+class KeyspaceReport:
+    """
+    按 key 前缀聚合 KeyInfo，自身内存只与前缀数有关，与 key 数量无关。
+    前缀取 key 按 separator 切分后的前 depth 段，段数不足的 key 归入 "" 前缀。
+    """
+
+    def __init__(self, separator: str = ":", depth: int = 1, top: int = 20):
+        """
+        :param separator: 前缀分隔符
+        :param depth: 前缀段数
+        :param top: 记录内存最大的 key 数
+        """
+        if depth <= 0 or top < 0:
+            raise LibraryUsageError("KeyspaceReport require positive depth/top.")
+        self._separator = separator
+        self._depth = depth
+        self._top = top
+        self.prefixes: Dict[str, PrefixStat] = {}
+        self.total = PrefixStat("*")
+        # 最小堆，保留内存最大的 top 个 (memory, key)
+        self._biggest: List[Tuple[int, str]] = []
+
+    def prefix_of(self, key: str) -> str:
+        parts = key.split(self._separator, self._depth)
+        if len(parts) <= self._depth:
+            return ""
+        return self._separator.join(parts[: self._depth])
+
+    @staticmethod
+    def _add(stat: PrefixStat, info: KeyInfo):
+        stat.keys += 1
+        stat.types[info.type] = stat.types.get(info.type, 0) + 1
+        if info.ttl == -1:
+            stat.no_ttl += 1
+        if info.memory is not None:
+            stat.memory += info.memory
+            if info.memory > stat.biggest_memory:
+                stat.biggest_key, stat.biggest_memory = info.key, info.memory
+
+    def add(self, info: KeyInfo):
+        prefix = self.prefix_of(info.key)
+        stat = self.prefixes.get(prefix)
+        if stat is None:
+            stat = self.prefixes[prefix] = PrefixStat(prefix)
+        self._add(stat, info)
+        self._add(self.total, info)
+        if self._top and info.memory is not None:
+            item = (info.memory, info.key)
+            if len(self._biggest) < self._top:
+                heapq.heappush(self._biggest, item)
+            elif item > self._biggest[0]:
+                heapq.heapreplace(self._biggest, item)
+
+    def sorted(self, by: str = "memory") -> List[PrefixStat]:
+        """
+        前缀统计降序排列。
+        :param by: memory/keys/no_ttl
+        """
+        if by not in ("memory", "keys", "no_ttl"):
+            raise LibraryUsageError(f"KeyspaceReport can not sort by {by}.")
+        stats = self.prefixes.values()
+        return sorted(stats, key=lambda s: getattr(s, by), reverse=True)
+
+    @property
+    def biggest(self) -> List[Tuple[str, int]]:
+        """内存最大的 key：[(key, memory)]，降序"""
+        return [(key, mem) for mem, key in sorted(self._biggest, reverse=True)]
+
+
+class RedisKeyspace:
+    """
+    基于 SCAN 的 key 遍历与内存分析，不使用阻塞的 KEYS。
+    - 每页 SCAN 返回的 key，TYPE/TTL/MEMORY USAGE 合并为一次 pipeline 往返。
+    - 集群模式逐个主节点 SCAN，pipeline 按槽路由。
+    - SCAN 期间新增/删除的 key 可能遗漏或重复；扫描后已删除的 key 直接跳过。
+
+    用法：
+    ```
+    async for info in cli.scan_keys("user:*", type_="hash"):
+        if info.ttl == -1:
+            ...
+    report = await cli.keyspace.report(match="*", depth=2)
+    for stat in report.sorted("memory")[:10]:
+        print(stat.prefix, stat.keys, stat.memory, stat.no_ttl)
+    ```
+    """
+
+    def __init__(self, redis_cli: Redis, cluster: bool = False):
+        self._redis: Redis = redis_cli
+        self._cluster = cluster
+
+    async def _pages(
+        self, match: Optional[str], type_: Optional[str], count: int
+    ) -> AsyncGenerator[List, None]:
+        if not self._cluster:
+            cursor = 0
+            while True:
+                cursor, keys = await self._redis.scan(
+                    cursor, match=match, count=count, _type=type_
+                )  # type: ignore
+                if keys:
+                    yield keys
+                if not int(cursor):
+                    return
+        for node in self._redis.get_primaries():  # type: ignore
+            cursor = 0
+            while True:
+                cursors, keys = await self._redis.scan(
+                    cursor, match=match, count=count, _type=type_, target_nodes=node
+                )  # type: ignore
+                cursor = cursors[node.name]
+                if keys:
+                    yield keys
+                if not int(cursor):
+                    break
+
+    async def _inspect(
+        self, keys: List, memory: bool, samples: Optional[int]
+    ) -> List[KeyInfo]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.type(key)
+                pipe.ttl(key)
+                if memory:
+                    pipe.memory_usage(key, samples=samples)
+            rets = await pipe.execute(raise_on_error=False)
+        step = 3 if memory else 2
+        infos = []
+        for i, key in enumerate(keys):
+            type_, ttl = _str(rets[i * step]), rets[i * step + 1]
+            # 扫描后已删除
+            if type_ == "none" or ttl == -2:
+                continue
+            mem = rets[i * step + 2] if memory else None
+            # 服务端禁用 MEMORY 等错误，不影响其他字段
+            if isinstance(mem, Exception):
+                mem = None
+            infos.append(KeyInfo(_str(key), type_, int(ttl), mem))
+        return infos
+
+    async def scan(
+        self,
+        match: Optional[str] = None,
+        type_: Optional[str] = None,
+        count: int = 1000,
+        memory: bool = True,
+        samples: Optional[int] = None,
+        interval: float = 0,
+    ) -> AsyncGenerator[KeyInfo, None]:
+        """
+        遍历 key，逐个产出 KeyInfo。
+        :param match: SCAN MATCH 模式
+        :param type_: SCAN TYPE 过滤，需 Redis 6.0+
+        :param count: SCAN COUNT，每页 key 数的提示值
+        :param memory: 是否采集 MEMORY USAGE
+        :param samples: MEMORY USAGE SAMPLES，集合类型采样元素数，默认服务端的 5
+        :param interval: 每页之间的休眠秒数，降低对线上实例的压力
+        """
+        if count <= 0:
+            raise LibraryUsageError("RedisKeyspace require positive count.")
+        async for keys in self._pages(match, type_, count):
+            for info in await self._inspect(keys, memory, samples):
+                yield info
+            if interval:
+                await asyncio.sleep(interval)
+
+    async def report(
+        self,
+        match: Optional[str] = None,
+        type_: Optional[str] = None,
+        separator: str = ":",
+        depth: int = 1,
+        top: int = 20,
+        **kwargs,
+    ) -> KeyspaceReport:
+        """
+        遍历 key 并按前缀聚合。
+        :param kwargs: 透传 scan 参数
+        """
+        report = KeyspaceReport(separator, depth, top)
+        async for info in self.scan(match, type_, **kwargs):
+            report.add(info)
+        return report
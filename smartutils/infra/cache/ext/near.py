@@ -0,0 +1,391 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from time import monotonic
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.decode import DecodeBytes
+from smartutils.log import logger
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+    from redis.asyncio.connection import AbstractConnection
+
+__all__ = [
+    "NearCache",
+    "NearCacheInvalidation",
+    "NearCachePolicy",
+    "NearCacheStats",
+]
+
+_TRACKING_CHANNEL = "__redis__:invalidate"
+
+
+class NearCacheInvalidation(str, Enum):
+    # 仅依赖本地 TTL 过期
+    NONE = "none"
+    # 经 NearCache 写入时发布失效消息，其他写入方需自行发布
+    PUBSUB = "pubsub"
+    # Redis 服务端 BCAST 跟踪，任意客户端修改匹配前缀的 key 都会通知
+    TRACKING = "tracking"
+
+
+@dataclass
+class NearCachePolicy:
+    """
+    按 key 前缀配置本地缓存，多个前缀匹配时取最长者。
+    :param prefix: key 前缀，空字符串匹配所有 key
+    :param ttl: 本地缓存秒数
+    :param max_entries: 本地最多缓存条数，超出时淘汰最久未访问的
+    """
+
+    prefix: str
+    ttl: float
+    max_entries: int = 10000
+
+
+@dataclass
+class NearCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expired: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class _LRUTTL:
+    """单个前缀的本地存储：OrderedDict 维护访问顺序，条目带过期时间。"""
+
+    def __init__(self, policy: NearCachePolicy, stats: NearCacheStats):
+        self.policy = policy
+        self._stats = stats
+        self._data: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return False, None
+        value, expire_at = entry
+        if expire_at <= monotonic():
+            del self._data[key]
+            self._stats.expired += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        self._data[key] = (value, monotonic() + self.policy.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.policy.max_entries:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
+
+    def pop(self, key: str) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class NearCache(MyBase):
+    """
+    Redis 前的进程内缓存(LRU + TTL)，命中时不访问网络。
+    - 只缓存 get/mget 的结果（包括不存在的 key），写入请经由 set/delete 以便失效。
+    - 失效方式见 NearCacheInvalidation；失效监听未连接时直接读 Redis，断线重连后清空本地缓存。
+    - 读取期间收到失效消息时，本次结果不写入本地，避免旧值覆盖失效。
+
+    用法：
+    ```
+    near = cli.near_cache([NearCachePolicy("conf:", ttl=30)], NearCacheInvalidation.TRACKING)
+    AppHook.on_startup(near.start)
+    AppHook.on_shutdown(near.stop)
+    val = await near.get("conf:app")
+    ```
+    """
+
+    def __init__(
+        self,
+        redis_cli: Redis,
+        decode_bytes: DecodeBytes,
+        policies: List[NearCachePolicy],
+        invalidation: NearCacheInvalidation = NearCacheInvalidation.PUBSUB,
+        channel: str = "smartutils:near_cache:invalidate",
+        reconnect_interval: float = 1,
+        health_check_interval: float = 30,
+    ):
+        """
+        :param policies: 各前缀缓存策略，未匹配的 key 不做本地缓存
+        :param invalidation: 失效方式
+        :param channel: PUBSUB 方式的失效频道，所有实例需一致
+        :param reconnect_interval: 失效监听断线重连间隔秒数
+        :param health_check_interval: 失效连接空闲超过该秒数时发送 PING 探活
+        """
+        if not policies:
+            raise LibraryUsageError(f"{self.name} require at least one policy.")
+        for p in policies:
+            if p.ttl <= 0 or p.max_entries <= 0:
+                raise LibraryUsageError(
+                    f"{self.name} policy {p.prefix} require positive ttl/max_entries."
+                )
+        if health_check_interval <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive health_check_interval."
+            )
+        if len({p.prefix for p in policies}) != len(policies):
+            raise LibraryUsageError(f"{self.name} duplicate policy prefix.")
+
+        self._redis: Redis = redis_cli
+        self._decode_bytes = decode_bytes
+        self._invalidation = NearCacheInvalidation(invalidation)
+        self._channel = channel
+        self._reconnect_interval = reconnect_interval
+        self._health_check_interval = health_check_interval
+
+        self.stats = NearCacheStats()
+        # 按前缀长度倒序，第一个匹配即最长前缀
+        self._stores = [
+            _LRUTTL(p, self.stats)
+            for p in sorted(policies, key=lambda p: len(p.prefix), reverse=True)
+        ]
+        # 每次失效递增，读取前后不一致时不写入本地
+        self._gen = 0
+        self._ready = self._invalidation == NearCacheInvalidation.NONE
+        self._conn: Optional[AbstractConnection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def ready(self) -> bool:
+        """本地缓存是否可用，失效监听未订阅成功时为 False。"""
+        return self._ready
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._stores)
+
+    def _store(self, key: str) -> Optional[_LRUTTL]:
+        for s in self._stores:
+            if key.startswith(s.policy.prefix):
+                return s
+        return None
+
+    def invalidate(self, *keys: str) -> int:
+        """
+        仅失效本地缓存。
+        :return: 实际移除的条目数
+        """
+        self._gen += 1
+        removed = 0
+        for key in keys:
+            store = self._store(key)
+            if store is not None and store.pop(key):
+                removed += 1
+        self.stats.invalidations += removed
+        return removed
+
+    def clear(self) -> None:
+        """清空本地缓存。"""
+        self._gen += 1
+        for s in self._stores:
+            s.clear()
+
+    async def get(self, key: str) -> Any:
+        store = self._store(key)
+        if store is not None and self._ready:
+            hit, value = store.get(key)
+            if hit:
+                self.stats.hits += 1
+                return value
+            self.stats.misses += 1
+
+        gen = self._gen
+        value = self._decode_bytes.post(await self._redis.get(key))
+        if store is not None and self._ready and gen == self._gen:
+            store.put(key, value)
+        return value
+
+    async def mget(self, keys: List[str]) -> List[Any]:
+        """本地未命中的 key 合并为一次 MGET。"""
+        ret: List[Any] = [None] * len(keys)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            store = self._store(key)
+            if store is not None and self._ready:
+                hit, value = store.get(key)
+                if hit:
+                    self.stats.hits += 1
+                    ret[i] = value
+                    continue
+                self.stats.misses += 1
+            missing.append(i)
+        if not missing:
+            return ret
+
+        gen = self._gen
+        values = self._decode_bytes.post(
+            await self._redis.mget([keys[i] for i in missing])
+        )
+        can_put = self._ready and gen == self._gen
+        for i, value in zip(missing, values):
+            ret[i] = value
+            store = self._store(keys[i])
+            if store is not None and can_put:
+                store.put(keys[i], value)
+        return ret
+
+    async def _write(self, keys: List[str], op) -> Any:
+        self.invalidate(*keys)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            op(pipe)
+            if self._invalidation == NearCacheInvalidation.PUBSUB:
+                pipe.publish(self._channel, json.dumps(keys))
+            ret = await pipe.execute()
+        # 写入期间其他协程可能读到旧值并写入本地
+        self.invalidate(*keys)
+        return ret[0]
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        return await self._write([key], lambda pipe: pipe.set(key, value, ex=ex))
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        return await self._write(list(keys), lambda pipe: pipe.delete(*keys))
+
+    def _tracking_prefixes(self) -> List[str]:
+        # BCAST 前缀不允许相互覆盖，只保留最短的
+        kept: List[str] = []
+        for prefix in sorted({s.policy.prefix for s in self._stores}, key=len):
+            if not any(prefix.startswith(k) for k in kept):
+                kept.append(prefix)
+        return [] if "" in kept else kept
+
+    async def _subscribe(self) -> AbstractConnection:
+        pool = self._redis.connection_pool
+        # 失效频道可能长时间空闲：不继承连接池的读超时，
+        # 也不用连接自带的健康检查（订阅状态下 PING 回复格式不同），由 _read 自行探活
+        kwargs = {**pool.connection_kwargs, "socket_timeout": None}
+        conn = pool.connection_class(**{**kwargs, "health_check_interval": 0})
+        await conn.connect()
+        if self._invalidation == NearCacheInvalidation.TRACKING:
+            # 跟踪消息重定向到本连接的订阅，RESP2 亦可用
+            await conn.send_command("CLIENT", "ID")
+            client_id = await conn.read_response()
+            args: List[Any] = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id]
+            args.append("BCAST")
+            for prefix in self._tracking_prefixes():
+                args.extend(["PREFIX", prefix])
+            await conn.send_command(*args)
+            await conn.read_response()
+            channel = _TRACKING_CHANNEL
+        else:
+            channel = self._channel
+        await conn.send_command("SUBSCRIBE", channel)
+        await conn.read_response()
+        return conn
+
+    @staticmethod
+    def _to_str(x) -> str:
+        return x.decode("utf-8") if isinstance(x, bytes) else x
+
+    def _on_message(self, msg) -> None:
+        if not isinstance(msg, list) or len(msg) < 3:
+            return
+        if self._to_str(msg[0]) != "message":
+            return
+        payload = msg[2]
+        if payload is None:
+            # FLUSHDB/FLUSHALL
+            self.clear()
+            return
+        if self._invalidation == NearCacheInvalidation.TRACKING:
+            keys = [self._to_str(k) for k in payload]
+        else:
+            keys = json.loads(self._to_str(payload))
+        self.invalidate(*keys)
+
+    async def _read(self, conn: AbstractConnection):
+        """持续读取失效消息，空闲超时不视为故障，连续两个周期无任何回复才视为断线。"""
+        pinging = False
+        while True:
+            msg = await conn.read_response(timeout=self._health_check_interval)
+            if msg is None:
+                if pinging:
+                    raise ConnectionError(f"{self.name} health check no reply.")
+                await conn.send_command("PING")
+                pinging = True
+                continue
+            pinging = False
+            self._on_message(msg)
+
+    async def _disconnect(self):
+        self._ready = False
+        self.clear()
+        conn, self._conn = self._conn, None
+        if conn:
+            try:
+                await conn.disconnect()
+            except Exception:
+                logger.exception("{} disconnect fail.", self.name)
+
+    async def _listen(self):
+        while True:
+            try:
+                self._conn = await self._subscribe()
+                self.clear()
+                self._ready = True
+                await self._read(self._conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("{} invalidation listener fail.", self.name)
+            await self._disconnect()
+            await asyncio.sleep(self._reconnect_interval)
+
+    async def start(self, *args, **kwargs):
+        """启动失效监听，参数兼容 AppHook.on_startup。"""
+        if self._invalidation == NearCacheInvalidation.NONE or self.running:
+            return
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self, *args, **kwargs):
+        """停止失效监听并清空本地缓存，参数兼容 AppHook.on_shutdown。"""
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            ...
+        self._task = None
+        await self._disconnect()
@@ -1,8 +1,21 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import TYPE_CHECKING, AsyncContextManager, List, Optional, TypeVar, Union
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    AsyncContextManager,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+    Union,
+)
 
+from smartutils.error.sys import LibraryUsageError
 from smartutils.infra.cache.common.decode import DecodeBytes
+from smartutils.infra.cache.common.slot import hash_tag, tag_key
 from smartutils.infra.cache.ext.zset import ZSetHelper
 
 try:
@@ -28,12 +41,87 @@ class Task:
         return str(self.id)
 
 
+@dataclass
+class TaskBatch:
+    """
+    批量领取的任务。业务方对处理失败的任务调用 fail，
+    退出上下文时成功任务一次性从 pending 移除，仅失败任务回队。
+    """
+
+    tasks: List[TaskID] = field(default_factory=list)
+    failed: Set[TaskID] = field(default_factory=set)
+
+    def fail(self, task: TaskID) -> None:
+        if task not in self.tasks:
+            raise LibraryUsageError(f"TaskBatch fail unknown task {task}.")
+        self.failed.add(task)
+
+    @property
+    def succeeded(self) -> List[TaskID]:
+        return [t for t in self.tasks if t not in self.failed]
+
+    def __iter__(self) -> Iterator[TaskID]:
+        return iter(self.tasks)
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+
+@dataclass
+class LeaderLease:
+    """多实例回队时的 leader 租约：key 不存在或值为 owner 时才执行，并续期 ttl_ms。"""
+
+    key: str
+    owner: str
+    ttl_ms: int
+
+
 class AbstractSafeQueue(ABC):
-    """安全任务队列抽象基类，定义通用接口。"""
+    """
+    安全任务队列抽象基类，定义通用接口。
+    集群模式(hash_tag=True)下 queue/pending 等 key 自动补哈希标签（见 tag_key），
+    一次 Lua 调用涉及的多个 key 需位于同一命名空间或使用相同的 {tag}。
+    """
 
-    def __init__(self, redis_cli: Redis, decode_bytes: DecodeBytes):
+    def __init__(
+        self, redis_cli: Redis, decode_bytes: DecodeBytes, hash_tag: bool = False
+    ):
         self._redis: Redis = redis_cli
         self._decode_bytes = decode_bytes
+        self._hash_tag = hash_tag
+
+    @property
+    def redis(self) -> Redis:
+        """底层 redis 客户端，供 worker/reaper 等组件复用连接。"""
+        return self._redis
+
+    def _key(self, key: str) -> str:
+        return tag_key(key) if self._hash_tag else key
+
+    def key(self, key: str) -> str:
+        """实际使用的 Redis key，集群模式下已补哈希标签，供 worker 等组件的附属 key 使用。"""
+        return self._key(key)
+
+    async def ack_tasks(self, pending: str, *tasks: TaskID) -> int:
+        """
+        确认任务完成：从 pending 移除，不再被超时回队。
+        :return: 移除的任务数
+        """
+        if not tasks:
+            return 0
+        return await self._redis.zrem(self._key(pending), *tasks)  # type: ignore
+
+    def _keys(self, *keys: str) -> List[str]:
+        """集群模式下为多个 key 补哈希标签，并校验位于同一槽。"""
+        if not self._hash_tag:
+            return list(keys)
+        tagged = [tag_key(k) for k in keys]
+        if len({hash_tag(k) for k in tagged}) > 1:
+            raise LibraryUsageError(
+                f"{self.__class__.__name__} keys {list(keys)} must share a namespace "
+                "or {tag} in cluster mode."
+            )
+        return tagged
 
     @abstractmethod
     async def task_num(self, queue: str) -> int: ...
@@ -46,6 +134,10 @@ class AbstractSafeQueue(ABC):
         self, queue: str, pending: str
     ) -> AsyncContextManager[Optional[TaskID]]: ...
     @abstractmethod
+    def fetch_task_blocking_ctx(
+        self, queue: str, pending: str, timeout: float = 1
+    ) -> AsyncContextManager[Optional[TaskID]]: ...
+    @abstractmethod
     async def requeue_task(
         self,
         queue: str,
@@ -53,6 +145,67 @@ class AbstractSafeQueue(ABC):
         task: TaskID,
         priority: Optional[TaskPriority] = None,
     ) -> bool: ...
+    @abstractmethod
+    async def requeue_tasks(
+        self,
+        queue: str,
+        pending: str,
+        tasks: List[TaskID],
+        priority: Optional[TaskPriority] = None,
+    ) -> int: ...
+    @abstractmethod
+    async def requeue_stale_tasks(
+        self,
+        queue: str,
+        pending: str,
+        before: TaskPriority,
+        limit: int = 100,
+        priority: Optional[TaskPriority] = None,
+        leader: Optional[LeaderLease] = None,
+    ) -> int:
+        """
+        一次往返将 pending 中领取时间早于 before 的任务（最多 limit 个）回队。
+        :return: 回队任务数；传入 leader 且租约被其他实例持有时返回 -1
+        """
+        ...
+    @abstractmethod
+    async def _claim_tasks(self, queue: str, pending: str, n: int) -> List[TaskID]:
+        """原子领取最多n个任务并放入pending，返回已解码的任务列表。"""
+        ...
+
+    @asynccontextmanager
+    async def fetch_tasks_ctx(
+        self, queue: str, pending: str, n: int
+    ) -> AsyncGenerator[TaskBatch]:
+        """
+        批量原子领取任务：一次往返从 queue 弹出最多 n 个任务并放入 pending。
+        - 正常退出上下文时，成功任务用一次 zrem 从 pending 移除，batch.fail 标记的任务批量回队。
+        - 上下文内抛出异常时，与 fetch_task_ctx 一致，任务保留在 pending，等待超时回队。
+        :param queue: 主任务队列名
+        :param pending: 处理中任务zset名
+        :param n: 最多领取任务数
+        :yields: TaskBatch, 无任务时 tasks 为空
+        用法建议：
+        ```
+        async with safe_queue.fetch_tasks_ctx(queue, pending, 100) as batch:
+            for task in batch:
+                if not await handle(task):
+                    batch.fail(task)
+        ```
+        """
+        if n <= 0:
+            raise LibraryUsageError(f"fetch_tasks_ctx require n > 0, got {n}.")
+        queue, pending = self._keys(queue, pending)
+        batch = TaskBatch(await self._claim_tasks(queue, pending, n))
+        yield batch
+        if not batch.tasks:
+            return
+        succeeded = batch.succeeded
+        if succeeded:
+            await self._redis.zrem(pending, *succeeded)
+        if batch.failed:
+            failed = [t for t in batch.tasks if t in batch.failed]
+            await self.requeue_tasks(queue, pending, failed)
 
     async def get_pending_members(
         self,
@@ -62,7 +215,7 @@ class AbstractSafeQueue(ABC):
         limit: int = 1,
     ) -> List[TaskID]:
         members = await ZSetHelper.peek(
-            self._redis, pending, min_priority, max_priority, limit
+            self._redis, self._key(pending), min_priority, max_priority, limit
         )
         members = [self._decode_bytes.post(m) for m in members]
         # 取出按时间戳从大到小，实际需要从早到晚
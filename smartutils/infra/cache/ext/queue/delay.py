@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional, Tuple, Union
+
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.ext.queue.abstract import TaskID
+from smartutils.infra.cache.ext.queue.list import SafeQueueList
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
+from smartutils.time import get_now_stamp_ms
+
+__all__ = ["SafeDelayQueue", "DelayPromoter"]
+
+
+class SafeDelayQueue(SafeQueueList):
+    """
+    基于 Redis 的延迟任务队列(zset+list+zset)。
+    - delayed 队列使用 Redis ZSet 存放未到期任务，score 为到期毫秒时间戳。
+    - 到期任务由 promote_due_tasks 一次 Lua 调用批量转入 ready list，按到期先后出队。
+    - ready/pending 的领取、确认、回队与 SafeQueueList 完全一致。
+    1. schedule_at/schedule_in: 按绝对时间/相对延迟投递任务。
+    2. promote_due_tasks: 到期任务批量转入 ready，返回下一个到期时间，调度方据此休眠。
+    """
+
+    async def schedule_at(
+        self, delayed: str, tasks: List[TaskID], at: Union[int, float]
+    ) -> int:
+        """
+        投递在指定时间到期的任务，已存在的任务会更新到期时间。
+        :param delayed: 延迟任务zset名
+        :param tasks: 任务列表
+        :param at: 到期时间戳（秒，可带小数，精确到毫秒）
+        :return: int, 新增任务数
+        """
+        due = int(at * 1000)
+        mapping = {t: due for t in tasks}
+        return await self._redis.zadd(self._key(delayed), mapping)  # type: ignore
+
+    async def schedule_in(
+        self, delayed: str, tasks: List[TaskID], delay: Union[int, float]
+    ) -> int:
+        """
+        投递 delay 秒后到期的任务。
+        :param delayed: 延迟任务zset名
+        :param tasks: 任务列表
+        :param delay: 延迟秒数
+        :return: int, 新增任务数
+        """
+        due = get_now_stamp_ms() + int(delay * 1000)
+        mapping = {t: due for t in tasks}
+        return await self._redis.zadd(self._key(delayed), mapping)  # type: ignore
+
+    async def delayed_num(self, delayed: str) -> int:
+        """
+        获取未到期任务数。
+        :param delayed: 延迟任务zset名
+        """
+        return await self._redis.zcard(self._key(delayed))  # type: ignore
+
+    async def cancel(self, delayed: str, tasks: List[TaskID]) -> int:
+        """
+        取消未到期任务。
+        :return: int, 取消任务数
+        """
+        return await self._redis.zrem(self._key(delayed), *tasks)  # type: ignore
+
+    async def promote_due_tasks(
+        self, delayed: str, queue: str, limit: int = 1000
+    ) -> Tuple[int, Optional[int]]:
+        """
+        到期任务批量转入 ready list。按 score 范围查询，与 delayed 中任务总数无关。
+        :param delayed: 延迟任务zset名
+        :param queue: 主任务队列list名
+        :param limit: 单次最多转移数
+        :return: (转移任务数, 下一个到期毫秒时间戳，无剩余任务为None)
+        """
+        delayed, queue = self._keys(delayed, queue)
+        ret = await LuaManager.call(
+            LuaName.ZRANGEBYSCORE_LPUSH,
+            self._redis,
+            keys=[delayed, queue],
+            args=[get_now_stamp_ms(), limit],
+        )
+        moved = int(ret[0])  # type: ignore
+        nxt = int(float(ret[1])) if len(ret) > 1 else None  # type: ignore
+        return moved, nxt
+
+
+class DelayPromoter(MyBase):
+    """
+    延迟任务后台调度：休眠到下一个到期时间再转移，不按固定间隔轮询。
+    其他进程投递了更早到期的任务时，最迟 max_sleep 秒后被发现；本进程投递后可调用 notify 立即唤醒。
+    转移为原子操作，多实例同时运行不会重复投递。
+
+    用法：
+    ```
+    promoter = DelayPromoter(cli.safe_q_delay, delayed, queue)
+    AppHook.on_startup(promoter.start)
+    AppHook.on_shutdown(promoter.stop)
+    ```
+    """
+
+    def __init__(
+        self,
+        delay_q: SafeDelayQueue,
+        delayed: str,
+        queue: str,
+        batch_size: int = 1000,
+        max_sleep: float = 1,
+    ):
+        if batch_size <= 0 or max_sleep <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive batch_size/max_sleep."
+            )
+        self._delay_q = delay_q
+        self._delayed = delayed
+        self._queue = queue
+        self._batch_size = batch_size
+        self._max_sleep = max_sleep
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._wakeup = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def notify(self):
+        """唤醒调度，用于本进程投递了更早到期的任务。"""
+        self._wakeup.set()
+
+    def _sleep_seconds(self, moved: int, nxt: Optional[int]) -> float:
+        if moved >= self._batch_size:
+            return 0
+        if nxt is None:
+            return self._max_sleep
+        return min(max(nxt - get_now_stamp_ms(), 0) / 1000, self._max_sleep)
+
+    async def _run(self):
+        while not self._stop.is_set():
+            # 先清除，避免转移期间的 notify 丢失
+            self._wakeup.clear()
+            moved, nxt = 0, None
+            try:
+                moved, nxt = await self._delay_q.promote_due_tasks(
+                    self._delayed, self._queue, self._batch_size
+                )
+            except Exception:
+                logger.exception("{} promote {} fail.", self.name, self._delayed)
+            seconds = self._sleep_seconds(moved, nxt)
+            if not seconds:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=seconds)
+            except asyncio.TimeoutError:
+                ...
+
+    async def start(self, *args, **kwargs):
+        """启动后台调度，参数兼容 AppHook.on_startup。"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, *args, **kwargs):
+        """停止后台调度，参数兼容 AppHook.on_shutdown。"""
+        if not self._task:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        await self._task
+        self._task = None
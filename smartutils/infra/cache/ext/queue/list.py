@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import os
+import socket
 import sys
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
@@ -7,8 +9,10 @@ from typing import List, Optional
 
 from smartutils.infra.cache.ext.queue.abstract import (
     AbstractSafeQueue,
+    LeaderLease,
     Task,
     TaskID,
+    TaskPriority,
 )
 from smartutils.infra.cache.lua.const import LuaName
 from smartutils.infra.cache.lua.lua_manager import LuaManager
@@ -28,8 +32,14 @@ class SafeQueueList(AbstractSafeQueue):
     - 正在处理（pending）任务用 Redis ZSet 暂存，以便可靠性、超时重试等。
     1. fetch_task_ctx: 从 ready list 弹出任务, 放入 pending zset(带时间戳), 业务处理后自动从pending移除。
     2. requeue_task: 任务处理失败/需重入时，将pending任务移回ready list。
+    3. fetch_tasks_ctx/requeue_tasks: 批量版本，一次往返领取/回队多个任务。
+    4. fetch_task_blocking_ctx: 阻塞领取，队列为空时不轮询。
     """
 
+    def processing_key(self, pending: str) -> str:
+        """阻塞领取时本进程使用的 processing list 名。"""
+        return f"{pending}:processing:{socket.gethostname()}:{os.getpid()}"
+
     @override
     async def task_num(self, queue: str) -> int:
         """
@@ -37,7 +47,7 @@ class SafeQueueList(AbstractSafeQueue):
         :param queue: 任务队列list名
         :return: int, 任务数量
         """
-        return await self._redis.llen(queue)  # type: ignore
+        return await self._redis.llen(self._key(queue))  # type: ignore
 
     @override
     async def enqueue_task(self, queue: str, tasks: List[Task]) -> bool:
@@ -48,7 +58,7 @@ class SafeQueueList(AbstractSafeQueue):
         :return: bool, 是否成功
         """
         _tasks = [t.ID for t in tasks]
-        return await self._redis.lpush(queue, *_tasks) > 0  # type: ignore
+        return await self._redis.lpush(self._key(queue), *_tasks) > 0  # type: ignore
 
     @override
     async def is_task_pending(self, pending: str, task: TaskID) -> bool:
@@ -58,7 +68,7 @@ class SafeQueueList(AbstractSafeQueue):
         :param task: 任务内容(str)
         :return: bool, 任务是否在pending中
         """
-        score = await self._redis.zscore(pending, task)
+        score = await self._redis.zscore(self._key(pending), task)
         return score is not None
 
     @asynccontextmanager
@@ -74,6 +84,7 @@ class SafeQueueList(AbstractSafeQueue):
         :param pending: 处理中任务zset名
         :yields: TaskID|None, 本次弹出的任务字符串
         """
+        queue, pending = self._keys(queue, pending)
         msg = await LuaManager.call(
             LuaName.RPOP_ZADD,
             self._redis,
@@ -86,6 +97,59 @@ class SafeQueueList(AbstractSafeQueue):
             return
         yield None
 
+    @asynccontextmanager
+    async def fetch_task_blocking_ctx(
+        self,
+        queue: str,
+        pending: str,
+        timeout: float = 1,
+        processing: Optional[str] = None,
+    ) -> AsyncGenerator[Optional[TaskID]]:
+        """
+        阻塞领取任务：BLMOVE 将任务从 queue 原子移入本消费者的 processing list，
+        再一次 Lua 调用从 processing 移入 pending，之后语义与 fetch_task_ctx 一致。
+        - 队列为空时阻塞等待，不产生轮询命令；新任务到达即被唤醒。
+        - 阻塞期间占用连接池中一个连接，timeout 需小于 socket_timeout。
+        - 进程在两步之间崩溃时任务留在 processing，启动时用 recover_processing 放回。
+        :param queue: 主任务队列list名
+        :param pending: 处理中任务zset名
+        :param timeout: 最长阻塞秒数，超时 yield None
+        :param processing: processing list 名，默认按主机名+进程号生成
+        :yields: TaskID|None
+        """
+        processing = processing or self.processing_key(pending)
+        queue, pending, processing = self._keys(queue, pending, processing)
+        msg = await self._redis.blmove(
+            queue, processing, timeout, "RIGHT", "LEFT"  # type: ignore
+        )
+        if msg:
+            await LuaManager.call(
+                LuaName.LREM_ZADD,
+                self._redis,
+                keys=[processing, pending],
+                args=[get_now_stamp(), msg],
+            )
+            yield self._decode_bytes.post(msg)  # type: ignore
+            await self._redis.zrem(pending, msg)
+            return
+        yield None
+
+    async def recover_processing(
+        self, queue: str, pending: str, processing: Optional[str] = None
+    ) -> int:
+        """
+        将 processing list 中残留的任务全部放回 queue，用于消费者崩溃后恢复。
+        :param queue: 主任务队列list名
+        :param pending: 处理中任务zset名
+        :param processing: processing list 名，默认为本进程的 processing list
+        :return: int, 放回任务数
+        """
+        processing = processing or self.processing_key(pending)
+        processing, queue = self._keys(processing, queue)
+        return await LuaManager.call(
+            LuaName.LPOP_RPUSH_ALL, self._redis, keys=[processing, queue]
+        )  # type: ignore
+
     @override
     async def requeue_task(
         self, queue: str, pending: str, task: TaskID, priority=None
@@ -99,7 +163,69 @@ class SafeQueueList(AbstractSafeQueue):
         :param priority: 兼容时间戳(未使用)，默认最高优先级
         :return: bool, 是否成功
         """
+        queue, pending = self._keys(queue, pending)
         await LuaManager.call(
             LuaName.ZREM_RPUSH, self._redis, keys=[pending, queue], args=[task]
         )
         return True
+
+    @override
+    async def requeue_stale_tasks(
+        self,
+        queue: str,
+        pending: str,
+        before: TaskPriority,
+        limit: int = 100,
+        priority: Optional[TaskPriority] = None,
+        leader: Optional[LeaderLease] = None,
+    ) -> int:
+        """
+        超时回队：一次往返将 pending(zset) 中领取时间早于 before 的任务（最多 limit 个）
+        放回queue(list)出队端，最早领取的最先被再次领取。
+        :param queue: 主任务队列list名
+        :param pending: 处理中任务zset名
+        :param before: 截止时间戳，pending score 小于等于该值视为超时
+        :param limit: 单次最多回队数
+        :param priority: 兼容时间戳(未使用)，默认最高优先级
+        :param leader: leader 租约，传入时仅租约持有者执行并续期
+        :return: int, 回队任务数；租约被其他实例持有时为 -1
+        """
+        keys = [pending, queue]
+        args = [before, limit, "", ""]
+        if leader:
+            keys.append(leader.key)
+            args[2:4] = [leader.owner, leader.ttl_ms]
+        keys = self._keys(*keys)
+        return await LuaManager.call(
+            LuaName.ZREM_RPUSH_STALE, self._redis, keys=keys, args=args
+        )  # type: ignore
+
+    @override
+    async def _claim_tasks(self, queue: str, pending: str, n: int) -> List[TaskID]:
+        queue, pending = self._keys(queue, pending)
+        msgs = await LuaManager.call(
+            LuaName.RPOP_ZADD_BATCH,
+            self._redis,
+            keys=[queue, pending],
+            args=[get_now_stamp(), n],
+        )
+        return [self._decode_bytes.post(m) for m in msgs or []]  # type: ignore
+
+    @override
+    async def requeue_tasks(
+        self, queue: str, pending: str, tasks: List[TaskID], priority=None
+    ) -> int:
+        """
+        批量回队：一次往返将pending(zset)中的tasks移除，并重新放入queue(list)。
+        :param queue: 主任务队列list名
+        :param pending: 处理中任务zset名
+        :param tasks: 需归队的任务列表
+        :param priority: 兼容时间戳(未使用)，默认最高优先级
+        :return: int, 回队任务数
+        """
+        if not tasks:
+            return 0
+        queue, pending = self._keys(queue, pending)
+        return await LuaManager.call(
+            LuaName.ZREM_RPUSH_BATCH, self._redis, keys=[pending, queue], args=tasks
+        )  # type: ignore
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import uuid
+from typing import Optional
+
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.ext.queue.abstract import (
+    AbstractSafeQueue,
+    LeaderLease,
+    TaskPriority,
+)
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
+from smartutils.time import get_now_stamp
+
+__all__ = ["PendingReaper"]
+
+
+class PendingReaper(MyBase):
+    """
+    pending 超时任务后台回队器。
+    每轮一次 Lua 调用：leader 校验续期 + 将领取超过 visibility_timeout 秒的任务批量回队。
+    多实例部署时通过 leader 租约保证同一时刻只有一个实例在回队。
+
+    用法：
+    ```
+    reaper = RedisManager().reaper(cli.safe_q_list, queue, pending, visibility_timeout=60)
+    AppHook.on_startup(reaper.start)
+    AppHook.on_shutdown(reaper.stop)
+    ```
+    """
+
+    def __init__(
+        self,
+        safe_q: AbstractSafeQueue,
+        queue: str,
+        pending: str,
+        visibility_timeout: int,
+        batch_size: int = 100,
+        interval: float = 5,
+        jitter: float = 0.1,
+        leader: bool = True,
+        leader_key: Optional[str] = None,
+        priority: Optional[TaskPriority] = None,
+    ):
+        """
+        :param safe_q: 安全队列实例，如 cli.safe_q_list / cli.safe_q_zset
+        :param visibility_timeout: 任务领取后超过该秒数仍在 pending 视为超时
+        :param batch_size: 单轮最多回队数，达到上限时立即进行下一轮
+        :param interval: 轮询间隔秒数
+        :param jitter: 间隔随机抖动比例，避免多实例同时请求
+        :param leader: 是否启用 leader 选举
+        :param leader_key: leader 租约key，默认 {pending}:reaper:leader
+        :param priority: zset 队列回队优先级，默认最高优先级
+        """
+        if visibility_timeout <= 0 or batch_size <= 0 or interval <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive visibility_timeout/batch_size/interval."
+            )
+        if not 0 <= jitter < 1:
+            raise LibraryUsageError(f"{self.name} require 0 <= jitter < 1.")
+
+        self._safe_q = safe_q
+        self._queue = queue
+        self._pending = pending
+        self._visibility_timeout = visibility_timeout
+        self._batch_size = batch_size
+        self._interval = interval
+        self._jitter = jitter
+        self._priority = priority
+        self._lease: Optional[LeaderLease] = None
+        if leader:
+            # 租期覆盖若干轮，leader 异常退出后由其他实例接管
+            self._lease = LeaderLease(
+                key=leader_key or f"{pending}:reaper:leader",
+                owner=uuid.uuid4().hex,
+                ttl_ms=int(interval * (1 + jitter) * 3 * 1000),
+            )
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def sweep(self) -> int:
+        """
+        执行一轮回队。
+        :return: 回队任务数；非 leader 时为 -1
+        """
+        return await self._safe_q.requeue_stale_tasks(
+            self._queue,
+            self._pending,
+            before=get_now_stamp() - self._visibility_timeout,
+            limit=self._batch_size,
+            priority=self._priority,
+            leader=self._lease,
+        )
+
+    def _next_delay(self) -> float:
+        return self._interval * (1 + random.uniform(-self._jitter, self._jitter))
+
+    async def _run(self):
+        while not self._stop.is_set():
+            moved = 0
+            try:
+                moved = await self.sweep()
+                if moved > 0:
+                    logger.info("{} requeue {} stale tasks.", self.name, moved)
+            except Exception:
+                logger.exception("{} sweep {} fail.", self.name, self._pending)
+            if moved >= self._batch_size:
+                # 积压未清完，直接下一轮
+                continue
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self._next_delay())
+            except asyncio.TimeoutError:
+                ...
+
+    async def start(self, *args, **kwargs):
+        """启动后台回队，参数兼容 AppHook.on_startup。"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, *args, **kwargs):
+        """停止后台回队并释放 leader 租约，参数兼容 AppHook.on_shutdown。"""
+        if not self._task:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+        if not self._lease:
+            return
+        try:
+            await LuaManager.call(
+                LuaName.DEL_IF_EQ,
+                self._safe_q.redis,
+                keys=[self._lease.key],
+                args=[self._lease.owner],
+            )
+        except Exception:
+            logger.exception("{} release leader fail.", self.name)
@@ -1,9 +1,14 @@
+import os
+import socket
+import uuid
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Optional
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
 
+from smartutils.design import deprecated
 from smartutils.error.factory import ExcDetailFactory
-from smartutils.error.sys import CacheError
+from smartutils.error.sys import CacheError, LibraryUsageError
 from smartutils.infra.cache.common.decode import DecodeBytes
 from smartutils.log import logger
 
@@ -15,12 +20,56 @@ if TYPE_CHECKING:  # pragma: no cover
     from redis.asyncio import Redis, ResponseError
 
 
+@dataclass
+class StreamMessage:
+    id: str
+    fields: Dict[str, str]
+
+
+@dataclass
+class StreamBatch:
+    """
+    批量读取的消息。业务方对处理失败的消息调用 fail，
+    退出上下文时其余消息一次 XACK，失败消息留在 PEL 等待 reclaim。
+    """
+
+    messages: List[StreamMessage] = field(default_factory=list)
+    failed: Set[str] = field(default_factory=set)
+
+    def fail(self, message_id: str) -> None:
+        if all(m.id != message_id for m in self.messages):
+            raise LibraryUsageError(f"StreamBatch fail unknown message {message_id}.")
+        self.failed.add(message_id)
+
+    @property
+    def succeeded(self) -> List[str]:
+        return [m.id for m in self.messages if m.id not in self.failed]
+
+    def __iter__(self) -> Iterator[StreamMessage]:
+        return iter(self.messages)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+
 class SafeQueueStream:
+    """
+    基于 Redis Stream 消费组的可靠队列。
+    - 每个进程使用唯一的消费者名，消费组只在首次使用时创建。
+    - read_batch_ctx: 批量读取新消息，退出时一次 XACK。
+    - reclaim_ctx: XAUTOCLAIM 接管其他消费者超时未确认的消息，确认语义同上。
+    - add_batch: 一次往返批量 XADD，可按近似 MAXLEN 裁剪。
+    """
+
     def __init__(self, redis_cli: Redis, decode_bytes: DecodeBytes):
         self._redis: Redis = redis_cli
         self._decode_bytes = decode_bytes
+        self._groups: Set[Tuple[str, str]] = set()
+        self.consumer = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
 
     async def ensure_stream_and_group(self, stream_name: str, group_name: str):
+        if (stream_name, group_name) in self._groups:
+            return
         try:
             await self._redis.xgroup_create(
                 stream_name, group_name, id="0", mkstream=True
@@ -28,49 +77,145 @@ class SafeQueueStream:
         except ResponseError as e:
             if "BUSYGROUP Consumer Group name already exists" not in str(e):
                 raise CacheError(ExcDetailFactory.dispatch(e)) from None
+        self._groups.add((stream_name, group_name))
 
-    @asynccontextmanager
-    async def xread_xack(
-        self, stream: str, group: str, count: int = 1
-    ) -> AsyncGenerator[Optional[dict], None]:
-        """使用 with 语句读取并处理 Redis Stream，自动提交 ACK"""
-        message_ids = set()
+    def _parse(self, entries) -> List[StreamMessage]:
+        messages = []
+        for message_id, fields in entries:
+            if message_id is None:
+                # XAUTOCLAIM 返回的已被 XDEL 的消息
+                continue
+            messages.append(
+                StreamMessage(
+                    id=self._decode_bytes.post(message_id),
+                    fields=self._decode_bytes.post(fields or {}),
+                )
+            )
+        return messages
+
+    async def read_batch(
+        self, stream: str, group: str, count: int = 100, block: Optional[int] = 1000
+    ) -> List[StreamMessage]:
+        """
+        读取最多 count 条新消息，不确认。
+        :param block: 无消息时阻塞毫秒数，None 为不阻塞
+        """
+        await self.ensure_stream_and_group(stream, group)
         try:
-            await self.ensure_stream_and_group(stream, group)
-            # print('messages================start',)
-            # 从 Redis Stream 获取消息
-            # TODO: 非阻塞方式有问题
-            # messages = await self._redis.xread({stream: "0"}, count=count, block=1000)
-            messages = await self._redis.xreadgroup(
+            ret = await self._redis.xreadgroup(
                 groupname=group,
-                consumername="consumer",
+                consumername=self.consumer,
                 streams={stream: ">"},
                 count=count,
-                block=1000,
+                block=block,
             )
-            if len(messages) > count:
-                logger.error("xread_xack get {} expect {}", len(messages), count)
-            # print('messages================', messages)
-            if not messages:
-                yield None
-                return
-            logger.debug("xread_xack msgs: {}", messages)
-            for message in messages:
-                _, messages_list = message
-                for message_id, fields in messages_list:
-                    message_ids.add(message_id)
-
-                    fields = {
-                        key.decode() if isinstance(key, bytes) else key: (
-                            value.decode() if isinstance(value, bytes) else value
-                        )
-                        for key, value in fields.items()
-                    }
-                    yield fields
+        except ResponseError as e:
+            if "NOGROUP" not in str(e):
+                raise
+            # stream 或消费组被删除，重建后由下次读取处理
+            self._groups.discard((stream, group))
+            return []
+        messages = []
+        for _, entries in ret or []:
+            messages.extend(self._parse(entries))
+        return messages
+
+    async def ack(self, stream: str, group: str, message_ids: List[str]) -> int:
+        """一次 XACK 确认多条消息。"""
+        if not message_ids:
+            return 0
+        return await self._redis.xack(stream, group, *message_ids)  # type: ignore
+
+    async def reclaim(
+        self,
+        stream: str,
+        group: str,
+        min_idle_ms: int,
+        count: int = 100,
+        start_id: str = "0-0",
+    ) -> Tuple[str, List[StreamMessage]]:
+        """
+        XAUTOCLAIM 将空闲超过 min_idle_ms 的待确认消息转给当前消费者，不确认。
+        :return: (下次扫描起始ID，"0-0"表示已扫描完, 接管的消息)
+        """
+        await self.ensure_stream_and_group(stream, group)
+        ret = await self._redis.xautoclaim(
+            stream, group, self.consumer, min_idle_ms, start_id, count=count
+        )
+        return self._decode_bytes.post(ret[0]), self._parse(ret[1])
+
+    @asynccontextmanager
+    async def _batch_ctx(
+        self, stream: str, group: str, messages: List[StreamMessage]
+    ) -> AsyncGenerator[StreamBatch, None]:
+        batch = StreamBatch(messages)
+        yield batch
+        await self.ack(stream, group, batch.succeeded)
+
+    @asynccontextmanager
+    async def read_batch_ctx(
+        self, stream: str, group: str, count: int = 100, block: Optional[int] = 1000
+    ) -> AsyncGenerator[StreamBatch, None]:
+        """
+        批量读取新消息，正常退出时未标记失败的消息一次 XACK；
+        上下文内抛出异常时不确认，消息留在 PEL 等待 reclaim。
+        用法：
+        ```
+        async with cli.safe_q_stream.read_batch_ctx(stream, group, 100) as batch:
+            for msg in batch:
+                if not await handle(msg.fields):
+                    batch.fail(msg.id)
+        ```
+        """
+        messages = await self.read_batch(stream, group, count, block)
+        async with self._batch_ctx(stream, group, messages) as batch:
+            yield batch
+
+    @asynccontextmanager
+    async def reclaim_ctx(
+        self, stream: str, group: str, min_idle_ms: int, count: int = 100
+    ) -> AsyncGenerator[StreamBatch, None]:
+        """接管空闲超过 min_idle_ms 的待确认消息并处理，确认语义同 read_batch_ctx。"""
+        _, messages = await self.reclaim(stream, group, min_idle_ms, count)
+        async with self._batch_ctx(stream, group, messages) as batch:
+            yield batch
+
+    async def add_batch(
+        self,
+        stream: str,
+        messages: List[Dict],
+        maxlen: Optional[int] = None,
+        approximate: bool = True,
+    ) -> List[str]:
+        """
+        一次往返批量 XADD。
+        :param maxlen: 流最大长度，默认近似裁剪（MAXLEN ~），开销远小于精确裁剪
+        :return: 消息ID列表
+        """
+        if not messages:
+            return []
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for fields in messages:
+                pipe.xadd(stream, fields, maxlen=maxlen, approximate=approximate)
+            ids = await pipe.execute()
+        return self._decode_bytes.post(ids)
+
+    @deprecated("read_batch_ctx")
+    @asynccontextmanager
+    async def xread_xack(
+        self, stream: str, group: str, count: int = 1
+    ) -> AsyncGenerator[Optional[dict], None]:
+        """
+        使用 with 语句读取并处理一条 Redis Stream 消息，自动提交 ACK。
+        count 仅兼容旧签名，批量处理请使用 read_batch_ctx。
+        """
+        try:
+            messages = await self.read_batch(stream, group, 1)
         except Exception as e:
             logger.exception("xread xack fail {}", e)
+            messages = []
+        if not messages:
             yield None
-        finally:
-            # 在退出时提交 ACK
-            for message_id in message_ids:
-                await self._redis.xack(stream, group, message_id)
+            return
+        async with self._batch_ctx(stream, group, messages) as batch:
+            yield batch.messages[0].fields
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional
+
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.ext.queue.abstract import (
+    AbstractSafeQueue,
+    TaskID,
+    TaskPriority,
+)
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
+
+__all__ = ["QueueStats", "QueueWorkerPool"]
+
+
+@dataclass
+class QueueStats:
+    """队列消费计数，耗时单位为秒。"""
+
+    fetched: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    requeued: int = 0
+    dead: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+    started_at: float = field(default_factory=perf_counter)
+
+    def observe(self, latency: float, ok: bool) -> None:
+        if ok:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    @property
+    def latency_avg(self) -> float:
+        done = self.succeeded + self.failed
+        return self.latency_total / done if done else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """启动以来每秒处理任务数。"""
+        elapsed = perf_counter() - self.started_at
+        return (self.succeeded + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "fetched": self.fetched,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "requeued": self.requeued,
+            "dead": self.dead,
+            "latency_avg": self.latency_avg,
+            "latency_max": self.latency_max,
+            "throughput": self.throughput,
+        }
+
+
+class QueueWorkerPool(MyBase):
+    """
+    安全队列消费运行时：concurrency 个协程并发领取并处理任务。
+    - 每个协程处理完当前任务才领取下一个，处理中任务数不超过 concurrency，handler 变慢时自然降低领取速度。
+    - handler 抛异常时任务回队，超过 max_retries 次后移入 dead_queue（未配置则丢弃）。
+    - stop 时不再领取新任务，等待处理中任务完成，超过 drain_timeout 的任务留在 pending 由回队器恢复。
+
+    用法：
+    ```
+    pool = QueueWorkerPool(cli.safe_q_list, queue, pending, handler, concurrency=8)
+    AppHook.on_startup(pool.start)
+    AppHook.on_shutdown(pool.stop)
+    ```
+    """
+
+    def __init__(
+        self,
+        safe_q: AbstractSafeQueue,
+        queue: str,
+        pending: str,
+        handler: Callable[[TaskID], Awaitable[Any]],
+        concurrency: int = 4,
+        max_retries: int = 3,
+        retry_priority: Optional[TaskPriority] = None,
+        dead_queue: Optional[str] = None,
+        blocking: bool = True,
+        fetch_timeout: float = 1,
+        idle_interval: float = 0.5,
+        drain_timeout: float = 30,
+        retry_ttl: int = 86400,
+    ):
+        """
+        :param safe_q: 安全队列实例，如 cli.safe_q_list / cli.safe_q_zset
+        :param handler: 异步任务处理函数，抛异常视为失败
+        :param concurrency: 并发协程数，即最大处理中任务数
+        :param max_retries: 失败回队最大次数
+        :param retry_priority: zset 队列回队优先级，默认最高优先级
+        :param dead_queue: 超过重试次数后移入的队列，与 queue 同类型
+        :param blocking: 是否阻塞领取，阻塞时每个协程占用一个连接，需小于连接池大小
+        :param fetch_timeout: 阻塞领取超时秒数，需小于 socket_timeout
+        :param idle_interval: 非阻塞领取时队列为空、或领取出错时的等待秒数
+        :param drain_timeout: stop 时等待处理中任务完成的秒数
+        :param retry_ttl: 重试计数过期秒数
+        """
+        if concurrency <= 0 or max_retries < 0:
+            raise LibraryUsageError(
+                f"{self.name} require concurrency > 0 and max_retries >= 0."
+            )
+        self._safe_q = safe_q
+        self._queue = queue
+        self._pending = pending
+        self._handler = handler
+        self._concurrency = concurrency
+        self._max_retries = max_retries
+        self._retry_priority = retry_priority
+        self._dead_queue = dead_queue
+        self._blocking = blocking
+        self._fetch_timeout = fetch_timeout
+        self._idle_interval = idle_interval
+        self._drain_timeout = drain_timeout
+        self._retry_ttl = retry_ttl
+        self._retries_key = safe_q.key(f"{pending}:retries")
+        # 本实例处理失败过的任务，成功后清理重试计数；其他实例的残留计数靠过期清理
+        self._retried: set = set()
+
+        self.stats = QueueStats()
+        self._workers: List[asyncio.Task] = []
+        self._stop = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return any(not w.done() for w in self._workers)
+
+    def _fetch(self) -> AsyncContextManager[Optional[TaskID]]:
+        if self._blocking:
+            return self._safe_q.fetch_task_blocking_ctx(
+                self._queue, self._pending, self._fetch_timeout
+            )
+        return self._safe_q.fetch_task_ctx(self._queue, self._pending)
+
+    async def _on_fail(self, task: TaskID) -> None:
+        redis = self._safe_q.redis
+        retries = await LuaManager.call(
+            LuaName.HINCRBY_EXPIRE,
+            redis,
+            keys=[self._retries_key],
+            args=[task, self._retry_ttl],
+        )
+        if int(retries) <= self._max_retries:  # type: ignore
+            self._retried.add(task)
+            await self._safe_q.requeue_task(
+                self._queue, self._pending, task, self._retry_priority
+            )
+            self.stats.requeued += 1
+            return
+
+        if self._dead_queue:
+            await self._safe_q.requeue_task(
+                self._dead_queue, self._pending, task, self._retry_priority
+            )
+        else:
+            await self._safe_q.ack_tasks(self._pending, task)
+        await redis.hdel(self._retries_key, task)
+        self._retried.discard(task)
+        self.stats.dead += 1
+        logger.error(
+            "{} task {} exceed max retries {}, move to {}.",
+            self.name,
+            task,
+            self._max_retries,
+            self._dead_queue,
+        )
+
+    async def _on_success(self, task: TaskID) -> None:
+        if task not in self._retried:
+            return
+        self._retried.discard(task)
+        await self._safe_q.redis.hdel(self._retries_key, task)
+
+    async def process_one(self) -> bool:
+        """
+        领取并处理一个任务。
+        :return: 是否领取到任务
+        """
+        task: Optional[TaskID] = None
+        failed = False
+        start = 0.0
+        try:
+            # handler 异常穿出上下文，任务不会被确认，留在 pending 等待回队
+            async with self._fetch() as task:
+                if task is None:
+                    return False
+                self.stats.fetched += 1
+                start = perf_counter()
+                try:
+                    await self._handler(task)
+                except Exception:
+                    failed = True
+                    raise
+        except Exception:
+            if not failed:
+                if task is None:
+                    raise
+                # handler 已成功，仅确认失败：不回队重跑，留在 pending 由回队器兜底
+                self.stats.observe(perf_counter() - start, ok=True)
+                logger.exception("{} ack task {} fail.", self.name, task)
+                return True
+            self.stats.observe(perf_counter() - start, ok=False)
+            logger.exception("{} handle task {} fail.", self.name, task)
+            await self._on_fail(task)
+            return True
+        self.stats.observe(perf_counter() - start, ok=True)
+        await self._on_success(task)
+        return True
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=self._idle_interval)
+        except asyncio.TimeoutError:
+            ...
+
+    async def _work(self):
+        while not self._stop.is_set():
+            try:
+                got = await self.process_one()
+            except Exception:
+                # 领取或回队失败（如 Redis 不可用），阻塞模式同样退避，避免空转
+                logger.exception("{} fetch from {} fail.", self.name, self._queue)
+                await self._idle()
+                continue
+            if not got and not self._blocking:
+                await self._idle()
+
+    async def start(self, *args, **kwargs):
+        """启动消费协程，参数兼容 AppHook.on_startup。"""
+        if self.running:
+            return
+        self._stop.clear()
+        self.stats = QueueStats()
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self._concurrency)
+        ]
+
+    async def stop(self, *args, **kwargs):
+        """停止领取并等待处理中任务完成，参数兼容 AppHook.on_shutdown。"""
+        if not self._workers:
+            return
+        self._stop.set()
+        _, pending = await asyncio.wait(self._workers, timeout=self._drain_timeout)
+        for w in pending:
+            w.cancel()
+        if pending:
+            logger.warning(
+                "{} drain timeout, {} tasks left in {}.",
+                self.name,
+                len(pending),
+                self._pending,
+            )
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._workers = []
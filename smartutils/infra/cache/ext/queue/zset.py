@@ -6,6 +6,7 @@ from typing import List, Optional
 from smartutils.data.int import max_float
 from smartutils.infra.cache.ext.queue.abstract import (
     AbstractSafeQueue,
+    LeaderLease,
     Task,
     TaskID,
     TaskPriority,
@@ -32,8 +33,19 @@ class SafeQueueZSet(AbstractSafeQueue):
     方法说明：
     1. fetch_task_ctx: 弹出 queue 中 score 最大的任务，标记到 pending 集合。业务完成后自动 zrem pending。
     2. requeue_task: 任务处理失败/超时等，从 pending 剔除并重新放入 queue，可重新设定优先级(score)。
+    3. fetch_tasks_ctx/requeue_tasks: 批量版本，一次往返领取/回队多个任务。
+    4. fetch_task_blocking_ctx: 阻塞领取，队列为空时不轮询。
+       enqueue_task 同时向唤醒列表 {queue}:wake 推入信号，阻塞领取在该列表上 BLPOP，
+       被唤醒后仍用原子脚本领取到 pending。
     """
 
+    # 唤醒列表最多保留的信号数，信号只是提示，无消费者阻塞时不无限增长
+    WAKE_MAX = 1024
+
+    @staticmethod
+    def _wake(queue: str) -> str:
+        return f"{queue}:wake"
+
     @override
     async def task_num(self, queue: str) -> int:
         """
@@ -41,16 +53,23 @@ class SafeQueueZSet(AbstractSafeQueue):
         :param queue: 任务队列zset名
         :return: int, 任务数量
         """
-        return await self._redis.zcard(queue)
+        return await self._redis.zcard(self._key(queue))
 
     @override
     async def enqueue_task(self, queue: str, tasks: List[Task]) -> bool:
         _tasks = {t.ID: t.priority for t in tasks}
-        return await self._redis.zadd(queue, _tasks) == len(_tasks)
+        queue, wake = self._keys(queue, self._wake(queue))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(queue, _tasks)
+            # 唤醒阻塞领取的消费者，每个任务一个信号
+            pipe.rpush(wake, *["1"] * min(len(_tasks), self.WAKE_MAX))
+            pipe.ltrim(wake, 0, self.WAKE_MAX - 1)
+            rets = await pipe.execute()
+        return rets[0] == len(_tasks)
 
     @override
     async def is_task_pending(self, pending: str, task: TaskID) -> bool:
-        score = await self._redis.zscore(pending, task)
+        score = await self._redis.zscore(self._key(pending), task)
         return score is not None
 
     @asynccontextmanager
@@ -73,12 +92,42 @@ class SafeQueueZSet(AbstractSafeQueue):
                 ...  # 处理任务
         ```
         """
-        msg = await LuaManager.call(
+        queue, pending = self._keys(queue, pending)
+        msg = await self._claim_one(queue, pending)
+        if msg:
+            yield self._decode_bytes.post(msg)  # type: ignore
+            await self._redis.zrem(pending, msg)
+            return
+        yield None
+
+    async def _claim_one(self, queue: str, pending: str):
+        return await LuaManager.call(
             LuaName.ZPOPMAX_ZADD,
             self._redis,
             keys=[queue, pending],
             args=[get_now_stamp()],
         )
+
+    @asynccontextmanager
+    async def fetch_task_blocking_ctx(
+        self, queue: str, pending: str, timeout: float = 1
+    ) -> AsyncGenerator[Optional[TaskID]]:
+        """
+        阻塞领取任务，领取与放入 pending 为同一原子脚本，之后语义与 fetch_task_ctx 一致。
+        - 队列为空时在唤醒列表上 BLPOP，不产生轮询命令；enqueue_task 入队即被唤醒。
+        - 经 requeue 等其他途径回到队列的任务不发信号，最迟 timeout 后被领取。
+        - 阻塞期间占用连接池中一个连接，timeout 需小于 socket_timeout。
+        :param queue: 主队列 zset key
+        :param pending: 待确认队列 zset key
+        :param timeout: 最长阻塞秒数，超时 yield None
+        :yields: 任务内容（字符串），超时则为 None
+        """
+        queue, wake, pending = self._keys(queue, self._wake(queue), pending)
+        msg = await self._claim_one(queue, pending)
+        if not msg:
+            # 被唤醒或超时后再领取一次，任务可能已被其他消费者领走
+            await self._redis.blpop([wake], timeout)
+            msg = await self._claim_one(queue, pending)
         if msg:
             yield self._decode_bytes.post(msg)  # type: ignore
             await self._redis.zrem(pending, msg)
@@ -106,6 +155,7 @@ class SafeQueueZSet(AbstractSafeQueue):
         """
         if priority is None:
             priority = max_float()
+        queue, pending = self._keys(queue, pending)
         await LuaManager.call(
             LuaName.ZREM_ZADD,
             self._redis,
@@ -113,3 +163,75 @@ class SafeQueueZSet(AbstractSafeQueue):
             args=[task, priority],
         )
         return True
+
+    @override
+    async def requeue_stale_tasks(
+        self,
+        queue: str,
+        pending: str,
+        before: TaskPriority,
+        limit: int = 100,
+        priority: Optional[TaskPriority] = None,
+        leader: Optional[LeaderLease] = None,
+    ) -> int:
+        """
+        超时回队：一次往返将 pending(zset) 中领取时间早于 before 的任务（最多 limit 个）放回主队列 queue(zset)。
+        :param queue: 主队列 zset key
+        :param pending: 处理中任务zset名
+        :param before: 截止时间戳，pending score 小于等于该值视为超时
+        :param limit: 单次最多回队数
+        :param priority: 回队后优先级，不传则最高优先级
+        :param leader: leader 租约，传入时仅租约持有者执行并续期
+        :return: int, 回队任务数；租约被其他实例持有时为 -1
+        """
+        if priority is None:
+            priority = max_float()
+        keys = [pending, queue]
+        args = [before, limit, "", "", priority]
+        if leader:
+            keys.append(leader.key)
+            args[2:4] = [leader.owner, leader.ttl_ms]
+        keys = self._keys(*keys)
+        return await LuaManager.call(
+            LuaName.ZREM_ZADD_STALE, self._redis, keys=keys, args=args
+        )  # type: ignore
+
+    @override
+    async def _claim_tasks(self, queue: str, pending: str, n: int) -> List[TaskID]:
+        queue, pending = self._keys(queue, pending)
+        msgs = await LuaManager.call(
+            LuaName.ZPOPMAX_ZADD_BATCH,
+            self._redis,
+            keys=[queue, pending],
+            args=[get_now_stamp(), n],
+        )
+        return [self._decode_bytes.post(m) for m in msgs or []]  # type: ignore
+
+    @override
+    async def requeue_tasks(
+        self,
+        queue: str,
+        pending: str,
+        tasks: List[TaskID],
+        priority: Optional[TaskPriority] = None,
+    ) -> int:
+        """
+        批量回队：一次往返从 pending(zset) 移除 tasks，并以同一优先级放回主队列 queue(zset)。
+
+        :param queue: 主队列 zset key
+        :param pending: 待确认队列 zset key
+        :param tasks: 需回队的任务列表
+        :param priority: 回队后优先级，不传则最高优先级
+        :return: int, 回队任务数
+        """
+        if not tasks:
+            return 0
+        if priority is None:
+            priority = max_float()
+        queue, pending = self._keys(queue, pending)
+        return await LuaManager.call(
+            LuaName.ZREM_ZADD_BATCH,
+            self._redis,
+            keys=[queue, pending],
+            args=[priority, *tasks],
+        )  # type: ignore
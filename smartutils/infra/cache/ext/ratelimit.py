@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from time import monotonic
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["RateLimitAlgo", "RateLimitResult", "RedisRateLimiter"]
+
+
+class RateLimitAlgo(str, Enum):
+    # 令牌桶：允许 burst 突发，长期速率 limit/window
+    TOKEN_BUCKET = "token_bucket"
+    # 滑动窗口日志：精确，每个许可占一个 zset 成员，适合 limit 较小的场景
+    SLIDING_LOG = "sliding_log"
+    # 滑动窗口计数：近似，每个 key 只存两个窗口计数，适合高 limit
+    SLIDING_WINDOW = "sliding_window"
+
+
+_ALGO_LUAS = {
+    RateLimitAlgo.TOKEN_BUCKET: LuaName.TOKEN_BUCKET,
+    RateLimitAlgo.SLIDING_LOG: LuaName.SLIDING_LOG,
+    RateLimitAlgo.SLIDING_WINDOW: LuaName.SLIDING_WINDOW,
+}
+
+
+@dataclass
+class RateLimitResult:
+    """
+    :param allowed: 是否通过
+    :param remaining: 剩余额度，令牌桶为当前令牌数
+    :param retry_after: 被拒绝时建议等待秒数，通过时为 0
+    :param local: 是否由本地预拒绝，未访问 Redis
+    """
+
+    allowed: bool
+    remaining: float
+    retry_after: float
+    local: bool = False
+
+
+class RedisRateLimiter:
+    """
+    分布式限流，每次判定为一次 Lua 调用，时间取 Redis 服务端时间。
+    - acquire(key, n): 原子申请 n 个许可，不足时一个也不扣。
+    - acquire_many: 多个 key 的申请合并为一次往返。
+    - 本地预拒绝：某 key 被拒绝后，在 retry_after 内对不小于该申请数的请求直接本地拒绝，
+      耗尽期间不再访问 Redis。多实例共享额度时，其他实例释放的额度最多晚 retry_after 被看到。
+
+    用法：
+    ```
+    limiter = cli.rate_limiter(limit=100, window=1)
+    ret = await limiter.acquire(f"api:{user_id}")
+    if not ret.allowed:
+        raise TooManyRequests(ret.retry_after)
+    ```
+    """
+
+    def __init__(
+        self,
+        redis_cli: Redis,
+        limit: int,
+        window: float = 1,
+        algo: RateLimitAlgo = RateLimitAlgo.TOKEN_BUCKET,
+        burst: Optional[int] = None,
+        prefix: str = "ratelimit",
+        local_block: bool = True,
+        max_local_keys: int = 10000,
+    ):
+        """
+        :param limit: 每个窗口内的许可数
+        :param window: 窗口秒数
+        :param algo: 限流算法
+        :param burst: 令牌桶容量，默认等于 limit，仅 TOKEN_BUCKET 有效
+        :param prefix: Redis key 前缀
+        :param local_block: 是否启用本地预拒绝
+        :param max_local_keys: 本地预拒绝最多记录的 key 数
+        """
+        if limit <= 0 or window <= 0 or max_local_keys <= 0:
+            raise LibraryUsageError("RedisRateLimiter require positive limit/window.")
+        self._redis: Redis = redis_cli
+        self.algo = RateLimitAlgo(algo)
+        self.limit = limit
+        self.window = window
+        self.capacity = burst or limit
+        # 单次申请上限：令牌桶为桶容量，窗口算法为窗口内许可数（burst 不生效）
+        self._max_n = (
+            self.capacity if self.algo == RateLimitAlgo.TOKEN_BUCKET else limit
+        )
+        self._lua = _ALGO_LUAS[self.algo]
+        self._prefix = prefix
+        self._local_block = local_block
+        self._max_local_keys = max_local_keys
+        # key -> (拒绝截止 monotonic 时间, 被拒绝的申请数)
+        self._blocked: OrderedDict[str, Tuple[float, int]] = OrderedDict()
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    def _args(self, n: int) -> List:
+        if n <= 0 or n > self._max_n:
+            raise LibraryUsageError(
+                f"RedisRateLimiter acquire n must be in [1, {self._max_n}]."
+            )
+        window_ms = int(self.window * 1000)
+        if self.algo == RateLimitAlgo.TOKEN_BUCKET:
+            return [self.capacity, self.limit / self.window, n]
+        if self.algo == RateLimitAlgo.SLIDING_LOG:
+            return [self.limit, window_ms, n, uuid.uuid4().hex]
+        return [self.limit, window_ms, n]
+
+    def _check_local(self, key: str, n: int) -> Optional[RateLimitResult]:
+        blocked = self._blocked.get(key)
+        if blocked is None:
+            return None
+        until, denied_n = blocked
+        wait = until - monotonic()
+        if wait <= 0:
+            del self._blocked[key]
+            return None
+        if n < denied_n:
+            return None
+        return RateLimitResult(False, 0, wait, local=True)
+
+    def _parse(self, key: str, n: int, ret) -> RateLimitResult:
+        allowed, remaining, retry_ms = bool(ret[0]), float(ret[1]), int(ret[2])
+        result = RateLimitResult(allowed, remaining, retry_ms / 1000)
+        if allowed:
+            self._blocked.pop(key, None)
+        elif self._local_block:
+            self._blocked[key] = (monotonic() + result.retry_after, n)
+            self._blocked.move_to_end(key)
+            while len(self._blocked) > self._max_local_keys:
+                self._blocked.popitem(last=False)
+        return result
+
+    async def acquire(self, key: str, n: int = 1) -> RateLimitResult:
+        """
+        申请 n 个许可。
+        :param key: 限流维度，如用户ID、接口名
+        """
+        args = self._args(n)
+        local = self._check_local(key, n)
+        if local:
+            return local
+        ret = await LuaManager.call(
+            self._lua, self._redis, keys=[self._key(key)], args=args
+        )
+        return self._parse(key, n, ret)
+
+    async def acquire_many(
+        self, requests: Sequence[Tuple[str, int]]
+    ) -> List[RateLimitResult]:
+        """
+        批量申请，本地预拒绝之外的请求一次往返。
+        :param requests: [(key, n)]，同一 key 可出现多次，按顺序判定
+        """
+        results: List[Optional[RateLimitResult]] = [None] * len(requests)
+        remote: List[int] = []
+        pipe = LuaManager.pipeline(self._redis)
+        for i, (key, n) in enumerate(requests):
+            args = self._args(n)
+            results[i] = self._check_local(key, n)
+            if results[i] is None:
+                remote.append(i)
+                pipe.call(self._lua, keys=[self._key(key)], args=args)
+        if remote:
+            for i, ret in zip(remote, await pipe.execute()):
+                key, n = requests[i]
+                results[i] = self._parse(key, n, ret)
+        return results  # type: ignore
+
+    async def reset(self, key: str) -> int:
+        """清除 key 的限流状态。"""
+        self._blocked.pop(key, None)
+        return await self._redis.delete(self._key(key))  # type: ignore
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from enum import Enum
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
 from smartutils.infra.cache.common.decode import DecodeBytes
 from smartutils.infra.cache.lua.const import LuaName
 from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
 
 try:
     from redis.asyncio import Redis
@@ -20,10 +24,166 @@ class LuaOp(str, Enum):
     DECR = "decr"
 
 
+class BufferedCounter(MyBase):
+    """
+    写合并计数器：incr/decr 先在进程内按 key 累加，
+    定时（最多滞后 interval 秒）或待刷 key 数达到 max_keys 时，
+    以一次 pipeline 的 INCRBY/EXPIRE 批量写入 Redis。
+    刷写失败（整批或单个 key 的 INCRBY）的增量会合并回缓冲区，下一轮重试；进程异常退出时未刷写的增量会丢失。
+
+    用法：
+    ```
+    counter = cli.safe_str.buffered(interval=1, max_keys=1000)
+    AppHook.on_startup(counter.start)
+    AppHook.on_shutdown(counter.stop)
+    await counter.incr(f"pv:{page}")
+    ```
+    """
+
+    def __init__(self, redis_cli: Redis, interval: float = 1, max_keys: int = 1000):
+        """
+        :param interval: 最大滞后秒数，后台按该间隔刷写
+        :param max_keys: 待刷 key 数达到该值时立即刷写
+        """
+        if interval <= 0 or max_keys <= 0:
+            raise LibraryUsageError(f"{self.name} require positive interval/max_keys.")
+        self._redis: Redis = redis_cli
+        self._interval = interval
+        self._max_keys = max_keys
+        self._deltas: Dict[str, int] = {}
+        self._expires: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def pending(self, key: str) -> int:
+        """尚未刷写到 Redis 的增量。"""
+        return self._deltas.get(key, 0)
+
+    async def incr(self, key: str, n: int = 1, ex: Optional[int] = None):
+        """
+        累加 n，不访问 Redis（达到 max_keys 时除外）。
+        :param ex: 刷写时设置的过期秒数，同一 key 以最后一次为准
+        """
+        self._deltas[key] = self._deltas.get(key, 0) + n
+        if ex:
+            self._expires[key] = ex
+        if len(self._deltas) >= self._max_keys and not self._flush_lock.locked():
+            await self.flush()
+
+    async def decr(self, key: str, n: int = 1, ex: Optional[int] = None):
+        await self.incr(key, -n, ex)
+
+    async def flush(self) -> Dict[str, int]:
+        """
+        立即刷写全部缓冲增量。
+        :return: 刷写的 key -> 刷写后的值
+        """
+        async with self._flush_lock:
+            deltas, expires = self._deltas, self._expires
+            self._deltas, self._expires = {}, {}
+            # 增量为 0 的 key 无需写入
+            keys: List[str] = [k for k, n in deltas.items() if n]
+            if not keys:
+                return {}
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.incrby(key, deltas[key])
+                        if key in expires:
+                            pipe.expire(key, expires[key])
+                    # 非事务 pipeline 中单个命令失败时其余命令已生效，逐条检查结果
+                    rets = await pipe.execute(raise_on_error=False)
+            except Exception:
+                # 整批未确认写入，全部合并回缓冲区
+                self._merge_back(keys, deltas, expires)
+                raise
+            vals = iter(rets)
+            result: Dict[str, int] = {}
+            failed: List[str] = []
+            error: Optional[Exception] = None
+            for key in keys:
+                ret = next(vals)
+                if key in expires:
+                    next(vals)
+                if isinstance(ret, Exception):
+                    # 只合并回 INCRBY 失败的 key，已生效的增量不重复写入
+                    failed.append(key)
+                    error = error or ret
+                    continue
+                result[key] = int(ret)
+            if failed:
+                self._merge_back(failed, deltas, expires)
+                logger.error("{} flush {} keys fail: {}", self.name, len(failed), error)
+                raise error  # type: ignore
+            return result
+
+    def _merge_back(
+        self, keys: List[str], deltas: Dict[str, int], expires: Dict[str, int]
+    ):
+        # 合并回缓冲区，期间新增的增量不受影响
+        for key in keys:
+            self._deltas[key] = self._deltas.get(key, 0) + deltas[key]
+            if key in expires:
+                self._expires.setdefault(key, expires[key])
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                ...
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("{} flush fail.", self.name)
+
+    async def start(self, *args, **kwargs):
+        """启动后台刷写，参数兼容 AppHook.on_startup。"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, *args, **kwargs):
+        """停止后台刷写并刷写剩余增量，参数兼容 AppHook.on_shutdown。"""
+        if self._task:
+            self._stop.set()
+            await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception(
+                "{} final flush fail, lost {} keys.", self.name, len(self._deltas)
+            )
+
+
 class SafeString:
     def __init__(self, redis_cli: Redis, decode_bytes: DecodeBytes):
         self._redis: Redis = redis_cli
         self._decode_bytes = decode_bytes
+        self._buffers: List[BufferedCounter] = []
+
+    def buffered(self, interval: float = 1, max_keys: int = 1000) -> BufferedCounter:
+        """
+        创建写合并计数器，适合高频、可容忍短暂滞后的计数，关闭客户端时自动刷写。
+        :param interval: 最大滞后秒数
+        :param max_keys: 待刷 key 数阈值
+        """
+        counter = BufferedCounter(self._redis, interval, max_keys)
+        self._buffers.append(counter)
+        return counter
+
+    async def stop_buffered(self):
+        """停止全部写合并计数器并刷写剩余增量。"""
+        for counter in self._buffers:
+            await counter.stop()
+        self._buffers = []
 
     async def _num_op(self, op: LuaOp, key: str, ex: Optional[int] = None) -> int:
         """
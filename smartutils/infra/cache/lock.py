@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import uuid
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
+
+try:
+    from redis.asyncio import Redis
+except ImportError:
+    ...
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["LockHandle", "RedisLock"]
+
+
+@dataclass
+class LockHandle:
+    """
+    :param name: 锁名
+    :param key: Redis 锁 key
+    :param owner: 持有者标识
+    :param token: fencing token，同一锁名单调递增；写下游存储时携带，下游拒绝更小的 token
+    :param lost: 续期失败，租约已过期或被他人持有，应停止受保护的操作
+    """
+
+    name: str
+    key: str
+    owner: str
+    token: int
+    lost: bool = False
+    _stripe: Optional[asyncio.Lock] = field(default=None, repr=False)
+
+
+class RedisLock(MyBase):
+    """
+    单实例 Redis 锁，加锁/解锁/续期各为一次 Lua 调用。
+    - 加锁：SET NX PX，成功时 INCR 该锁的 fencing 计数器，返回单调递增的 token。
+    - 看门狗：一个后台任务每 ttl/3 秒用一次 pipeline 为本实例持有的全部锁续期，
+      无锁持有时任务退出；续期失败的锁标记 lost。
+    - keyed：本进程内先按锁名获取本地分段锁(asyncio.Lock)，同进程竞争同一锁的协程在本地等待，
+      不轮询 Redis；不同锁名可能落在同一分段，stripes 越大误等待越少，
+      分段等待到期（含 timeout=0）时仍直接尝试 Redis，不会因分段冲突误判锁被占用。
+    - fencing 计数器不设过期，每个锁名常驻一个 key，锁名数量无界时可关闭 fencing。
+
+    用法：
+    ```
+    locker = RedisManager().locker(ttl=10, keyed=True)
+    async with locker.lock(f"order:{order_id}", timeout=3) as held:
+        if not held:
+            return
+        await db.update(order, fencing_token=held.token)
+    ```
+    """
+
+    def __init__(
+        self,
+        redis_cli: Redis,
+        ttl: float = 10,
+        prefix: str = "lock",
+        watchdog: bool = True,
+        fencing: bool = True,
+        keyed: bool = False,
+        stripes: int = 256,
+        retry_interval: float = 0.05,
+    ):
+        """
+        :param ttl: 租期秒数，看门狗开启时持有期间持续续期
+        :param prefix: Redis key 前缀
+        :param watchdog: 是否自动续期
+        :param fencing: 是否生成 fencing token，关闭时 token 恒为 1
+        :param keyed: 是否启用本地分段锁
+        :param stripes: 本地分段锁数量
+        :param retry_interval: 锁被其他进程持有时的轮询间隔秒数
+        """
+        if ttl <= 0 or stripes <= 0 or retry_interval <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive ttl/stripes/retry_interval."
+            )
+        self._redis: Redis = redis_cli
+        self._ttl_ms = int(ttl * 1000)
+        self._prefix = prefix
+        self._watchdog = watchdog
+        self._fencing = "1" if fencing else "0"
+        self._retry_interval = retry_interval
+        self._stripes: List[asyncio.Lock] = (
+            [asyncio.Lock() for _ in range(stripes)] if keyed else []
+        )
+        # owner -> 看门狗续期中的锁
+        self._held: Dict[str, LockHandle] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _keys(self, name: str) -> Tuple[str, str]:
+        # 锁与 fencing 计数器使用相同哈希标签，集群模式下同槽
+        key = f"{self._prefix}:{{{name}}}"
+        return key, f"{key}:fence"
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - monotonic()
+
+    async def _acquire_stripe(
+        self, stripe: asyncio.Lock, deadline: Optional[float]
+    ) -> bool:
+        if not stripe.locked():
+            # 未被占用时不挂起
+            await stripe.acquire()
+            return True
+        wait = self._remaining(deadline)
+        if wait is not None and wait <= 0:
+            return False
+        try:
+            await asyncio.wait_for(stripe.acquire(), wait)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def acquire(
+        self, name: str, timeout: Optional[float] = 0
+    ) -> Optional[LockHandle]:
+        """
+        加锁。
+        :param timeout: 最长等待秒数，0 只尝试一次，None 一直等待
+        :return: 未获得锁时为 None
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        stripe = None
+        if self._stripes:
+            stripe = self._stripes[hash(name) % len(self._stripes)]
+            if not await self._acquire_stripe(stripe, deadline):
+                # 分段可能被同分段的其他锁名占用，到期后不持有分段直接尝试 Redis
+                stripe = None
+        key, fence = self._keys(name)
+        owner = uuid.uuid4().hex
+        try:
+            while True:
+                token, pttl = await LuaManager.call(
+                    LuaName.LOCK_ACQUIRE,
+                    self._redis,
+                    keys=[key, fence],
+                    args=[owner, self._ttl_ms, self._fencing],
+                )  # type: ignore
+                if token:
+                    break
+                wait = self._remaining(deadline)
+                if wait is not None and wait <= 0:
+                    if stripe:
+                        stripe.release()
+                    return None
+                delay = self._retry_interval * random.uniform(0.5, 1.5)
+                if pttl > 0:
+                    delay = min(delay, pttl / 1000)
+                await asyncio.sleep(delay if wait is None else min(delay, wait))
+        except BaseException:
+            if stripe:
+                stripe.release()
+            raise
+        handle = LockHandle(name, key, owner, int(token), _stripe=stripe)
+        if self._watchdog:
+            self._watch(handle)
+        return handle
+
+    async def release(self, handle: LockHandle) -> bool:
+        """
+        解锁，仅删除自己持有的锁。
+        :return: 是否删除成功，False 表示锁已过期或被他人持有
+        """
+        self._held.pop(handle.owner, None)
+        try:
+            deleted = await LuaManager.call(
+                LuaName.DEL_IF_EQ, self._redis, keys=[handle.key], args=[handle.owner]
+            )
+        finally:
+            if handle._stripe:
+                handle._stripe.release()
+                handle._stripe = None
+        return bool(deleted)
+
+    async def extend(self, handle: LockHandle, ttl: Optional[float] = None) -> bool:
+        """
+        手动续期，租期重置为 ttl 秒（默认初始化时的 ttl）。
+        :return: 是否续期成功，失败时标记 lost
+        """
+        ttl_ms = self._ttl_ms if ttl is None else int(ttl * 1000)
+        ok = await LuaManager.call(
+            LuaName.LOCK_EXTEND,
+            self._redis,
+            keys=[handle.key],
+            args=[handle.owner, ttl_ms],
+        )
+        if not ok:
+            handle.lost = True
+        return bool(ok)
+
+    @asynccontextmanager
+    async def lock(
+        self, name: str, timeout: Optional[float] = 0
+    ) -> AsyncGenerator[Optional[LockHandle], None]:
+        """
+        加锁上下文，退出时解锁。
+        :yields: LockHandle，未获得锁时为 None
+        """
+        handle = await self.acquire(name, timeout)
+        try:
+            yield handle
+        finally:
+            if handle:
+                try:
+                    await self.release(handle)
+                except Exception:
+                    logger.exception("{} release {} fail.", self.name, name)
+
+    def _watch(self, handle: LockHandle):
+        self._held[handle.owner] = handle
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def _renew(self):
+        handles = list(self._held.values())
+        pipe = LuaManager.pipeline(self._redis)
+        for handle in handles:
+            pipe.call(
+                LuaName.LOCK_EXTEND,
+                keys=[handle.key],
+                args=[handle.owner, self._ttl_ms],
+            )
+        rets = await pipe.execute(raise_on_error=False)
+        for handle, ret in zip(handles, rets):
+            if isinstance(ret, Exception):
+                logger.error("{} renew {} fail: {}", self.name, handle.name, ret)
+                continue
+            # 已释放的锁不在 _held 中，不误标 lost
+            if not ret and self._held.pop(handle.owner, None):
+                handle.lost = True
+                logger.warning("{} lock {} lost.", self.name, handle.name)
+
+    async def _run(self):
+        interval = self._ttl_ms / 1000 / 3
+        while self._held:
+            await asyncio.sleep(interval)
+            if not self._held:
+                break
+            try:
+                await self._renew()
+            except Exception:
+                logger.exception("{} renew fail.", self.name)
+
+    async def stop(self, *args, **kwargs):
+        """停止看门狗，已持有的锁不再续期，到期自动释放；参数兼容 AppHook.on_shutdown。"""
+        self._held.clear()
+        if not self._task:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            ...
+        self._task = None
@@ -67,6 +67,319 @@ redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
 return ARGV[1]
 """
 
+# 批量领取：最多弹出 ARGV[2] 个任务，逐个放入 pending，返回弹出的任务列表
+RPOP_ZADD_BATCH_SCRIPT = """
+local msgs = {}
+for i = 1, tonumber(ARGV[2]) do
+    local msg = redis.call('RPOP', KEYS[1])
+    if not msg then
+        break
+    end
+    redis.call('ZADD', KEYS[2], ARGV[1], msg)
+    msgs[#msgs + 1] = msg
+end
+return msgs
+"""
+
+ZPOPMAX_ZADD_BATCH_SCRIPT = """
+local items = redis.call('ZPOPMAX', KEYS[1], ARGV[2])
+local msgs = {}
+for i = 1, #items, 2 do
+    redis.call('ZADD', KEYS[2], ARGV[1], items[i])
+    msgs[#msgs + 1] = items[i]
+end
+return msgs
+"""
+
+# 批量回队：ARGV 均为任务
+ZREM_RPUSH_BATCH_SCRIPT = """
+for i = 1, #ARGV do
+    redis.call('ZREM', KEYS[1], ARGV[i])
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+return #ARGV
+"""
+
+# 批量回队：ARGV[1] 为回队优先级，其余为任务
+ZREM_ZADD_BATCH_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call('ZREM', KEYS[2], ARGV[i])
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[i])
+end
+return #ARGV - 1
+"""
+
+# 超时回队：KEYS[3] 存在时先做 leader 校验并续期，非 leader 返回 -1
+# ARGV[1] 截止时间戳，ARGV[2] 单次最多回队数，ARGV[3] leader 标识，ARGV[4] leader 租期(ms)
+# 倒序 RPUSH，保证最早领取的任务最先被 RPOP
+ZREM_RPUSH_STALE_SCRIPT = """
+if #KEYS == 3 then
+    local owner = redis.call('GET', KEYS[3])
+    if owner and owner ~= ARGV[3] then
+        return -1
+    end
+    redis.call('SET', KEYS[3], ARGV[3], 'PX', ARGV[4])
+end
+local msgs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for i = #msgs, 1, -1 do
+    redis.call('ZREM', KEYS[1], msgs[i])
+    redis.call('RPUSH', KEYS[2], msgs[i])
+end
+return #msgs
+"""
+
+# 同上，ARGV[5] 为回队优先级
+ZREM_ZADD_STALE_SCRIPT = """
+if #KEYS == 3 then
+    local owner = redis.call('GET', KEYS[3])
+    if owner and owner ~= ARGV[3] then
+        return -1
+    end
+    redis.call('SET', KEYS[3], ARGV[3], 'PX', ARGV[4])
+end
+local msgs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for i = 1, #msgs do
+    redis.call('ZREM', KEYS[1], msgs[i])
+    redis.call('ZADD', KEYS[2], ARGV[5], msgs[i])
+end
+return #msgs
+"""
+
+# 值等于 ARGV[1] 时才删除，用于释放自己持有的 leader/锁
+DEL_IF_EQ_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 阻塞领取后：从 processing 移除，并记录到 pending
+LREM_ZADD_SCRIPT = """
+local n = redis.call('LREM', KEYS[1], 1, ARGV[2])
+if n > 0 then
+    redis.call('ZADD', KEYS[2], ARGV[1], ARGV[2])
+end
+return n
+"""
+
+# processing 残留任务全部放回 queue 出队端，最早领取的最先被再次领取
+LPOP_RPUSH_ALL_SCRIPT = """
+local n = 0
+while true do
+    local msg = redis.call('LPOP', KEYS[1])
+    if not msg then
+        break
+    end
+    redis.call('RPUSH', KEYS[2], msg)
+    n = n + 1
+end
+return n
+"""
+
+# 重试计数：hash 字段自增并刷新过期时间
+HINCRBY_EXPIRE_SCRIPT = """
+local n = redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return n
+"""
+
+# 延迟任务到期转入 ready list：ARGV[1] 当前毫秒时间戳，ARGV[2] 单次最多转移数
+# 返回 {转移数, 下一个到期时间}，无剩余任务时只返回转移数
+ZRANGEBYSCORE_LPUSH_SCRIPT = """
+local msgs = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for i = 1, #msgs do
+    redis.call('ZREM', KEYS[1], msgs[i])
+    redis.call('LPUSH', KEYS[2], msgs[i])
+end
+local nxt = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {#msgs, nxt[2]}
+"""
+
+
+# 布隆过滤器批量添加：ARGV[1] 为哈希数 k，之后每 k 个为一个元素的位下标
+# 返回每个元素是否新增（任一位原为0）
+BLOOM_ADD_SCRIPT = """
+local k = tonumber(ARGV[1])
+local n = (#ARGV - 1) / k
+local ret = {}
+for i = 0, n - 1 do
+    local added = 0
+    for j = 2 + i * k, 1 + (i + 1) * k do
+        if redis.call('SETBIT', KEYS[1], ARGV[j], 1) == 0 then
+            added = 1
+        end
+    end
+    ret[i + 1] = added
+end
+return ret
+"""
+
+# 布隆过滤器批量查询，参数同 BLOOM_ADD，遇到为0的位即判定不存在
+BLOOM_CONTAINS_SCRIPT = """
+local k = tonumber(ARGV[1])
+local n = (#ARGV - 1) / k
+local ret = {}
+for i = 0, n - 1 do
+    local found = 1
+    for j = 2 + i * k, 1 + (i + 1) * k do
+        if redis.call('GETBIT', KEYS[1], ARGV[j]) == 0 then
+            found = 0
+            break
+        end
+    end
+    ret[i + 1] = found
+end
+return ret
+"""
+
+# Count-Min 批量累加：KEYS[1] 计数器 bitmap(u32)，KEYS[2] 热点 zset
+# ARGV[1] 为行数 depth，ARGV[2] 为热点保留数 topk(0 不记录)
+# 之后每个元素依次为：元素、增量、depth 个计数器下标(#N)
+# 返回每个元素累加后的估计值（各行最小值）
+CMS_INCRBY_SCRIPT = """
+local depth = tonumber(ARGV[1])
+local topk = tonumber(ARGV[2])
+local ret = {}
+local i = 3
+while i <= #ARGV do
+    local args = {'OVERFLOW', 'SAT'}
+    for j = 1, depth do
+        args[#args + 1] = 'INCRBY'
+        args[#args + 1] = 'u32'
+        args[#args + 1] = ARGV[i + 1 + j]
+        args[#args + 1] = ARGV[i + 1]
+    end
+    local vals = redis.call('BITFIELD', KEYS[1], unpack(args))
+    local est = vals[1]
+    for j = 2, depth do
+        if vals[j] < est then
+            est = vals[j]
+        end
+    end
+    ret[#ret + 1] = est
+    if topk > 0 then
+        redis.call('ZADD', KEYS[2], est, ARGV[i])
+    end
+    i = i + 2 + depth
+end
+if topk > 0 then
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -(topk + 1))
+end
+return ret
+"""
+
+
+# 限流脚本统一使用服务端时间，避免多实例时钟偏差
+# 返回 {是否通过, 剩余额度(字符串), 需等待毫秒数}
+_RATE_LIMIT_NOW = """
+if redis.replicate_commands then
+    redis.replicate_commands()
+end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+"""
+
+# 令牌桶：KEYS[1] 为 hash(tokens, ts)
+# ARGV: 桶容量, 每秒补充令牌数, 本次申请数
+TOKEN_BUCKET_SCRIPT = (
+    _RATE_LIMIT_NOW
+    + """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local n = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry = 0
+if tokens >= n then
+    tokens = tokens - n
+    allowed = 1
+else
+    retry = math.ceil((n - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return {allowed, tostring(tokens), retry}
+"""
+)
+
+# 滑动窗口日志：KEYS[1] 为 zset，成员为每个许可，score 为获取时间
+# ARGV: 窗口内上限, 窗口毫秒数, 本次申请数, 本次调用唯一ID
+SLIDING_LOG_SCRIPT = (
+    _RATE_LIMIT_NOW
+    + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local n = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count + n <= limit then
+    for i = 1, n do
+        redis.call('ZADD', KEYS[1], now, ARGV[4] .. ':' .. i)
+    end
+    redis.call('PEXPIRE', KEYS[1], window)
+    return {1, tostring(limit - count - n), 0}
+end
+-- 等到第 count + n - limit 早的许可滑出窗口
+local idx = count + n - limit - 1
+local e = redis.call('ZRANGE', KEYS[1], idx, idx, 'WITHSCORES')
+local retry = math.max(1, tonumber(e[2]) + window - now)
+return {0, tostring(limit - count), retry}
+"""
+)
+
+# 滑动窗口计数（近似）：KEYS[1] 为 hash，field 为窗口序号，value 为窗口内计数
+# 估计值 = 上一窗口计数 * 上一窗口剩余占比 + 当前窗口计数
+# ARGV: 窗口内上限, 窗口毫秒数, 本次申请数
+SLIDING_WINDOW_SCRIPT = (
+    _RATE_LIMIT_NOW
+    + """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local n = tonumber(ARGV[3])
+local win = math.floor(now / window)
+local elapsed = now - win * window
+local curr = tonumber(redis.call('HGET', KEYS[1], tostring(win)) or 0)
+local prev = tonumber(redis.call('HGET', KEYS[1], tostring(win - 1)) or 0)
+local est = prev * (window - elapsed) / window + curr
+if est + n <= limit then
+    redis.call('HINCRBY', KEYS[1], tostring(win), n)
+    redis.call('HDEL', KEYS[1], tostring(win - 2))
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+    return {1, tostring(limit - est - n), 0}
+end
+local retry = window - elapsed
+if prev > 0 and limit - curr - n >= 0 then
+    retry = math.ceil((window - elapsed) - (limit - curr - n) * window / prev)
+end
+return {0, tostring(math.max(0, limit - est)), math.max(1, retry)}
+"""
+)
+
+# 加锁：SET NX PX 成功后递增 fencing 计数器
+# KEYS[1] 锁, KEYS[2] fencing 计数器; ARGV: 持有者标识, 租期毫秒, 是否生成 fencing token
+# 返回 {token, 0}；失败返回 {0, 锁剩余毫秒}
+LOCK_ACQUIRE_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    local token = 1
+    if ARGV[3] == '1' then
+        token = redis.call('INCR', KEYS[2])
+    end
+    return {token, 0}
+end
+return {0, redis.call('PTTL', KEYS[1])}
+"""
+
+# 续期：仍由 ARGV[1] 持有时重置租期为 ARGV[2] 毫秒
+LOCK_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
 
 class LuaName(Enum):
     INCR_DECR = "incr_decr"
@@ -74,6 +387,25 @@ class LuaName(Enum):
     ZREM_RPUSH = "zrem_rpush"
     ZPOPMAX_ZADD = "zpopmax_zadd"
     ZREM_ZADD = "zrem_zadd"
+    RPOP_ZADD_BATCH = "rpop_zadd_batch"
+    ZPOPMAX_ZADD_BATCH = "zpopmax_zadd_batch"
+    ZREM_RPUSH_BATCH = "zrem_rpush_batch"
+    ZREM_ZADD_BATCH = "zrem_zadd_batch"
+    ZREM_RPUSH_STALE = "zrem_rpush_stale"
+    ZREM_ZADD_STALE = "zrem_zadd_stale"
+    DEL_IF_EQ = "del_if_eq"
+    LREM_ZADD = "lrem_zadd"
+    LPOP_RPUSH_ALL = "lpop_rpush_all"
+    HINCRBY_EXPIRE = "hincrby_expire"
+    ZRANGEBYSCORE_LPUSH = "zrangebyscore_lpush"
+    BLOOM_ADD = "bloom_add"
+    BLOOM_CONTAINS = "bloom_contains"
+    CMS_INCRBY = "cms_incrby"
+    TOKEN_BUCKET = "token_bucket"
+    SLIDING_LOG = "sliding_log"
+    SLIDING_WINDOW = "sliding_window"
+    LOCK_ACQUIRE = "lock_acquire"
+    LOCK_EXTEND = "lock_extend"
 
 
 LUAS = {
@@ -82,4 +414,23 @@ LUAS = {
     LuaName.ZREM_RPUSH: ZREM_RPUSH_SCRIPT,
     LuaName.ZPOPMAX_ZADD: ZPOPMAX_ZADD_SCRIPT,
     LuaName.ZREM_ZADD: ZREM_ZADD_SCRIPT,
+    LuaName.RPOP_ZADD_BATCH: RPOP_ZADD_BATCH_SCRIPT,
+    LuaName.ZPOPMAX_ZADD_BATCH: ZPOPMAX_ZADD_BATCH_SCRIPT,
+    LuaName.ZREM_RPUSH_BATCH: ZREM_RPUSH_BATCH_SCRIPT,
+    LuaName.ZREM_ZADD_BATCH: ZREM_ZADD_BATCH_SCRIPT,
+    LuaName.ZREM_RPUSH_STALE: ZREM_RPUSH_STALE_SCRIPT,
+    LuaName.ZREM_ZADD_STALE: ZREM_ZADD_STALE_SCRIPT,
+    LuaName.DEL_IF_EQ: DEL_IF_EQ_SCRIPT,
+    LuaName.LREM_ZADD: LREM_ZADD_SCRIPT,
+    LuaName.LPOP_RPUSH_ALL: LPOP_RPUSH_ALL_SCRIPT,
+    LuaName.HINCRBY_EXPIRE: HINCRBY_EXPIRE_SCRIPT,
+    LuaName.ZRANGEBYSCORE_LPUSH: ZRANGEBYSCORE_LPUSH_SCRIPT,
+    LuaName.BLOOM_ADD: BLOOM_ADD_SCRIPT,
+    LuaName.BLOOM_CONTAINS: BLOOM_CONTAINS_SCRIPT,
+    LuaName.CMS_INCRBY: CMS_INCRBY_SCRIPT,
+    LuaName.TOKEN_BUCKET: TOKEN_BUCKET_SCRIPT,
+    LuaName.SLIDING_LOG: SLIDING_LOG_SCRIPT,
+    LuaName.SLIDING_WINDOW: SLIDING_WINDOW_SCRIPT,
+    LuaName.LOCK_ACQUIRE: LOCK_ACQUIRE_SCRIPT,
+    LuaName.LOCK_EXTEND: LOCK_EXTEND_SCRIPT,
 }
@@ -1,41 +1,148 @@
 from __future__ import annotations
 
-import asyncio
-from typing import TYPE_CHECKING, Dict, Optional, Sequence, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
 from smartutils.infra.cache.lua.const import LUAS, LuaName
 from smartutils.log import logger
 
 try:
     from redis.asyncio import Redis
+    from redis.asyncio.cluster import RedisCluster
     from redis.commands.core import AsyncScript
-    from redis.exceptions import ResponseError
+    from redis.exceptions import NoScriptError, ResponseError
 except ImportError:
     ...
 if TYPE_CHECKING:  # pragma: no cover
     from redis.asyncio import Redis
+    from redis.asyncio.cluster import RedisCluster
     from redis.commands.core import AsyncScript
-    from redis.exceptions import ResponseError
+    from redis.exceptions import NoScriptError, ResponseError
+
+
+def _clean(values: Optional[Sequence]) -> List:
+    # Redis 命令只能收字符串、二进制、数值、浮点，不支持 None/Null/nil 这种空类型作为参数传递。
+    return [(v if v is not None else "") for v in (values or [])]
+
+
+class LuaPipeline:
+    """
+    一次往返批量执行多个脚本调用（非事务）。
+    用法：
+    ```
+    pipe = LuaManager.pipeline(redis_cli)
+    for key in keys:
+        pipe.call(LuaName.INCR_DECR, keys=[key], args=["incr", ""])
+    rets = await pipe.execute()
+    ```
+    """
+
+    def __init__(self, redis_cli: Redis):
+        self._redis = redis_cli
+        self._calls: List[Tuple[AsyncScript, List, List]] = []
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def call(
+        self,
+        name: LuaName,
+        keys: Optional[Sequence] = None,
+        args: Optional[Sequence] = None,
+    ) -> LuaPipeline:
+        lua = LuaManager.register(name, self._redis)
+        self._calls.append((lua, _clean(keys), _clean(args)))
+        return self
+
+    async def _evalsha(self, calls) -> List[Any]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for lua, keys, args in calls:
+                # 集群 pipeline 屏蔽了 evalsha 方法，原始命令可按 KEYS 所在槽路由，
+                # 并按节点分批并发发送
+                pipe.execute_command("EVALSHA", lua.sha, len(keys), *keys, *args)
+            return await pipe.execute(raise_on_error=False)
+
+    async def execute(self, raise_on_error: bool = True) -> List[Any]:
+        """
+        执行并清空已加入的调用。
+        服务端缺少脚本(NOSCRIPT)的调用并未执行，加载后只重试这些调用，总计最多三次往返。
+        :param raise_on_error: 为 False 时，失败调用的异常放在返回列表对应位置
+        :return: 各调用结果，与加入顺序一致
+        """
+        calls, self._calls = self._calls, []
+        if not calls:
+            return []
+        rets = await self._evalsha(calls)
+        retry = [i for i, r in enumerate(rets) if isinstance(r, NoScriptError)]
+        if retry:
+            await LuaManager.load({calls[i][0] for i in retry}, self._redis)
+            for i, r in zip(retry, await self._evalsha([calls[i] for i in retry])):
+                rets[i] = r
+        if raise_on_error:
+            for r in rets:
+                if isinstance(r, ResponseError):
+                    logger.error(f"Lua pipeline execution error: {r}")
+                    raise r
+        return rets
 
 
 class LuaManager:
+    # (客户端id, 脚本名) -> Script；Script 持有客户端引用，客户端存活期间id不会复用
     _luas: Dict[Tuple[int, LuaName], AsyncScript] = {}
-    _lock = asyncio.Lock()
 
     @classmethod
-    async def get(cls, name: LuaName, redis_cli: Redis) -> AsyncScript:
-        """
-        获取某个脚本对象。已注册直接返回，未注册且存在脚本内容则自动注册。
-        """
+    def register(cls, name: LuaName, redis_cli: Redis) -> AsyncScript:
+        """注册脚本对象，只在本地计算sha，不访问服务端。"""
         key = (id(redis_cli), name)
-        if name in cls._luas:
-            return cls._luas[key]
-        async with cls._lock:
-            if name in cls._luas:
-                return cls._luas[key]
+        lua = cls._luas.get(key)
+        if lua is None or getattr(lua, "registered_client", None) is not redis_cli:
             lua = redis_cli.register_script(LUAS[name])
             cls._luas[key] = lua
-            return lua
+        return lua
+
+    @classmethod
+    async def get(cls, name: LuaName, redis_cli: Redis) -> AsyncScript:
+        """
+        获取某个脚本对象。已注册直接返回，未注册则自动注册。
+        """
+        return cls.register(name, redis_cli)
+
+    @classmethod
+    async def load(cls, luas, redis_cli: Redis) -> None:
+        """一次往返 SCRIPT LOAD 多个脚本，集群模式下每个主节点一批，各节点并发。"""
+        luas = list(luas)
+        if isinstance(redis_cli, RedisCluster):
+            primaries = (await redis_cli.initialize()).get_primaries()
+            async with redis_cli.pipeline() as pipe:
+                for lua in luas:
+                    for node in primaries:
+                        pipe.execute_command(
+                            "SCRIPT LOAD", lua.script, target_nodes=node
+                        )
+                rets = await pipe.execute()
+            shas = rets[:: len(primaries)]
+        else:
+            async with redis_cli.pipeline(transaction=False) as pipe:
+                for lua in luas:
+                    pipe.script_load(lua.script)
+                shas = await pipe.execute()
+        for lua, sha in zip(luas, shas):
+            lua.sha = sha.decode("utf-8") if isinstance(sha, bytes) else sha
+
+    @classmethod
+    async def load_all(cls, redis_cli: Redis) -> None:
+        """注册并预加载全部脚本，避免首次调用时 NOSCRIPT 多一次往返。"""
+        await cls.load([cls.register(name, redis_cli) for name in LUAS], redis_cli)
+
+    @classmethod
+    def forget(cls, redis_cli: Redis) -> None:
+        """移除客户端的脚本缓存，客户端关闭时调用。"""
+        cid = id(redis_cli)
+        for key in [k for k in cls._luas if k[0] == cid]:
+            del cls._luas[key]
+
+    @classmethod
+    def pipeline(cls, redis_cli: Redis) -> LuaPipeline:
+        return LuaPipeline(redis_cli)
 
     @classmethod
     async def call(
@@ -49,10 +156,9 @@ class LuaManager:
         调用脚本。自动注册/缓存Script对象，直接 await 脚本调用 keys/args。
         键值必须使用KEYS传递,集群分槽需要
         """
-        # Redis 命令只能收字符串、二进制、数值、浮点，不支持 None/Null/nil 这种空类型作为参数传递。
-        keys = [(k if k is not None else "") for k in (keys or [])]
-        args = [(a if a is not None else "") for a in (args or [])]
-        lua = await cls.get(name, redis_cli)
+        keys = _clean(keys)
+        args = _clean(args)
+        lua = cls.register(name, redis_cli)
         try:
 
             return await lua(
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import sys
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Dict, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
 
 from smartutils.config.const import ConfKey
 from smartutils.config.schema.redis import RedisConf
 from smartutils.ctx import CTXKey, CTXVarManager
 from smartutils.design import SingletonMeta
-from smartutils.error.sys import CacheError
+from smartutils.error.sys import CacheError, LibraryUsageError
+from smartutils.infra.cache.ext.queue.abstract import AbstractSafeQueue
+from smartutils.infra.cache.ext.queue.reaper import PendingReaper
+from smartutils.infra.cache.lock import LockHandle, RedisLock
+from smartutils.infra.cache.lua.lua_manager import LuaManager
 from smartutils.infra.cache.redis_cli import AsyncRedisCli
 from smartutils.infra.cache.redlock import SmartutilsInstance
+from smartutils.infra.cache.sharded import ShardedRedis
+from smartutils.infra.cache.single_flight import CacheAside, KeyBuilder
 from smartutils.infra.resource.manager.manager import CTXResourceManager
 from smartutils.init.factory import InitByConfFactory
 from smartutils.init.mixin import LibraryCheckMixin
 from smartutils.log import logger
 
+if sys.version_info >= (3, 11):
+    from typing import override
+else:
+    from typing_extensions import override
+
 try:
     import aioredlock
     import aioredlock.redis
@@ -104,11 +127,31 @@ class RedisManager(
 
         resources = {k: AsyncRedisCli(conf, f"redis_{k}") for k, conf in confs.items()}
         self._redlock = self._init_redlock(resources)
+        self._reapers: List[PendingReaper] = []
+        self._lockers: List[RedisLock] = []
+        self._default_lockers: Dict[str, RedisLock] = {}
         super().__init__(
             resources=resources,
             ctx_key=CTXKey.CACHE_REDIS,
             error=CacheError,
         )
+        self._lua_loading = self._preload_luas()
+
+    def _preload_luas(self) -> Optional[asyncio.Task]:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # 无事件循环时（如同步初始化），首次调用时由 NOSCRIPT 回退加载
+            return None
+        return loop.create_task(self.load_luas())
+
+    async def load_luas(self):
+        """为每个客户端一次往返预加载全部 Lua 脚本，失败仅记录日志。"""
+        for key, cli in self._resources.items():
+            try:
+                await LuaManager.load_all(cli.redis)
+            except Exception as e:
+                logger.exception(f"{self.name} {key} load luas fail for {e}.")
 
     def _init_redlock(self, resources):
         aioredlock.redis.Instance = SmartutilsInstance
@@ -138,6 +181,121 @@ class RedisManager(
                 except Exception as e:
                     logger.exception(f"{self.name} redlock unlock fail for {e}.")
 
+    def locker(self, group: str = ConfKey.GROUP_DEFAULT, **kwargs) -> RedisLock:
+        """
+        创建单实例 Redis 锁，比 redlock 少多次往返，关闭管理器时自动停止看门狗。
+        用法:
+            locker = RedisManager().locker(keyed=True)
+            async with locker.lock(key, timeout=3) as held:
+                if held: ...
+        :param kwargs: 透传 RedisLock 参数，如 ttl/keyed/fencing
+        """
+        locker = RedisLock(self.client(group).redis, **kwargs)
+        self._lockers.append(locker)
+        return locker
+
+    def lock(
+        self,
+        name: str,
+        timeout: Optional[float] = 0,
+        group: str = ConfKey.GROUP_DEFAULT,
+    ) -> AsyncContextManager[Optional[LockHandle]]:
+        """
+        默认配置（ttl=10s，看门狗，fencing，keyed）的加锁上下文。
+        用法:
+            async with RedisManager().lock(key, timeout=3) as held:
+                if held: ...
+        """
+        if group not in self._default_lockers:
+            self._default_lockers[group] = self.locker(group, keyed=True)
+        return self._default_lockers[group].lock(name, timeout)
+
+    def reaper(
+        self, safe_q: AbstractSafeQueue, queue: str, pending: str, **kwargs
+    ) -> PendingReaper:
+        """
+        创建 pending 超时任务回队器，关闭管理器时自动停止。
+        用法:
+            reaper = RedisManager().reaper(cli.safe_q_list, queue, pending, visibility_timeout=60)
+            AppHook.on_startup(reaper.start)
+        :param kwargs: 透传 PendingReaper 参数
+        """
+        reaper = PendingReaper(safe_q, queue, pending, **kwargs)
+        self._reapers.append(reaper)
+        return reaper
+
+    def cached(
+        self,
+        key: KeyBuilder,
+        ttl: float,
+        stale_ttl: float = 0,
+        group: str = ConfKey.GROUP_DEFAULT,
+        **kwargs,
+    ) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+        """
+        单飞旁路缓存装饰器，已包含 use(group)，被装饰函数内可使用 curr。
+        用法:
+            @RedisManager().cached(key="user:{user_id}", ttl=60, stale_ttl=300)
+            async def get_user(user_id: int) -> dict:
+                ...
+            await get_user.invalidate(user_id)
+        :param key: 缓存key模板或函数，见 CacheAside
+        :param ttl: 新鲜期秒数
+        :param stale_ttl: 过期后仍返回旧值并后台刷新的秒数
+        :param kwargs: 透传 CacheAside 参数，如 jitter/lock_ttl
+        """
+
+        def decorator(
+            func: Callable[..., Awaitable[Any]],
+        ) -> Callable[..., Awaitable[Any]]:
+            aside = CacheAside(
+                lambda: self.curr.redis, func, key, ttl, stale_ttl, **kwargs
+            )
+            wrapper = self.use(group)(aside)
+            # functools.wraps 作用于 aside，这里补回业务函数信息
+            functools.update_wrapper(wrapper, func)
+            wrapper.invalidate = self.use(group)(aside.invalidate)  # type: ignore
+            return wrapper
+
+        return decorator
+
+    def sharded(self, groups: Optional[List[str]] = None, **kwargs) -> ShardedRedis:
+        """
+        用多个分组组成客户端分片，按一致性哈希路由 key。
+        用法:
+            sharded = RedisManager().sharded(["cache0", "cache1"])
+            await sharded.mget(keys)
+        :param groups: 参与分片的分组，默认全部分组
+        :param kwargs: 透传 ShardedRedis 参数，如 weights/vnodes
+        """
+        groups = groups or list(self._resources)
+        missing = [g for g in groups if g not in self._resources]
+        if missing:
+            raise LibraryUsageError(f"{self.name} sharded groups {missing} not found.")
+        return ShardedRedis({g: self._resources[g] for g in groups}, **kwargs)
+
+    @override
+    async def close(self):
+        for reaper in self._reapers:
+            try:
+                await reaper.stop()
+            except Exception as e:
+                logger.exception(f"{self.name} stop reaper fail for {e}.")
+        self._reapers = []
+        for locker in self._lockers:
+            try:
+                await locker.stop()
+            except Exception as e:
+                logger.exception(f"{self.name} stop locker fail for {e}.")
+        self._lockers = []
+        self._default_lockers = {}
+        if self._lua_loading and not self._lua_loading.done():
+            self._lua_loading.cancel()
+        self._lua_loading = None
+        for cli in self._resources.values():
+            LuaManager.forget(cli.redis)
+        await super().close()
+
 
 @InitByConfFactory.register(ConfKey.REDIS)
 def _(_, conf):
@@ -3,15 +3,38 @@ from __future__ import annotations
 import sys
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from smartutils.config.schema.redis import RedisConf
 from smartutils.design import proxy_wrapper
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.codec import RedisCodec
 from smartutils.infra.cache.common.decode import DecodeBytes
 from smartutils.infra.cache.ext.bitmap import RedisBitmap
+from smartutils.infra.cache.ext.bloom import RedisBloomFilter
+from smartutils.infra.cache.ext.cms import RedisCountMinSketch
+from smartutils.infra.cache.ext.hll import RedisHyperLogLog
+from smartutils.infra.cache.ext.keyspace import KeyInfo, RedisKeyspace
+from smartutils.infra.cache.ext.near import (
+    NearCache,
+    NearCacheInvalidation,
+    NearCachePolicy,
+)
+from smartutils.infra.cache.ext.queue.delay import SafeDelayQueue
 from smartutils.infra.cache.ext.queue.list import SafeQueueList
 from smartutils.infra.cache.ext.queue.stream import SafeQueueStream
 from smartutils.infra.cache.ext.queue.zset import SafeQueueZSet
+from smartutils.infra.cache.ext.ratelimit import RateLimitAlgo, RedisRateLimiter
 from smartutils.infra.cache.ext.string import SafeString
 from smartutils.infra.resource.abstract import AbstractAsyncResource
 from smartutils.init.mixin import LibraryCheckMixin
@@ -24,10 +47,14 @@ else:
 
 try:
     from redis.asyncio import ConnectionPool, Redis
+    from redis.asyncio.cluster import RedisCluster
 except ImportError:
     ...
 if TYPE_CHECKING:  # pragma: no cover
     from redis.asyncio import ConnectionPool, Redis
+    from redis.asyncio.cluster import RedisCluster
+
+T = TypeVar("T")
 
 # if Redis is None:
 
@@ -38,17 +65,30 @@ if TYPE_CHECKING:  # pragma: no cover
 
 
 class AsyncRedisCli(LibraryCheckMixin, AbstractAsyncResource):
-    """异步 Redis 客户端封装，线程安全、协程安全。"""
+    """
+    异步 Redis 客户端封装，线程安全、协程安全。
+    conf.cluster 为 True 时底层为 RedisCluster：
+    - 安全队列的 queue/pending 等 key 自动补哈希标签，保证 Lua 多 key 调用同槽；
+    - pipeline()/LuaManager.pipeline 按槽路由，各节点的批次并发发送；
+    - 不支持 near_cache（依赖单连接 pub/sub 与 CLIENT TRACKING）。
+    """
 
     def __init__(self, conf: RedisConf, name: str):
         self.check(conf=conf, libs=["redis"])
 
         self._key = name
 
+        self._conf = conf
         kw = conf.kw
         self._decode_bytes = DecodeBytes(conf.decode_responses)
-        self._pool: ConnectionPool = ConnectionPool.from_url(conf.url, **kw)
-        self._redis: Redis = Redis.from_pool(connection_pool=self._pool)
+        self.cluster = conf.cluster
+        self._pool: Optional[ConnectionPool] = None
+        if conf.cluster:
+            # 集群客户端按节点各自维护连接池，接口与 Redis 基本一致
+            self._redis: Redis = RedisCluster.from_url(conf.url, **kw)  # type: ignore
+        else:
+            self._pool = ConnectionPool.from_url(conf.url, **kw)
+            self._redis = Redis.from_pool(connection_pool=self._pool)
         # 尝试直接继承Redis，但反而会导致多处常用方法提示报错，如sadd
         # 从from_pool而来
         # super().__init__(connection_pool=self._pool, auto_close_connection_pool=True)
@@ -57,24 +97,53 @@ class AsyncRedisCli(LibraryCheckMixin, AbstractAsyncResource):
         # 后续还要考虑新加方法的兼容性
         self.bitmap: RedisBitmap = RedisBitmap(self._redis, self._decode_bytes)
         self.safe_str: SafeString = SafeString(self._redis, self._decode_bytes)
-        self.safe_q_list: SafeQueueList = SafeQueueList(self._redis, self._decode_bytes)
-        self.safe_q_zset: SafeQueueZSet = SafeQueueZSet(self._redis, self._decode_bytes)
+        self.safe_q_list: SafeQueueList = SafeQueueList(
+            self._redis, self._decode_bytes, hash_tag=conf.cluster
+        )
+        self.safe_q_zset: SafeQueueZSet = SafeQueueZSet(
+            self._redis, self._decode_bytes, hash_tag=conf.cluster
+        )
         self.safe_q_stream: SafeQueueStream = SafeQueueStream(
             self._redis, self._decode_bytes
         )
+        self.safe_q_delay: SafeDelayQueue = SafeDelayQueue(
+            self._redis, self._decode_bytes, hash_tag=conf.cluster
+        )
+        self.hll: RedisHyperLogLog = RedisHyperLogLog(self._redis)
+        self.keyspace: RedisKeyspace = RedisKeyspace(self._redis, conf.cluster)
+        self._near_caches: List[NearCache] = []
+        self.codec = RedisCodec()
+        # decode_responses 开启时，编解码使用独立的二进制客户端
+        self._bytes_redis: Optional[Redis] = (
+            None if conf.decode_responses else self._redis
+        )
+
+    @property
+    def redis(self) -> Redis:
+        """底层 redis 客户端（集群模式为 RedisCluster），供 Lua 预加载、锁等组件使用。"""
+        return self._redis
+
+    @property
+    def decode_bytes(self) -> DecodeBytes:
+        """本客户端的返回值解码器，供分片 pipeline 等按命令解码。"""
+        return self._decode_bytes
 
     def __getattr__(self, name):
         # 当访问 AsyncRedisCli 未定义的属性/方法时，由 _redis 处理
         attr = getattr(self._redis, name)
         if not callable(attr):
             return attr
-        return proxy_wrapper(
+        wrapper = proxy_wrapper(
             attr,
             # redis decode_responses开启时，
             # pre仍需要以兼容my_decode_responses，post自定义解码需禁用
             pre=self._decode_bytes.pre,
-            post=self._decode_bytes.post,
+            # 按命令返回值类型解码，避免通用递归
+            post=self._decode_bytes.post_for(name),
         )
+        # 缓存到实例，之后同名访问不再进入 __getattr__
+        self.__dict__[name] = wrapper
+        return wrapper
 
     async def evalsha(self, sha: str, keys=None, args=None):
         """
@@ -88,6 +157,155 @@ class AsyncRedisCli(LibraryCheckMixin, AbstractAsyncResource):
         # aioredlock使用aioredis，调用方式为 evalsha(sha, keys=[...], args=[...])
         return await self._redis.evalsha(sha, len(keys), *(keys + args))  # type: ignore
 
+    def pipeline(self, *args, **kwargs):
+        """
+        原生 pipeline，结果不经自定义解码。
+        集群模式下为 ClusterPipeline：命令按槽路由，各节点一批并发发送；
+        ClusterPipeline 可 await，需显式代理以免被 __getattr__ 包装为协程。
+        """
+        return self._redis.pipeline(*args, **kwargs)
+
+    def scan_keys(
+        self, match: Optional[str] = None, type_: Optional[str] = None, **kwargs
+    ) -> AsyncGenerator[KeyInfo, None]:
+        """
+        SCAN 遍历 key，每页的 TYPE/TTL/MEMORY USAGE 一次往返，逐个产出 KeyInfo。
+        按前缀聚合见 self.keyspace.report。
+        :param kwargs: 透传 RedisKeyspace.scan 参数
+        """
+        return self.keyspace.scan(match, type_, **kwargs)
+
+    @property
+    def bytes_redis(self) -> Redis:
+        """返回原始 bytes 的客户端，用于二进制值读写。"""
+        if self._bytes_redis is None:
+            kw = {**self._conf.kw, "decode_responses": False}
+            if self.cluster:
+                cluster = RedisCluster.from_url(self._conf.url, **kw)
+                self._bytes_redis = cluster  # type: ignore
+            else:
+                self._bytes_redis = Redis.from_url(self._conf.url, **kw)
+        return self._bytes_redis
+
+    async def get_obj(
+        self,
+        key: str,
+        type_: Optional[Type[T]] = None,
+        codec: Optional[RedisCodec] = None,
+    ) -> Optional[Union[T, Any]]:
+        """
+        读取 set_obj 写入的值，直接从 bytes 解码。
+        :param type_: pydantic 模型或 dataclass，传入时还原为该类型
+        :param codec: 编解码器，默认 self.codec；解码按头字节进行，与配置无关
+        :return: key 不存在时为 None
+        """
+        codec = codec or self.codec
+        return codec.decode(await self.bytes_redis.get(key), type_)
+
+    async def mget_obj(
+        self,
+        keys: Iterable[str],
+        type_: Optional[Type[T]] = None,
+        codec: Optional[RedisCodec] = None,
+    ) -> List[Optional[Union[T, Any]]]:
+        """批量读取，结果顺序与 keys 一致，不存在的 key 为 None。"""
+        keys = list(keys)
+        if not keys:
+            return []
+        codec = codec or self.codec
+        if self.cluster:
+            # 集群模式按槽拆分
+            vals = await self.bytes_redis.mget_nonatomic(keys)  # type: ignore
+        else:
+            vals = await self.bytes_redis.mget(keys)
+        return [codec.decode(v, type_) for v in vals]
+
+    async def set_obj(
+        self,
+        key: str,
+        obj: Any,
+        ex: Optional[int] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        codec: Optional[RedisCodec] = None,
+    ) -> Optional[bool]:
+        """
+        序列化（超过阈值时压缩）后写入。
+        :param obj: dict/list/基础类型、dataclass、pydantic 模型
+        :param codec: 编解码器，默认 self.codec
+        """
+        codec = codec or self.codec
+        return await self.bytes_redis.set(key, codec.encode(obj), ex=ex, px=px, nx=nx)
+
+    async def mset_obj(
+        self,
+        mapping: Mapping[str, Any],
+        ex: Optional[int] = None,
+        codec: Optional[RedisCodec] = None,
+    ) -> bool:
+        """批量写入，指定 ex 或集群模式时用一次 pipeline 逐个 SET。"""
+        if not mapping:
+            return True
+        codec = codec or self.codec
+        values = {k: codec.encode(v) for k, v in mapping.items()}
+        if ex is None and not self.cluster:
+            return await self.bytes_redis.mset(values)  # type: ignore
+        async with self.bytes_redis.pipeline(transaction=False) as pipe:
+            for k, v in values.items():
+                pipe.set(k, v, ex=ex)
+            return all(await pipe.execute())
+
+    def bloom_filter(
+        self, key: str, capacity: int, error_rate: float = 0.01, **kwargs
+    ) -> RedisBloomFilter:
+        """
+        创建布隆过滤器，同一 key 的 capacity/error_rate 必须一致。
+        :param kwargs: 透传 RedisBloomFilter 参数
+        """
+        return RedisBloomFilter(self._redis, key, capacity, error_rate, **kwargs)
+
+    def count_min_sketch(
+        self, key: str, width: int = 2000, depth: int = 5, topk: int = 0, **kwargs
+    ) -> RedisCountMinSketch:
+        """
+        创建 Count-Min sketch，同一 key 的 width/depth 必须一致。
+        :param kwargs: 透传 RedisCountMinSketch 参数
+        """
+        return RedisCountMinSketch(
+            self._redis, self._decode_bytes, key, width, depth, topk, **kwargs
+        )
+
+    def rate_limiter(
+        self,
+        limit: int,
+        window: float = 1,
+        algo: RateLimitAlgo = RateLimitAlgo.TOKEN_BUCKET,
+        **kwargs,
+    ) -> RedisRateLimiter:
+        """
+        创建分布式限流器。
+        :param kwargs: 透传 RedisRateLimiter 参数
+        """
+        return RedisRateLimiter(self._redis, limit, window, algo, **kwargs)
+
+    def near_cache(
+        self,
+        policies: List[NearCachePolicy],
+        invalidation: NearCacheInvalidation = NearCacheInvalidation.PUBSUB,
+        **kwargs,
+    ) -> NearCache:
+        """
+        创建进程内近端缓存，关闭客户端时自动停止失效监听。
+        :param kwargs: 透传 NearCache 参数
+        """
+        if self.cluster:
+            raise LibraryUsageError(f"{self.name} near_cache not support cluster.")
+        near = NearCache(
+            self._redis, self._decode_bytes, policies, invalidation, **kwargs
+        )
+        self._near_caches.append(near)
+        return near
+
     @override
     async def ping(self) -> bool:
         try:
@@ -99,8 +317,19 @@ class AsyncRedisCli(LibraryCheckMixin, AbstractAsyncResource):
 
     @override
     async def close(self):
+        for near in self._near_caches:
+            try:
+                await near.stop()
+            except Exception:
+                logger.exception("{} {} stop near cache fail", self.name, self._key)
+        self._near_caches = []
+        await self.safe_str.stop_buffered()
+        if self._bytes_redis is not None and self._bytes_redis is not self._redis:
+            await self._bytes_redis.aclose()
+        self._bytes_redis = None if self._conf.decode_responses else self._redis
         await self._redis.aclose()
-        await self._pool.disconnect()
+        if self._pool:
+            await self._pool.disconnect()
 
     @asynccontextmanager
     async def acquire(
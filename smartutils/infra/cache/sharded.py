@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+from smartutils.data.hashring import HashRing
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.slot import hash_tag as shard_key
+
+if TYPE_CHECKING:  # pragma: no cover
+    from smartutils.infra.cache.redis_cli import AsyncRedisCli
+
+__all__ = ["ShardedRedis", "ShardedPipeline", "shard_key"]
+
+
+class ShardedRedis(MyBase):
+    """
+    客户端分片：多个 Redis 分组按一致性哈希环路由 key，不依赖 Redis Cluster。
+    - 单 key 命令路由到所属分片；mget/mset/delete 按分片分组后并发执行。
+    - pipeline() 按分片拆分为多个 pipeline 并发执行，结果按调用顺序返回。
+    - add_node/remove_node 只迁移环上相邻区间的 key（约 1/N），不做数据搬迁，
+      作为缓存使用时迁移的 key 表现为未命中。
+
+    用法：
+    ```
+    sharded = RedisManager().sharded(["cache0", "cache1", "cache2"])
+    await sharded.mset({"a": 1, "b": 2})
+    vals = await sharded.mget(["a", "b"])
+    ```
+    """
+
+    def __init__(
+        self,
+        clients: Mapping[str, AsyncRedisCli],
+        weights: Optional[Mapping[str, int]] = None,
+        vnodes: int = 160,
+    ):
+        """
+        :param clients: 分片名 -> 客户端
+        :param weights: 分片名 -> 权重，默认均为 1
+        :param vnodes: 每单位权重的虚拟节点数
+        """
+        if not clients:
+            raise LibraryUsageError(f"{self.name} require at least one client.")
+        self._clients: Dict[str, AsyncRedisCli] = dict(clients)
+        self._weights: Dict[str, int] = {k: 1 for k in self._clients}
+        self._weights.update(weights or {})
+        self._vnodes = vnodes
+        self._ring = self._build_ring()
+
+    def _build_ring(self) -> HashRing:
+        nodes = {name: {"weight": self._weights[name]} for name in self._clients}
+        return HashRing(nodes, vnodes=self._vnodes)
+
+    @property
+    def nodes(self) -> List[str]:
+        return list(self._clients)
+
+    def node_for(self, key: str) -> str:
+        return self._ring.get_node(shard_key(key))
+
+    def client_for(self, key: str) -> AsyncRedisCli:
+        return self._clients[self.node_for(key)]
+
+    def group(self, keys: Iterable[str]) -> Dict[str, List[Tuple[int, str]]]:
+        """按分片分组：分片名 -> [(原位置, key)]"""
+        groups: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        for i, key in enumerate(keys):
+            groups[self.node_for(key)].append((i, key))
+        return groups
+
+    def add_node(self, name: str, client: AsyncRedisCli, weight: int = 1):
+        """加入分片，约 weight/总权重 比例的 key 改为路由到新分片。"""
+        if name in self._clients:
+            raise LibraryUsageError(f"{self.name} node {name} already exists.")
+        self._clients[name] = client
+        self._weights[name] = weight
+        self._ring = self._build_ring()
+
+    def remove_node(self, name: str) -> AsyncRedisCli:
+        """移除分片，只有该分片的 key 改为路由到其他分片。"""
+        if name not in self._clients:
+            raise LibraryUsageError(f"{self.name} node {name} not exists.")
+        if len(self._clients) == 1:
+            raise LibraryUsageError(f"{self.name} can not remove the last node.")
+        client = self._clients.pop(name)
+        self._weights.pop(name)
+        self._ring = self._build_ring()
+        return client
+
+    async def _fan_out(
+        self,
+        groups: Mapping[str, Any],
+        call: Callable[[AsyncRedisCli, Any], Awaitable],
+    ) -> Dict[str, Any]:
+        names = list(groups)
+        rets = await asyncio.gather(
+            *(call(self._clients[name], groups[name]) for name in names)
+        )
+        return dict(zip(names, rets))
+
+    async def get(self, key: str, **kwargs):
+        return await self.client_for(key).get(key, **kwargs)
+
+    async def set(self, key: str, value, **kwargs):
+        return await self.client_for(key).set(key, value, **kwargs)
+
+    async def mget(self, keys: Iterable[str], **kwargs) -> List:
+        """跨分片 MGET，结果顺序与 keys 一致。"""
+        keys = list(keys)
+        groups = self.group(keys)
+        rets = await self._fan_out(
+            groups, lambda cli, items: cli.mget([k for _, k in items], **kwargs)
+        )
+        result: List = [None] * len(keys)
+        for name, items in groups.items():
+            for (i, _), val in zip(items, rets[name]):
+                result[i] = val
+        return result
+
+    async def mset(self, mapping: Mapping[str, Any]) -> bool:
+        """跨分片 MSET，各分片内原子，分片之间不保证原子。"""
+        groups = self.group(mapping)
+        rets = await self._fan_out(
+            groups, lambda cli, items: cli.mset({k: mapping[k] for _, k in items})
+        )
+        return all(rets.values())
+
+    async def delete(self, *keys: str) -> int:
+        """跨分片 DEL，返回删除数之和。"""
+        if not keys:
+            return 0
+        groups = self.group(keys)
+        rets = await self._fan_out(
+            groups, lambda cli, items: cli.delete(*[k for _, k in items])
+        )
+        return sum(rets.values())
+
+    def pipeline(self) -> ShardedPipeline:
+        return ShardedPipeline(self)
+
+
+class ShardedPipeline(MyBase):
+    """
+    跨分片 pipeline，命令第一个参数须为 key。
+    用法：
+    ```
+    pipe = sharded.pipeline()
+    pipe.incr("a")
+    pipe.hgetall("b")
+    a, b = await pipe.execute()
+    ```
+    """
+
+    def __init__(self, sharded: ShardedRedis):
+        self._sharded = sharded
+        # 分片名 -> [(原位置, 命令, args, kwargs)]
+        self._commands: Dict[str, List[Tuple[int, str, tuple, dict]]] = defaultdict(
+            list
+        )
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, command: str):
+        if command.startswith("_"):
+            raise AttributeError(command)
+
+        def queue(key: str, *args, **kwargs) -> ShardedPipeline:
+            node = self._sharded.node_for(key)
+            self._commands[node].append((self._size, command, (key, *args), kwargs))
+            self._size += 1
+            return self
+
+        return queue
+
+    @staticmethod
+    async def _execute_node(
+        cli: AsyncRedisCli, commands: List[Tuple[int, str, tuple, dict]]
+    ) -> List:
+        decode = cli.decode_bytes
+        calls = []
+        async with cli.redis.pipeline(transaction=False) as pipe:
+            for _, command, args, kwargs in commands:
+                call_args, call_kwargs = decode.pre(args, kwargs)
+                getattr(pipe, command)(*call_args, **call_kwargs)
+                calls.append((decode.post_for(command), args, kwargs))
+            rets = await pipe.execute()
+        return [
+            post(ret, args, kwargs) if post else ret
+            for (post, args, kwargs), ret in zip(calls, rets)
+        ]
+
+    async def execute(self) -> List:
+        """各分片并发执行，结果按命令加入顺序返回。"""
+        commands, self._commands = self._commands, defaultdict(list)
+        size, self._size = self._size, 0
+        rets = await self._sharded._fan_out(commands, self._execute_node)
+        result: List = [None] * size
+        for name, items in commands.items():
+            for (i, *_), val in zip(items, rets[name]):
+                result[i] = val
+        return result
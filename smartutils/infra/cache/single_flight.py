@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import random
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Tuple, Union
+
+import orjson
+
+from smartutils.data.dict import to_json
+from smartutils.design import MyBase
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.log import logger
+from smartutils.time import get_now_stamp_ms
+
+if TYPE_CHECKING:  # pragma: no cover
+    from redis.asyncio import Redis
+
+__all__ = ["CacheAside"]
+
+KeyBuilder = Union[str, Callable[..., str]]
+
+# 后台刷新时锁被其他实例持有，未加载
+_SKIPPED = object()
+
+
+class CacheAside(MyBase):
+    """
+    单飞(single-flight)的旁路缓存。
+    - 缓存值为 {"v": 值, "t": 新鲜截止毫秒时间戳}，Redis 过期时间为 ttl + stale_ttl。
+    - 新鲜期内直接返回；过期但在 stale_ttl 内时返回旧值，后台刷新一次。
+    - 未命中时同进程并发调用共用一次加载；跨进程通过短期 Redis 锁只让一个实例加载，
+      其余实例轮询等待结果，等待超过 lock_ttl 后自行加载。
+    - ttl 按 jitter 比例随机抖动，避免同批 key 同时过期。
+    - Redis 读写失败时退化为直接加载，不影响业务。
+
+    通常经由 RedisManager().cached 使用。
+    """
+
+    def __init__(
+        self,
+        get_cli: Callable[[], Redis],
+        func: Callable[..., Awaitable[Any]],
+        key: KeyBuilder,
+        ttl: float,
+        stale_ttl: float = 0,
+        jitter: float = 0.1,
+        lock_ttl: float = 3,
+        lock_poll: float = 0.05,
+    ):
+        """
+        :param get_cli: 返回当前 Redis 客户端的函数
+        :param func: 加载函数，返回值需可被 orjson 序列化
+        :param key: 缓存key，字符串模板按参数名格式化，如 "user:{user_id}"；或接收同样参数的函数
+        :param ttl: 新鲜期秒数
+        :param stale_ttl: 过期后仍可返回旧值的秒数
+        :param jitter: ttl 随机抖动比例
+        :param lock_ttl: 跨进程加载锁秒数，应大于加载耗时
+        :param lock_poll: 未抢到锁时轮询缓存的间隔秒数
+        """
+        if ttl <= 0 or stale_ttl < 0 or lock_ttl <= 0 or lock_poll <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive ttl/lock_ttl/lock_poll, stale_ttl >= 0."
+            )
+        if not 0 <= jitter < 1:
+            raise LibraryUsageError(f"{self.name} require 0 <= jitter < 1.")
+        self._get_cli = get_cli
+        self._func = func
+        self._key = key
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._jitter = jitter
+        self._lock_ttl_ms = int(lock_ttl * 1000)
+        self._lock_poll = lock_poll
+        self._signature = inspect.signature(func)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def build_key(self, *args, **kwargs) -> str:
+        if callable(self._key):
+            return self._key(*args, **kwargs)
+        bound = self._signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return self._key.format(**bound.arguments)
+
+    async def _read(self, key: str) -> Tuple[bool, Any, int]:
+        """:return: (是否命中, 值, 新鲜截止毫秒时间戳)"""
+        try:
+            raw = await self._get_cli().get(key)
+        except Exception:
+            logger.exception("{} read {} fail.", self.name, key)
+            return False, None, 0
+        if raw is None:
+            return False, None, 0
+        try:
+            data = orjson.loads(raw)
+            return True, data["v"], int(data["t"])
+        except Exception:
+            logger.warning("{} drop malformed cache {}.", self.name, key)
+            return False, None, 0
+
+    async def _write(self, key: str, value: Any) -> None:
+        ttl_ms = int(
+            self._ttl * 1000 * random.uniform(1 - self._jitter, 1 + self._jitter)
+        )
+        payload = to_json({"v": value, "t": get_now_stamp_ms() + ttl_ms}, sort=False)
+        try:
+            await self._get_cli().set(
+                key, payload, px=ttl_ms + int(self._stale_ttl * 1000)
+            )
+        except Exception:
+            logger.exception("{} write {} fail.", self.name, key)
+
+    async def _try_lock(self, lock_key: str, token: str) -> bool:
+        try:
+            ret = await self._get_cli().set(
+                lock_key, token, nx=True, px=self._lock_ttl_ms
+            )
+            return bool(ret)
+        except Exception:
+            logger.exception("{} lock {} fail.", self.name, lock_key)
+            # Redis 不可用时直接加载
+            return True
+
+    async def _unlock(self, lock_key: str, token: str) -> None:
+        try:
+            await LuaManager.call(
+                LuaName.DEL_IF_EQ, self._get_cli(), keys=[lock_key], args=[token]
+            )
+        except Exception:
+            logger.exception("{} unlock {} fail.", self.name, lock_key)
+
+    async def _load(self, key: str, args, kwargs, wait: bool) -> Any:
+        lock_key = f"{key}:lock"
+        token = uuid.uuid4().hex
+        if not await self._try_lock(lock_key, token):
+            if not wait:
+                return _SKIPPED
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self._lock_ttl_ms / 1000
+            while loop.time() < deadline:
+                await asyncio.sleep(self._lock_poll)
+                hit, value, fresh_until = await self._read(key)
+                if hit and fresh_until > get_now_stamp_ms():
+                    return value
+            logger.warning("{} wait {} timeout, load directly.", self.name, key)
+            return await self._func(*args, **kwargs)
+        try:
+            value = await self._func(*args, **kwargs)
+            await self._write(key, value)
+            return value
+        finally:
+            await self._unlock(lock_key, token)
+
+    def _single_flight(self, key: str, args, kwargs, wait: bool) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, args, kwargs, wait))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    def _on_refresh_done(self, key: str, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc:
+            logger.opt(exception=exc).error("{} refresh {} fail.", self.name, key)
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        key = self.build_key(*args, **kwargs)
+        hit, value, fresh_until = await self._read(key)
+        if hit:
+            if fresh_until <= get_now_stamp_ms() and key not in self._inflight:
+                task = self._single_flight(key, args, kwargs, wait=False)
+                task.add_done_callback(functools.partial(self._on_refresh_done, key))
+            return value
+        # shield: 单个调用方被取消不影响其他等待者
+        task = self._single_flight(key, args, kwargs, wait=True)
+        value = await asyncio.shield(task)
+        if value is _SKIPPED:
+            # 复用了未抢到锁的后台刷新
+            value = await self._load(key, args, kwargs, wait=True)
+        return value
+
+    async def invalidate(self, *args, **kwargs) -> int:
+        """删除指定参数对应的缓存。"""
+        return await self._get_cli().delete(self.build_key(*args, **kwargs))  # type: ignore
@@ -2,15 +2,33 @@ from __future__ import annotations
 
 import asyncio
 import sys
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any, AsyncGenerator, Callable, Dict, List, Optional
+from dataclasses import dataclass, field
+from enum import Enum
+from time import monotonic, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import orjson
 
 from smartutils.config.schema.kafka import KafkaConf
 from smartutils.design import MyBase
 from smartutils.error.factory import ExcDetailFactory
-from smartutils.error.sys import MQError
+from smartutils.error.sys import LibraryUsageError, MQError
+from smartutils.infra.mq.deserializer import KafkaDeserializer
 from smartutils.infra.resource.abstract import AbstractAsyncResource
 from smartutils.init.mixin import LibraryCheckMixin
 from smartutils.log import logger
@@ -22,12 +40,111 @@ else:
 
 try:
     from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition, errors
+    from aiokafka.abc import ConsumerRebalanceListener
 except ImportError:
     ...
 if TYPE_CHECKING:  # pragma: no cover
     from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition, errors
+    from aiokafka.abc import ConsumerRebalanceListener
 
-__all__ = ["AsyncKafkaCli", "KafkaBatchConsumer"]
+__all__ = [
+    "AsyncKafkaCli",
+    "KafkaBatchConsumer",
+    "KafkaConsumeMode",
+    "KafkaRecord",
+    "KafkaRetryPolicy",
+    "KafkaSendResult",
+]
+
+Headers = Union[Mapping[str, Union[str, bytes]], Sequence[Tuple[str, bytes]]]
+
+
+def _to_bytes(value) -> Optional[bytes]:
+    if value is None or isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return orjson.dumps(value)
+
+
+@dataclass
+class KafkaRecord:
+    """
+    待发送的消息。
+    :param value: bytes/str 原样发送，其他按 JSON 序列化
+    :param key: 分区键，相同 key 进入同一分区
+    :param headers: {name: value} 或 [(name, value)]
+    :param partition: 指定分区，默认按 key 哈希或轮询
+    :param timestamp_ms: 消息时间戳，默认发送时间
+    """
+
+    value: Any
+    key: Optional[Union[str, bytes]] = None
+    headers: Optional[Headers] = None
+    partition: Optional[int] = None
+    timestamp_ms: Optional[int] = None
+
+    def kwargs(self) -> Dict[str, Any]:
+        headers = self.headers
+        if isinstance(headers, Mapping):
+            headers = list(headers.items())
+        return {
+            "value": _to_bytes(self.value),
+            "key": _to_bytes(self.key),
+            "headers": [(k, _to_bytes(v)) for k, v in headers] if headers else None,
+            "partition": self.partition,
+            "timestamp_ms": self.timestamp_ms,
+        }
+
+
+@dataclass
+class KafkaSendResult:
+    """
+    :param sent: 发送成功数
+    :param failed: 发送失败的消息：[(在入参中的位置, 异常)]
+    """
+
+    sent: int = 0
+    failed: List[Tuple[int, BaseException]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+
+# 重试相关 header，转存时覆盖同名旧值
+_RETRY_HEADER = "x-retry-"
+_H_ATTEMPT = "x-retry-attempt"
+_H_DUE = "x-retry-due-ms"
+_H_TOPIC = "x-retry-origin-topic"
+_H_PARTITION = "x-retry-origin-partition"
+_H_OFFSET = "x-retry-origin-offset"
+_H_ERROR = "x-retry-error"
+
+
+@dataclass
+class KafkaRetryPolicy:
+    """
+    失败消息的重试与死信策略。
+    - 第 i 次失败（i 从 0 计）转存到重试 topic {topic}.retry.{i}，backoffs[i] 秒后重新处理；
+      失败 len(backoffs) + 1 次后转存到死信 topic。
+    - 无法反序列化的消息直接进入死信 topic。
+    - 重试/死信 topic 需预先创建或开启 broker 自动创建。
+    - 重试层级消费者在消息到期前不拉取新消息，backoff 需小于 consumer 的 max_poll_interval_ms。
+    :param backoffs: 各重试层级的延迟秒数，为空时失败即进入死信
+    :param dlq_topic: 死信 topic，默认 {topic}.dlq
+    :param max_error_len: 写入 header 的错误信息最大长度
+    """
+
+    backoffs: Sequence[float] = (1, 10, 60)
+    dlq_topic: Optional[str] = None
+    max_error_len: int = 1000
+
+    def retry_topic(self, topic: str, tier: int) -> str:
+        return f"{topic}.retry.{tier}"
+
+    def dlq(self, topic: str) -> str:
+        return self.dlq_topic or f"{topic}.dlq"
 
 
 class AsyncKafkaCli(LibraryCheckMixin, AbstractAsyncResource):
@@ -88,52 +205,273 @@ class AsyncKafkaCli(LibraryCheckMixin, AbstractAsyncResource):
                 return
             await self._start_producer()
 
-    def consumer(self, topic: str, group_id: str, auto_offset_reset: str = "latest"):
-        return AIOKafkaConsumer(
-            topic,
+    def consumer(
+        self,
+        topic: str,
+        group_id: str,
+        auto_offset_reset: str = "latest",
+        listener: Optional[ConsumerRebalanceListener] = None,
+    ):
+        """
+        :param listener: 分区重平衡监听器，如在分区被分走前提交 offset
+        """
+        consumer = AIOKafkaConsumer(
             group_id=group_id,
             auto_offset_reset=auto_offset_reset,
             # 屏蔽校验：源码中bootstrap_servers (str, list(str))，代码检测误判
             bootstrap_servers=self._bootstrap_servers,  # pyright: ignore[reportArgumentType]
             enable_auto_commit=False,
         )
+        consumer.subscribe([topic], listener=listener)
+        return consumer
 
-    async def send_data(self, topic: str, data: List[Dict]):
+    async def send_data(
+        self,
+        topic: str,
+        data: Sequence[Union[Dict, KafkaRecord]],
+        raise_on_error: bool = True,
+    ) -> KafkaSendResult:
+        """
+        批量发送：全部消息先进入 producer 缓冲区，由其按分区合批发送，最后统一等待投递结果，
+        吞吐不再受单条消息往返限制；批次大小与等待时间见 max_batch_size/linger_ms。
+        单条失败不影响其他消息。
+        :param data: dict 按 JSON 序列化；需要 key/headers 时传 KafkaRecord
+        :param raise_on_error: 全部完成后，存在失败时抛出 MQError；
+            为 False 时只记日志，由调用方按返回结果中的 failed 逐条处理
+        """
         await self.start_producer()
         assert self._producer, "AsyncKafkaCli start producer failed."
-        for record in data:
-            await self._producer.send_and_wait(topic, orjson.dumps(record))
+        result = KafkaSendResult()
+        futures: List[Tuple[int, asyncio.Future]] = []
+        for i, record in enumerate(data):
+            if not isinstance(record, KafkaRecord):
+                record = KafkaRecord(record)
+            try:
+                # 缓冲区满时在此等待，形成背压
+                futures.append((i, await self._producer.send(topic, **record.kwargs())))
+            except Exception as e:
+                # 如消息过大、序列化失败
+                result.failed.append((i, e))
+        rets = await asyncio.gather(*(f for _, f in futures), return_exceptions=True)
+        for (i, _), ret in zip(futures, rets):
+            if isinstance(ret, BaseException):
+                result.failed.append((i, ret))
+            else:
+                result.sent += 1
+        if result.failed:
+            result.failed.sort(key=lambda item: item[0])
+            i, e = result.failed[0]
+            logger.error(
+                "{name} send {n}/{total} records to {topic} fail, first at {i}: {e}",
+                name=self.name,
+                n=len(result.failed),
+                total=len(data),
+                topic=topic,
+                i=i,
+                e=e,
+            )
+            if raise_on_error:
+                raise MQError(
+                    f"send {len(result.failed)}/{len(data)} records to {topic} fail."
+                )
+        return result
+
+
+class KafkaConsumeMode(str, Enum):
+    # 逐条 async for 拉取，经 asyncio.Queue 组批
+    QUEUE = "queue"
+    # getmany 批量拉取，直接组批，无逐条协程切换与计时器
+    GETMANY = "getmany"
+    # getmany 批量拉取，按分区（及分区内 key 哈希通道）并发处理
+    PARALLEL = "parallel"
+
+
+def _revoke_listener(
+    on_revoked: Callable[[Any], Awaitable[None]],
+) -> ConsumerRebalanceListener:
+    """
+    分区被分走前回调 on_revoked。
+    aiokafka 要求监听器继承 ConsumerRebalanceListener，在函数内定义以免未安装时无法导入本模块。
+    """
+
+    class _Listener(ConsumerRebalanceListener):
+        async def on_partitions_revoked(self, revoked):
+            await on_revoked(revoked)
+
+        async def on_partitions_assigned(self, assigned):
+            ...
+
+    return _Listener()
+
+
+class _PartitionOffsets:
+    """单分区已分发消息的完成情况，只推进到连续完成的最高 offset。"""
+
+    __slots__ = ("pending", "done", "committable", "committed")
+
+    def __init__(self):
+        # 已分发未确认的 offset，同一分区内递增
+        self.pending: deque = deque()
+        self.done: set = set()
+        # 可提交的 offset（最高连续完成 offset + 1）
+        self.committable = -1
+        self.committed = -1
+
+    def add(self, offset: int):
+        self.pending.append(offset)
+
+    def complete(self, offset: int):
+        self.done.add(offset)
+        pending, done = self.pending, self.done
+        while pending and pending[0] in done:
+            head = pending.popleft()
+            done.discard(head)
+            self.committable = head + 1
 
 
 class KafkaBatchConsumer(MyBase):
+    """
+    批量消费：攒够 batch_size 条、max_bytes 字节或等待超时后调用一次 process_func，
+    成功后按分区提交本批最大 offset + 1。
+    GETMANY 模式每次 getmany 取回一批消息，吞吐明显高于 QUEUE 模式，
+    对比见 performance/bench_kafka_consumer.py。
+
+    PARALLEL 模式：
+    - 消息按 (分区, hash(key) % lanes) 分到通道，每个通道顺序处理，同 key 消息保序；
+      不同通道并发处理，最多 concurrency 个 process_func 同时执行，慢分区不阻塞其他分区。
+    - 各分区只提交连续完成的最高 offset，较小 offset 未完成时较大 offset 不提交。
+    - 已拉取未完成的消息超过 max_inflight 时暂停拉取。
+    - 分区被分走前，丢弃其未开始处理的消息，等处理中的批次完成并提交后清理该分区状态；
+      未提交的消息由新的持有者重新消费（至少一次）。
+
+    单条失败：process_func 可返回失败消息的下标列表或 {下标: 原因}，抛出异常视为整批失败。
+    - 未配置 retry 时，返回的失败消息记日志后跳过；抛出异常时记日志，本批不单独提交，
+      后续批次提交时越过本批，仅在此之前重启才会重新消费；
+      PARALLEL 模式下本批直接记为已完成，该分区继续推进提交。
+    - 配置 retry 时，失败消息转存到重试/死信 topic 后即可提交，不阻塞后续消息；
+      转存失败时持续重试，停止时放弃转存且不提交，重启后重新消费。
+      start 同时运行各重试层级的消费者（GETMANY 模式，与本消费者同 group_id）。
+    """
+
     def __init__(
         self,
         kafka_cli: AsyncKafkaCli,
-        process_func: Callable[[List[str]], Any],
+        process_func: Callable[[List[Any]], Any],
         topic: str,
         group_id: str,
         batch_size: int = 10000,
         timeout: int = 1,
+        mode: KafkaConsumeMode = KafkaConsumeMode.QUEUE,
+        max_bytes: Optional[int] = None,
+        concurrency: int = 8,
+        lanes: int = 1,
+        max_inflight: Optional[int] = None,
+        deserializer: Optional[KafkaDeserializer] = None,
+        retry: Optional[KafkaRetryPolicy] = None,
     ):
+        """
+        :param timeout: QUEUE 模式为两条消息之间的最长等待秒数；
+            GETMANY 模式为收到本批第一条消息后的最长等待秒数；
+            PARALLEL 模式为无消息时单次 getmany 的等待秒数
+        :param mode: 拉取方式
+        :param max_bytes: 一批消息 value 的总字节数上限，QUEUE 模式不生效，默认不限
+        :param concurrency: PARALLEL 模式同时执行的 process_func 数
+        :param lanes: PARALLEL 模式每个分区内按 key 哈希划分的通道数，1 为按分区保序
+        :param max_inflight: PARALLEL 模式已拉取未完成的消息数上限，默认 batch_size * concurrency
+        :param deserializer: 每批消息 value 的反序列化方式，默认 utf-8 解码为 str
+        :param retry: 失败消息的重试与死信策略，默认不转存
+        """
+        if batch_size <= 0 or (max_bytes is not None and max_bytes <= 0):
+            raise LibraryUsageError(
+                f"{self.name} require positive batch_size/max_bytes."
+            )
+        if concurrency <= 0 or lanes <= 0 or (max_inflight or 1) <= 0:
+            raise LibraryUsageError(
+                f"{self.name} require positive concurrency/lanes/max_inflight."
+            )
         self.kafka_cli = kafka_cli
         self.topic = topic
         self.group_id = group_id
         self.batch_size = batch_size
         self.timeout = timeout
+        self.mode = KafkaConsumeMode(mode)
+        self.max_bytes = max_bytes
         self.process_func = process_func
+        self.deserializer = deserializer or KafkaDeserializer()
         self.queue = asyncio.Queue(self.batch_size)
         self._should_stop = asyncio.Event()
+        # GETMANY 模式超出本批上限的消息，留到下一批
+        self._pending: List = []
+        # PARALLEL 模式
+        self.concurrency = concurrency
+        self.lanes = lanes
+        self.max_inflight = max_inflight or batch_size * concurrency
+        self._sem = asyncio.Semaphore(concurrency)
+        self._lanes: Dict[Tuple[Any, int], deque] = {}
+        self._lane_tasks: Dict[Tuple[Any, int], asyncio.Task] = {}
+        self._offsets: Dict[Any, _PartitionOffsets] = {}
+        self._inflight = 0
+        self._room = asyncio.Event()
+        self._commit_lock = asyncio.Lock()
+        self.retry = retry
+        # 重试层级消费者；本实例为重试层级时，_delayed 为 True，消息到期后才处理
+        self._tiers: List[KafkaBatchConsumer] = []
+        self._delayed = False
+
+    def _tier_consumers(self) -> List[KafkaBatchConsumer]:
+        tiers = []
+        for i in range(len(self.retry.backoffs)):  # type: ignore
+            tier = KafkaBatchConsumer(
+                self.kafka_cli,
+                self.process_func,
+                self.retry.retry_topic(self.topic, i),  # type: ignore
+                self.group_id,
+                batch_size=self.batch_size,
+                timeout=self.timeout,
+                mode=KafkaConsumeMode.GETMANY,
+                max_bytes=self.max_bytes,
+                deserializer=self.deserializer,
+                retry=self.retry,
+            )
+            tier._delayed = True
+            tiers.append(tier)
+        return tiers
 
     async def start(self):
+        if self.retry and not self._delayed:
+            self._tiers = self._tier_consumers()
+            await asyncio.gather(self._start(), *(t.start() for t in self._tiers))
+            return
+        await self._start()
+
+    async def _start(self):
+        async def on_revoked(revoked):
+            await self._revoke(consumer, revoked)
+
+        listener = None
+        if self.mode == KafkaConsumeMode.PARALLEL:
+            listener = _revoke_listener(on_revoked)
         consumer: AIOKafkaConsumer = self.kafka_cli.consumer(
-            self.topic, self.group_id, auto_offset_reset="earliest"
+            self.topic, self.group_id, auto_offset_reset="earliest", listener=listener
         )
+        if self.mode != KafkaConsumeMode.QUEUE:
+            await consumer.start()
+            try:
+                if self.mode == KafkaConsumeMode.PARALLEL:
+                    await self._fetch_parallel(consumer)
+                else:
+                    await self._fetch_batches(consumer)
+            finally:
+                await consumer.stop()
+            return
         await asyncio.gather(
             self._consume_kafka(consumer), self._process_batch(consumer)
         )
 
     async def stop(self):
         self._should_stop.set()
+        for tier in self._tiers:
+            await tier.stop()
 
     async def _consume_kafka(self, consumer):
         await consumer.start()
@@ -143,6 +481,145 @@ class KafkaBatchConsumer(MyBase):
         finally:
             await consumer.stop()
 
+    @staticmethod
+    def _header(msg, name: str) -> Optional[bytes]:
+        for key, value in msg.headers or ():
+            if key == name:
+                return value
+        return None
+
+    async def _deserialize(self, batch: List) -> Tuple[List, List[int], Dict[int, str]]:
+        """:return: (反序列化结果, 对应 batch 下标, 无法反序列化的 {batch 下标: 原因})"""
+        try:
+            values = await self.deserializer([msg.value for msg in batch])
+            return values, list(range(len(batch))), {}
+        except Exception:
+            if self.retry is None:
+                raise
+        # 逐条定位无法反序列化的消息
+        values, positions, poison = [], [], {}
+        for i, msg in enumerate(batch):
+            try:
+                values.extend(await self.deserializer([msg.value]))
+                positions.append(i)
+            except Exception as e:
+                poison[i] = repr(e)
+        return values, positions, poison
+
+    async def _process(self, batch: List) -> bool:
+        """
+        处理一批消息，失败消息按 retry 转存。
+        :return: 本批是否可提交
+        """
+        values, positions, poison = await self._deserialize(batch)
+        failed: Dict[int, str] = {}
+        try:
+            ret = await self.process_func(values) if values else None
+        except Exception as e:
+            if self.retry is None:
+                raise
+            logger.exception(f"{self.name} {self.topic} process batch fail.")
+            failed = {i: repr(e) for i in positions}
+        else:
+            if isinstance(ret, Mapping):
+                failed = {positions[i]: str(reason) for i, reason in ret.items()}
+            elif isinstance(ret, (list, tuple, set)):
+                failed = {positions[i]: "process fail" for i in ret}
+        if not failed and not poison:
+            return True
+        if self.retry is None:
+            logger.warning(
+                "{name} {topic} skip {n} failed messages.",
+                name=self.name,
+                topic=self.topic,
+                n=len(failed),
+            )
+            return True
+        return await self._park(batch, failed, poison)
+
+    def _route(self, msg, reason: str, dead: bool) -> Tuple[str, KafkaRecord]:
+        """失败消息的目标 topic 与转存记录，保留原 key/value/headers。"""
+        policy: KafkaRetryPolicy = self.retry  # type: ignore
+        attempt = int(self._header(msg, _H_ATTEMPT) or 0)
+        origin = (self._header(msg, _H_TOPIC) or b"").decode() or msg.topic
+        headers = {
+            k: v for k, v in msg.headers or () if not k.startswith(_RETRY_HEADER)
+        }
+        headers[_H_ATTEMPT] = str(attempt + 1).encode()
+        headers[_H_TOPIC] = origin.encode()
+        # 记录首次失败时的位置，便于从死信追溯
+        headers[_H_PARTITION] = self._header(msg, _H_PARTITION) or str(
+            msg.partition
+        ).encode()
+        headers[_H_OFFSET] = self._header(msg, _H_OFFSET) or str(msg.offset).encode()
+        headers[_H_ERROR] = reason[: policy.max_error_len].encode()
+        if dead or attempt >= len(policy.backoffs):
+            topic = policy.dlq(origin)
+        else:
+            topic = policy.retry_topic(origin, attempt)
+            due = int((time() + policy.backoffs[attempt]) * 1000)
+            headers[_H_DUE] = str(due).encode()
+        return topic, KafkaRecord(msg.value, key=msg.key, headers=headers)
+
+    async def _park(
+        self, batch: List, failed: Dict[int, str], poison: Dict[int, str]
+    ) -> bool:
+        routes: Dict[str, List[KafkaRecord]] = defaultdict(list)
+        for i, reason in failed.items():
+            topic, record = self._route(batch[i], reason, dead=False)
+            routes[topic].append(record)
+        for i, reason in poison.items():
+            topic, record = self._route(batch[i], reason, dead=True)
+            routes[topic].append(record)
+        delay = 0.5
+        while True:
+            for topic, records in list(routes.items()):
+                try:
+                    ret = await self.kafka_cli.send_data(
+                        topic, records, raise_on_error=False
+                    )
+                except Exception:
+                    logger.exception(f"{self.name} park to {topic} fail.")
+                    continue
+                if ret.ok:
+                    del routes[topic]
+                else:
+                    routes[topic] = [records[i] for i, _ in ret.failed]
+            if not routes:
+                return True
+            if self._should_stop.is_set():
+                logger.error(f"{self.name} {self.topic} stop before park finished.")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+
+    async def _wait_due(self, batch: List) -> bool:
+        """重试层级等待本批消息全部到期；等待中停止时返回 False。"""
+        due = max(int(self._header(msg, _H_DUE) or 0) for msg in batch) / 1000
+        wait = due - time()
+        if wait <= 0:
+            return True
+        try:
+            await asyncio.wait_for(self._should_stop.wait(), wait)
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+    async def _handle(self, consumer, batch: List):
+        if self._delayed and not await self._wait_due(batch):
+            return
+        if not await self._process(batch):
+            return
+        if batch:
+            partition_offsets = {}
+            for msg in batch:
+                tp = TopicPartition(msg.topic, msg.partition)
+                current = partition_offsets.get(tp, -1)
+                if msg.offset > current:
+                    partition_offsets[tp] = msg.offset
+            commit_offsets = {tp: o + 1 for tp, o in partition_offsets.items()}
+            await consumer.commit(commit_offsets)
+
     async def _process_batch(self, consumer):
         while not self._should_stop.is_set():
             batch = []
@@ -158,17 +635,191 @@ class KafkaBatchConsumer(MyBase):
                     except asyncio.TimeoutError:
                         break
 
-                messages = [msg.value.decode("utf-8") for msg in batch]
-                await self.process_func(messages)
+                await self._handle(consumer, batch)
+
+            except Exception:
+                logger.exception(f"{self.name} batch consume fail.")
+
+    def _fill(self, batch: List, size: int, msgs: List) -> int:
+        """按条数与字节数上限把 msgs 加入 batch，放不下的留到下一批；返回 batch 字节数。"""
+        if self._pending:
+            # 本批已满，保持各分区内顺序
+            self._pending.extend(msgs)
+            return size
+        for i, msg in enumerate(msgs):
+            msg_size = len(msg.value) if msg.value else 0
+            full = len(batch) >= self.batch_size or (
+                self.max_bytes is not None
+                and batch
+                and size + msg_size > self.max_bytes
+            )
+            if full:
+                self._pending.extend(msgs[i:])
+                break
+            batch.append(msg)
+            size += msg_size
+        return size
+
+    def _batch_full(self, batch: List, size: int) -> bool:
+        return len(batch) >= self.batch_size or (
+            self.max_bytes is not None and size >= self.max_bytes
+        )
+
+    async def _fetch_batch(self, consumer) -> List:
+        batch: List = []
+        pending, self._pending = self._pending, []
+        size = self._fill(batch, 0, pending)
+        deadline = None
+        while not self._batch_full(batch, size) and not self._pending:
+            if batch and deadline is None:
+                deadline = monotonic() + self.timeout
+            wait = self.timeout if deadline is None else deadline - monotonic()
+            if wait <= 0 or self._should_stop.is_set():
+                break
+            records = await consumer.getmany(
+                timeout_ms=int(wait * 1000), max_records=self.batch_size - len(batch)
+            )
+            for msgs in records.values():
+                size = self._fill(batch, size, msgs)
+        return batch
+
+    async def _fetch_batches(self, consumer):
+        while not self._should_stop.is_set():
+            try:
+                batch = await self._fetch_batch(consumer)
                 if batch:
-                    partition_offsets = {}
-                    for msg in batch:
-                        tp = TopicPartition(msg.topic, msg.partition)
-                        current = partition_offsets.get(tp, -1)
-                        if msg.offset > current:
-                            partition_offsets[tp] = msg.offset
-                    commit_offsets = {tp: o + 1 for tp, o in partition_offsets.items()}
-                    await consumer.commit(commit_offsets)
-
-            except:  # noqa
+                    await self._handle(consumer, batch)
+            except Exception:
                 logger.exception(f"{self.name} batch consume fail.")
+
+    def _lane(self, tp, msg) -> Tuple[Any, int]:
+        if self.lanes == 1 or msg.key is None:
+            return tp, 0
+        return tp, hash(msg.key) % self.lanes
+
+    def _dispatch(self, consumer, msgs: List):
+        for msg in msgs:
+            tp = TopicPartition(msg.topic, msg.partition)
+            offsets = self._offsets.get(tp)
+            if offsets is None:
+                offsets = self._offsets[tp] = _PartitionOffsets()
+            offsets.add(msg.offset)
+            lane = self._lane(tp, msg)
+            queue = self._lanes.get(lane)
+            if queue is None:
+                queue = self._lanes[lane] = deque()
+            queue.append(msg)
+            if lane not in self._lane_tasks:
+                self._lane_tasks[lane] = asyncio.create_task(
+                    self._run_lane(consumer, lane, queue)
+                )
+        self._inflight += len(msgs)
+
+    def _take(self, queue: deque) -> List:
+        batch: List = []
+        size = 0
+        while queue and len(batch) < self.batch_size:
+            msg_size = len(queue[0].value) if queue[0].value else 0
+            over = self.max_bytes is not None and size + msg_size > self.max_bytes
+            if batch and over:
+                break
+            batch.append(queue.popleft())
+            size += msg_size
+        return batch
+
+    async def _run_lane(self, consumer, lane: Tuple[Any, int], queue: deque):
+        # 通道内顺序处理，队列取空后任务退出，再有消息时重新创建
+        try:
+            while queue:
+                batch = self._take(queue)
+                async with self._sem:
+                    try:
+                        done = await self._process(batch)
+                    except Exception:
+                        # 与其他模式一致，记日志后越过本批，否则该分区此后无法推进提交
+                        logger.exception(f"{self.name} lane {lane} consume fail.")
+                        done = True
+                # 停止时转存未完成不确认，重启后从本批重新消费；分区已被分走时不再跟踪
+                offsets = self._offsets.get(lane[0])
+                if done and offsets is not None:
+                    for msg in batch:
+                        offsets.complete(msg.offset)
+                self._inflight -= len(batch)
+                self._room.set()
+                await self._commit_ready(consumer)
+        finally:
+            self._lane_tasks.pop(lane, None)
+            if not queue:
+                self._lanes.pop(lane, None)
+
+    async def _commit_ready(self, consumer):
+        async with self._commit_lock:
+            # 只提交当前分配的分区，提交未分配的分区会整体失败
+            assigned = consumer.assignment()
+            commit_offsets = {
+                tp: o.committable
+                for tp, o in self._offsets.items()
+                if o.committable > o.committed and tp in assigned
+            }
+            if not commit_offsets:
+                return
+            try:
+                await consumer.commit(commit_offsets)
+            except Exception:
+                # 如正在重平衡，分区被分走前或下次提交时重试
+                logger.exception(f"{self.name} commit {commit_offsets} fail.")
+                return
+            for tp, offset in commit_offsets.items():
+                self._offsets[tp].committed = offset
+
+    async def _revoke(self, consumer, revoked):
+        """分区被分走前：丢弃未开始处理的消息，等处理中的批次完成后提交，再清理该分区状态。"""
+        revoked = set(revoked)
+        tasks = []
+        for lane, queue in self._lanes.items():
+            if lane[0] not in revoked:
+                continue
+            self._inflight -= len(queue)
+            queue.clear()
+            task = self._lane_tasks.get(lane)
+            if task is not None:
+                tasks.append(task)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self._commit_ready(consumer)
+        for tp in revoked:
+            self._offsets.pop(tp, None)
+        self._room.set()
+
+    async def _fetch_parallel(self, consumer):
+        try:
+            await self._fetch_parallel_loop(consumer)
+        except asyncio.CancelledError:
+            for task in self._lane_tasks.values():
+                task.cancel()
+            raise
+        # 停止拉取后处理完已拉取的消息
+        if self._lane_tasks:
+            tasks = list(self._lane_tasks.values())
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _fetch_parallel_loop(self, consumer):
+        while not self._should_stop.is_set():
+            room = self.max_inflight - self._inflight
+            if room <= 0:
+                self._room.clear()
+                try:
+                    await asyncio.wait_for(self._room.wait(), self.timeout)
+                except asyncio.TimeoutError:
+                    ...
+                continue
+            try:
+                records = await consumer.getmany(
+                    timeout_ms=int(self.timeout * 1000), max_records=room
+                )
+            except Exception:
+                logger.exception(f"{self.name} fetch fail.")
+                await asyncio.sleep(self.timeout)
+                continue
+            for msgs in records.values():
+                self._dispatch(consumer, msgs)
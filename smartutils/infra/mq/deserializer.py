@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import Executor
+from enum import Enum
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Sequence, Type
+
+import orjson
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from smartutils.error.sys import LibraryUsageError
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+if TYPE_CHECKING:  # pragma: no cover
+    import msgpack
+
+__all__ = ["KafkaValueFormat", "KafkaDeserializer"]
+
+
+class KafkaValueFormat(str, Enum):
+    # utf-8 解码为 str，兼容原有 process_func(List[str])
+    STR = "str"
+    # 原始 bytes，不复制
+    BYTES = "bytes"
+    # bytes 的 memoryview，切片不复制
+    MEMORYVIEW = "memoryview"
+    # orjson 解析为 dict/list
+    JSON = "json"
+    MSGPACK = "msgpack"
+    # JSON 校验为 pydantic 模型
+    MODEL = "model"
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])  # type: ignore
+
+
+def _validate_models(model: Type[BaseModel], values: Sequence[bytes]) -> List:
+    # 拼成一个 JSON 数组，一次 validate_json 完成整批解析与校验
+    try:
+        models = _list_adapter(model).validate_json(b"[" + b",".join(values) + b"]")
+    except (ValidationError, TypeError):
+        models = None
+    # 单条 value 为 {..},{..} 时拼接结果多于消息数，与消息下标不再对应；
+    # 合法拼接中每条 value 至少贡献一个元素，条数相等即一一对应
+    if models is None or len(models) != len(values):
+        # 逐条校验，异常指向具体消息
+        return [model.model_validate_json(v) for v in values]
+    return models
+
+
+def loads_many(
+    fmt: KafkaValueFormat,
+    values: Sequence[bytes],
+    model: Optional[Type[BaseModel]] = None,
+) -> List:
+    """
+    批量反序列化，模块级函数，可提交到进程池执行。
+    :param values: 消息 value 列表
+    """
+    if fmt == KafkaValueFormat.STR:
+        return [v.decode("utf-8") for v in values]
+    if fmt == KafkaValueFormat.BYTES:
+        return list(values)
+    if fmt == KafkaValueFormat.MEMORYVIEW:
+        return [memoryview(v) for v in values]
+    if fmt == KafkaValueFormat.JSON:
+        loads = orjson.loads
+        return [loads(v) for v in values]
+    if fmt == KafkaValueFormat.MSGPACK:
+        unpackb = msgpack.unpackb
+        return [unpackb(v, raw=False) for v in values]
+    return _validate_models(model, values)  # type: ignore
+
+
+class KafkaDeserializer:
+    """
+    Kafka 消息批量反序列化，KafkaBatchConsumer 每批调用一次。
+    - 指定 executor（如 ProcessPoolExecutor）且一批不少于 pool_threshold 条时，
+      按 workers 分片在池中解析，事件循环不被 JSON 解析阻塞；
+      结果需 pickle 回传，解析/校验越重（如 pydantic 模型）收益越大。
+    - BYTES/MEMORYVIEW 不解析，不使用 executor。
+
+    用法：
+    ```
+    deserializer = KafkaDeserializer(KafkaValueFormat.MODEL, model=Order)
+    consumer = KafkaBatchConsumer(cli, process_orders, "orders", "gid",
+                                  deserializer=deserializer)
+    ```
+    """
+
+    def __init__(
+        self,
+        fmt: KafkaValueFormat = KafkaValueFormat.STR,
+        model: Optional[Type[BaseModel]] = None,
+        executor: Optional[Executor] = None,
+        pool_threshold: int = 5000,
+        workers: Optional[int] = None,
+    ):
+        """
+        :param fmt: 反序列化格式
+        :param model: fmt 为 MODEL 时的 pydantic 模型，须可被 pickle（模块级定义）才能用进程池
+        :param executor: 解析大批次的执行器，由调用方管理生命周期
+        :param pool_threshold: 一批消息数不少于该值时使用 executor
+        :param workers: executor 的 worker 数，即每批的分片数，默认 CPU 核数
+        """
+        self.fmt = KafkaValueFormat(fmt)
+        if self.fmt == KafkaValueFormat.MODEL and model is None:
+            raise LibraryUsageError("KafkaDeserializer MODEL format require model.")
+        if self.fmt == KafkaValueFormat.MSGPACK and msgpack is None:
+            raise LibraryUsageError(
+                "KafkaDeserializer depend on msgpack, install first!"
+            )
+        if pool_threshold <= 0 or (workers is not None and workers <= 0):
+            raise LibraryUsageError(
+                "KafkaDeserializer require positive pool_threshold/workers."
+            )
+        self.model = model
+        self._executor = executor
+        self._pool_threshold = pool_threshold
+        self._workers: int = workers or os.cpu_count() or 1
+
+    def _use_executor(self, n: int) -> bool:
+        return (
+            self._executor is not None
+            and n >= self._pool_threshold
+            and self.fmt not in (KafkaValueFormat.BYTES, KafkaValueFormat.MEMORYVIEW)
+        )
+
+    async def __call__(self, values: List[bytes]) -> List:
+        if not self._use_executor(len(values)):
+            return loads_many(self.fmt, values, self.model)
+        loop = asyncio.get_running_loop()
+        size = -(-len(values) // self._workers)
+        chunks = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._executor,
+                    loads_many,
+                    self.fmt,
+                    values[i : i + size],
+                    self.model,
+                )
+                for i in range(0, len(values), size)
+            )
+        )
+        return [obj for chunk in chunks for obj in chunk]
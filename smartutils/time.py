@@ -13,6 +13,7 @@ __all__ = [
     "tomorrow",
     "get_now_stamp",
     "get_now_stamp_float",
+    "get_now_stamp_ms",
     "get_now_stamp_str",
     "get_stamp_after",
     "get_stamp_before",
@@ -74,6 +75,14 @@ def get_now_stamp_float() -> float:
     return time()
 
 
+def get_now_stamp_ms() -> int:
+    """
+    获取当前毫秒时间戳
+    :return:
+    """
+    return int(get_now_stamp_float() * 1000)
+
+
 def get_now_stamp_str() -> str:
     return str(get_now_stamp_float())
 
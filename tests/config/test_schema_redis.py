@@ -108,3 +108,15 @@ def test_redis_kw():
     assert params["socket_connect_timeout"] is None
     assert params["socket_timeout"] is None
     assert params["password"] == "secret"
+
+
+def test_redis_conf_cluster():
+    params = RedisConf(**valid_redis_conf(db=0, cluster=True)).kw
+    for k in {"host", "port", "cluster", "db", "retry_on_timeout"}:
+        assert k not in params
+    assert params["max_connections"] == 10
+    assert "cluster" not in RedisConf(**valid_redis_conf()).kw
+
+    with pytest.raises(ValidationError) as exc:
+        RedisConf(**valid_redis_conf(db=1, cluster=True))
+    assert "cluster模式db必须为0" in str(exc.value)
@@ -54,6 +54,27 @@ async def test_incr_decr(async_cli, mocker):
     assert await async_cli.safe_str.decr("cnt", ex=None) == 11
 
 
+async def test_buffered_counter_flush_fail_keeps_deltas(async_cli, mocker):
+    pipe = mocker.MagicMock()
+    pipe.__aenter__ = mocker.AsyncMock(return_value=pipe)
+    pipe.__aexit__ = mocker.AsyncMock(return_value=False)
+    pipe.execute = mocker.AsyncMock(side_effect=Exception("down"))
+    async_cli._redis.pipeline = mocker.MagicMock(return_value=pipe)
+
+    counter = async_cli.safe_str.buffered(interval=1, max_keys=100)
+    await counter.incr("cnt", 3, ex=5)
+    with pytest.raises(Exception):
+        await counter.flush()
+    await counter.incr("cnt", 2)
+    assert counter.pending("cnt") == 5
+
+    pipe.execute = mocker.AsyncMock(return_value=[5, True])
+    assert await counter.flush() == {"cnt": 5}
+    pipe.incrby.assert_called_with("cnt", 5)
+    pipe.expire.assert_called_with("cnt", 5)
+    assert counter.pending("cnt") == 0
+
+
 async def test_set_ops(async_cli):
     async_cli._redis.sadd.return_value = 1
     assert await async_cli.sadd("s", 1, 2) == 1
@@ -234,3 +255,56 @@ async def test_close_error(async_cli):
 #         await async_cli.safe_q_stream.ensure_stream_and_group("s", "g")
 #     except CacheError as ce:
 #         assert "detailxxx" in str(ce)
+
+
+async def test_getattr_wrapper_cached(async_cli):
+    get = async_cli.get
+    assert async_cli.get is get
+    assert "get" in async_cli.__dict__
+    # 非可调用属性不缓存
+    async_cli._redis.connection_pool = "pool"
+    assert async_cli.connection_pool == "pool"
+    assert "connection_pool" not in async_cli.__dict__
+
+
+async def test_command_decoders(async_cli):
+    async_cli._redis.hgetall.return_value = {b"f": b"v", b"n": 1}
+    assert await async_cli.hgetall("h") == {"f": "v", "n": 1}
+    async_cli._redis.zrange.return_value = [(b"m1", 1.0), (b"m2", 2.0)]
+    assert await async_cli.zrange("z", 0, -1, withscores=True) == [
+        ("m1", 1.0),
+        ("m2", 2.0),
+    ]
+    async_cli._redis.smembers.return_value = {b"a", b"b"}
+    assert await async_cli.smembers("s") == {"a", "b"}
+    async_cli._redis.lpop.return_value = [b"a", b"b"]
+    assert await async_cli.lpop("l", 2) == ["a", "b"]
+    async_cli._redis.mget.return_value = [b"a", None]
+    assert await async_cli.mget(["k1", "k2"]) == ["a", None]
+    assert await async_cli.mget(["k1", "k2"], my_decode_responses=False) == [
+        b"a",
+        None,
+    ]
+    # 按命令选择解码：sort groups 的二元组整体解码，不误判为 withscores
+    async_cli._redis.sort.return_value = [(b"a", b"1"), (b"b", None)]
+    assert await async_cli.sort("l", get=["#", "w_*"], groups=True) == [
+        ("a", "1"),
+        ("b", None),
+    ]
+    async_cli._redis.zpopmax.return_value = [(b"m", 3.0)]
+    assert await async_cli.zpopmax("z") == [("m", 3.0)]
+    async_cli._redis.zrangebylex.return_value = [b"a", b"b"]
+    assert await async_cli.zrangebylex("z", "-", "+") == ["a", "b"]
+    # 未登记的命令走通用递归解码
+    async_cli._redis.scan.return_value = (0, [b"k"])
+    assert await async_cli.scan(0) == (0, ["k"])
+
+
+def test_post_for_decode_responses():
+    from smartutils.infra.cache.common.decode import DecodeBytes
+
+    assert DecodeBytes(True).post_for("hgetall") is None
+    assert DecodeBytes(False).post_for("incr") is None
+    post = DecodeBytes(False).post_for("get")
+    assert post(b"v") == "v"
+    assert post(b"v", (), {"my_decode_responses": False}) == b"v"
@@ -0,0 +1,80 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+import orjson
+import pytest
+from pydantic import BaseModel
+
+import smartutils.infra.cache.common.codec as codec_mod
+from smartutils.data.dict import to_json
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.codec import CodecFormat, Compression, RedisCodec
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class User(BaseModel):
+    id: int
+    name: str
+    tags: list[str] = []
+    created: datetime
+
+
+@pytest.mark.parametrize("fmt", list(CodecFormat))
+@pytest.mark.parametrize("compression", list(Compression))
+def test_codec_roundtrip(fmt, compression):
+    codec = RedisCodec(fmt, compression, threshold=64)
+    user = User(id=1, name="a", tags=["x"] * 50, created=datetime(2024, 1, 1))
+    data = codec.encode(user)
+    assert data[0] < 0x20
+    assert RedisCodec.decode(data, User) == user
+    assert codec.decode(codec.encode(Point(1, 2)), Point) == Point(1, 2)
+    assert codec.decode(codec.encode({"a": [1, 2]})) == {"a": [1, 2]}
+    assert codec.decode(codec.encode(3), int) == 3
+    assert codec.decode(None, User) is None
+
+
+def test_codec_compress_threshold():
+    codec = RedisCodec(threshold=100)
+    small = codec.encode({"a": 1})
+    assert small[1:] == to_json({"a": 1}, sort=False)
+    blob = [{"id": i, "name": "user", "desc": "same text " * 5} for i in range(200)]
+    raw = to_json(blob, sort=False)
+    data = codec.encode(blob)
+    assert len(data) * 3 < len(raw)
+    assert codec.decode(data) == blob
+    # 压缩无收益时保留原文
+    assert RedisCodec(threshold=0).encode(uuid.uuid4().hex)[0] == codec_mod._header(
+        CodecFormat.JSON, Compression.NONE
+    )
+
+
+def test_codec_legacy_json_and_str():
+    assert RedisCodec.decode(to_json({"a": 1})) == {"a": 1}
+    assert RedisCodec.decode('{"x": 1, "y": 2}', Point) == Point(1, 2)
+    assert RedisCodec.decode(b"123") == 123
+    # 前导空白的旧 JSON 首字节小于 0x20，不在头字节表中
+    assert RedisCodec.decode(b'\n {"a": 1}') == {"a": 1}
+
+
+def test_codec_unknown_header():
+    # 未知头字节按旧 JSON 解析，不回绕到其他格式，也不抛 IndexError
+    for header in (0, 0x1F):
+        with pytest.raises(orjson.JSONDecodeError):
+            RedisCodec.decode(bytes((header,)) + b"payload")
+
+
+def test_codec_missing_library(mocker):
+    mocker.patch.object(codec_mod, "msgpack", None)
+    mocker.patch.object(codec_mod, "lz4_frame", None)
+    with pytest.raises(LibraryUsageError):
+        RedisCodec(CodecFormat.MSGPACK)
+    with pytest.raises(LibraryUsageError):
+        RedisCodec(compression=Compression.LZ4)
+    with pytest.raises(LibraryUsageError):
+        RedisCodec(threshold=-1)
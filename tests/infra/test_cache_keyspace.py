@@ -0,0 +1,36 @@
+import pytest
+
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.ext.keyspace import KeyInfo, KeyspaceReport
+
+
+def test_keyspace_report_prefix():
+    report = KeyspaceReport(depth=2, top=2)
+    assert report.prefix_of("user:1:profile") == "user:1"
+    assert report.prefix_of("user:1") == ""
+    assert report.prefix_of("plain") == ""
+    assert KeyspaceReport(depth=1).prefix_of("user:1:profile") == "user"
+
+    infos = [
+        KeyInfo("a:x:1", "string", -1, 100),
+        KeyInfo("a:x:2", "hash", 10, 300),
+        KeyInfo("b:y:1", "string", -1, 50),
+        KeyInfo("b:y:2", "string", -1, None),
+        KeyInfo("plain", "set", 5, 1000),
+    ]
+    for info in infos:
+        report.add(info)
+    ax, by = report.prefixes["a:x"], report.prefixes["b:y"]
+    assert (ax.keys, ax.memory, ax.no_ttl) == (2, 400, 1)
+    assert ax.types == {"string": 1, "hash": 1}
+    assert (ax.biggest_key, ax.biggest_memory) == ("a:x:2", 300)
+    assert (by.keys, by.memory, by.no_ttl) == (2, 50, 2)
+    assert [s.prefix for s in report.sorted()] == ["", "a:x", "b:y"]
+    assert [s.prefix for s in report.sorted("no_ttl")][0] == "b:y"
+    assert report.total.keys == 5 and report.total.memory == 1450
+    assert report.biggest == [("plain", 1000), ("a:x:2", 300)]
+
+    with pytest.raises(LibraryUsageError):
+        report.sorted("type")
+    with pytest.raises(LibraryUsageError):
+        KeyspaceReport(depth=0)
@@ -0,0 +1,55 @@
+import pytest
+
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.common.slot import tag_key
+from smartutils.infra.cache.sharded import ShardedRedis, shard_key
+
+
+def test_shard_key_hash_tag():
+    assert shard_key("user:{42}:profile") == "42"
+    assert shard_key("user:{}:profile") == "user:{}:profile"
+    assert shard_key("user:{42") == "user:{42"
+    assert shard_key("plain") == "plain"
+
+
+@pytest.mark.parametrize(
+    "key,tagged",
+    [
+        ("orders:queue", "{orders}:queue"),
+        ("orders", "{orders}"),
+        ("{a}:x", "{a}:x"),
+        ("x:{}:y", "{x}:{}:y"),
+    ],
+)
+def test_tag_key(key, tagged):
+    assert tag_key(key) == tagged
+    assert tag_key(tagged) == tagged
+
+
+def test_sharded_routing_and_node_change():
+    clients = {f"n{i}": object() for i in range(3)}
+    sharded = ShardedRedis(clients)
+    keys = [f"k:{i}" for i in range(6000)]
+    before = {k: sharded.node_for(k) for k in keys}
+    counts = {n: list(before.values()).count(n) for n in clients}
+    assert all(1500 < c < 2500 for c in counts.values())
+    assert sharded.node_for("a:{tag}:1") == sharded.node_for("b:{tag}:2")
+
+    sharded.add_node("n3", object())
+    after = {k: sharded.node_for(k) for k in keys}
+    moved = [k for k in keys if before[k] != after[k]]
+    # 只有迁往新节点的 key 发生变化，约 1/4
+    assert all(after[k] == "n3" for k in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+    sharded.remove_node("n3")
+    assert {k: sharded.node_for(k) for k in keys} == before
+
+    with pytest.raises(LibraryUsageError):
+        sharded.add_node("n0", object())
+    with pytest.raises(LibraryUsageError):
+        sharded.remove_node("missing")
+    with pytest.raises(LibraryUsageError):
+        ShardedRedis({})
+    with pytest.raises(LibraryUsageError):
+        ShardedRedis({"n0": object()}).remove_node("n0")
@@ -1,4 +1,5 @@
 import asyncio
+import time
 
 import pytest
 
@@ -167,3 +168,502 @@ async def test_consume_kafka_queue_put(mocker):
     assert batcher.queue.qsize() == 1
     msg = await batcher.queue.get()
     assert msg.value == b"data"
+
+
+class _Msg:
+    def __init__(self, partition, offset, value=b"x"):
+        self.topic = "t"
+        self.partition = partition
+        self.offset = offset
+        self.value = value
+
+
+def _getmany_consumer(mocker, fetches):
+    """fetches: 每次 getmany 的返回，用完后返回空"""
+    fake_consumer = mocker.Mock()
+    fake_consumer.start = mocker.AsyncMock()
+    fake_consumer.stop = mocker.AsyncMock()
+    fake_consumer.commit = mocker.AsyncMock()
+    fake_consumer.assignment.return_value = {
+        mq_cli.TopicPartition("t", p) for records in fetches for p in records
+    }
+    fetches = iter(fetches)
+
+    async def getmany(timeout_ms=0, max_records=None):
+        try:
+            return next(fetches)
+        except StopIteration:
+            await asyncio.sleep(timeout_ms / 1000)
+            return {}
+
+    fake_consumer.getmany = mocker.AsyncMock(side_effect=getmany)
+    return fake_consumer
+
+
+async def test_batch_consumer_getmany_count_and_bytes(mocker):
+    p0 = [_Msg(0, i, b"a" * 10) for i in range(5)]
+    p1 = [_Msg(1, i, b"b" * 10) for i in range(2)]
+    fake_consumer = _getmany_consumer(mocker, [{0: p0, 1: p1}])
+    fake_kafka_cli = mocker.Mock(spec=AsyncKafkaCli)
+    fake_kafka_cli.consumer.return_value = fake_consumer
+    batches = []
+
+    async def process_func(messages):
+        batches.append(messages)
+        if len(batches) == 3:
+            await consumer.stop()
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=fake_kafka_cli,
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=4,
+        timeout=0.05,
+        mode=mq_cli.KafkaConsumeMode.GETMANY,
+        max_bytes=25,
+    )
+    await asyncio.wait_for(consumer.start(), 2)
+
+    # 字节上限 25：每批最多 2 条 10 字节的消息，超出部分留到下一批
+    assert [len(b) for b in batches] == [2, 2, 2]
+    assert batches[0] == ["a" * 10] * 2
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert commits[0] == {mq_cli.TopicPartition("t", 0): 2}
+    assert commits[2] == {
+        mq_cli.TopicPartition("t", 0): 5,
+        mq_cli.TopicPartition("t", 1): 1,
+    }
+    fake_consumer.stop.assert_awaited()
+
+
+async def test_batch_consumer_getmany_timeout(mocker):
+    fake_consumer = _getmany_consumer(
+        mocker, [{0: [_Msg(0, 1)]}, {}, {0: [_Msg(0, 2)]}]
+    )
+    consumer = KafkaBatchConsumer(
+        kafka_cli=mocker.Mock(),
+        process_func=mocker.AsyncMock(),
+        topic="t",
+        group_id="gid",
+        batch_size=100,
+        timeout=0.05,
+        mode="getmany",
+    )
+    batch = await consumer._fetch_batch(fake_consumer)
+    # 首条消息后等待 timeout 即提交本批，不等满 batch_size
+    assert [m.offset for m in batch] == [1, 2]
+    kwargs = fake_consumer.getmany.await_args_list[0].kwargs
+    assert kwargs["max_records"] == 100
+
+
+def test_batch_consumer_invalid_args(mocker):
+    from smartutils.error.sys import LibraryUsageError
+
+    with pytest.raises(LibraryUsageError):
+        KafkaBatchConsumer(mocker.Mock(), mocker.AsyncMock(), "t", "g", batch_size=0)
+    with pytest.raises(LibraryUsageError):
+        KafkaBatchConsumer(mocker.Mock(), mocker.AsyncMock(), "t", "g", max_bytes=0)
+
+
+def _keyed(partition, offset, key):
+    msg = _Msg(partition, offset, f"{partition}-{offset}".encode())
+    msg.key = key
+    return msg
+
+
+async def test_batch_consumer_parallel_slow_partition(mocker):
+    p0 = [_keyed(0, i, None) for i in range(3)]
+    p1 = [_keyed(1, i, None) for i in range(3)]
+    fake_consumer = _getmany_consumer(mocker, [{0: p0, 1: p1}])
+    fake_kafka_cli = mocker.Mock(spec=AsyncKafkaCli)
+    fake_kafka_cli.consumer.return_value = fake_consumer
+    release_p0 = asyncio.Event()
+    seen = []
+
+    async def process_func(messages):
+        if messages[0].startswith("0-"):
+            await release_p0.wait()
+        seen.append(messages)
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=fake_kafka_cli,
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=2,
+        timeout=0.02,
+        mode=mq_cli.KafkaConsumeMode.PARALLEL,
+        concurrency=4,
+    )
+    task = asyncio.create_task(consumer.start())
+    await asyncio.sleep(0.05)
+    # 分区 0 阻塞时分区 1 已处理完并提交
+    assert seen == [["1-0", "1-1"], ["1-2"]]
+    tp0, tp1 = mq_cli.TopicPartition("t", 0), mq_cli.TopicPartition("t", 1)
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert commits[-1] == {tp1: 3}
+
+    release_p0.set()
+    await consumer.stop()
+    await asyncio.wait_for(task, 1)
+    # 同分区按 offset 顺序处理
+    assert seen[2:] == [["0-0", "0-1"], ["0-2"]]
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert commits[-1] == {tp0: 3}
+    assert not consumer._lanes and not consumer._lane_tasks
+
+
+async def test_batch_consumer_parallel_key_lanes_contiguous_commit(mocker):
+    # 分区内 key a: offset 0/2，key b: offset 1，b 处理慢
+    msgs = [_keyed(0, 0, b"a"), _keyed(0, 1, b"b"), _keyed(0, 2, b"a")]
+    fake_consumer = _getmany_consumer(mocker, [{0: msgs}])
+    release_b = asyncio.Event()
+    seen = []
+
+    async def process_func(messages):
+        if messages == ["0-1"]:
+            await release_b.wait()
+        seen.extend(messages)
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=mocker.Mock(),
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=1,
+        timeout=0.02,
+        mode="parallel",
+        lanes=16,
+    )
+    mocker.patch.object(
+        consumer, "_lane", side_effect=lambda tp, msg: (tp, msg.key == b"b")
+    )
+    task = asyncio.create_task(consumer._fetch_parallel(fake_consumer))
+    await asyncio.sleep(0.05)
+    tp0 = mq_cli.TopicPartition("t", 0)
+    assert seen == ["0-0", "0-2"]
+    # offset 1 未完成，只能提交到 1
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert commits == [{tp0: 1}]
+
+    release_b.set()
+    await asyncio.sleep(0.02)
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert commits[-1] == {tp0: 3}
+    consumer._should_stop.set()
+    await asyncio.wait_for(task, 1)
+
+
+async def test_batch_consumer_parallel_fail_skipped(mocker):
+    p0 = [_keyed(0, i, None) for i in range(4)]
+    p1 = [_keyed(1, i, None) for i in range(2)]
+    fake_consumer = _getmany_consumer(mocker, [{0: p0, 1: p1}])
+
+    async def process_func(messages):
+        if messages == ["0-2", "0-3"]:
+            raise ValueError("boom")
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=mocker.Mock(),
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=2,
+        timeout=0.02,
+        mode="parallel",
+    )
+    task = asyncio.create_task(consumer._fetch_parallel(fake_consumer))
+    await asyncio.sleep(0.05)
+    consumer._should_stop.set()
+    await asyncio.wait_for(task, 1)
+    tp0, tp1 = mq_cli.TopicPartition("t", 0), mq_cli.TopicPartition("t", 1)
+    commits = {}
+    for c in fake_consumer.commit.await_args_list:
+        commits.update(c.args[0])
+    # 与其他模式一致，失败批次记日志后越过，分区继续推进提交
+    assert commits == {tp0: 4, tp1: 2}
+    assert consumer._inflight == 0
+    assert not consumer._offsets[tp0].pending and not consumer._offsets[tp0].done
+
+
+async def test_batch_consumer_parallel_revoke(mocker):
+    p0 = [_keyed(0, i, None) for i in range(4)]
+    p1 = [_keyed(1, i, None) for i in range(4)]
+    fake_consumer = _getmany_consumer(mocker, [{0: p0, 1: p1}])
+    gate = asyncio.Event()
+    seen = []
+
+    async def process_func(messages):
+        await gate.wait()
+        seen.extend(messages)
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=mocker.Mock(),
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=2,
+        timeout=0.01,
+        mode="parallel",
+    )
+    task = asyncio.create_task(consumer._fetch_parallel(fake_consumer))
+    await asyncio.sleep(0.03)
+    tp0, tp1 = mq_cli.TopicPartition("t", 0), mq_cli.TopicPartition("t", 1)
+    revoke = asyncio.create_task(consumer._revoke(fake_consumer, {tp0}))
+    await asyncio.sleep(0.01)
+    # 等分区 0 处理中的批次完成后才让出
+    assert not revoke.done()
+    gate.set()
+    await asyncio.wait_for(revoke, 1)
+    # 分区 0 未开始处理的消息被丢弃，已完成的批次在让出前提交
+    assert "0-2" not in seen
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert {tp0: 2} in commits
+    assert tp0 not in consumer._offsets
+    assert not any(lane[0] == tp0 for lane in consumer._lanes)
+
+    # 只提交当前分配的分区
+    fake_consumer.assignment.return_value = {tp1}
+    consumer._offsets[tp0] = mq_cli._PartitionOffsets()
+    consumer._offsets[tp0].committable = 9
+    await asyncio.sleep(0.03)
+    consumer._should_stop.set()
+    await asyncio.wait_for(task, 1)
+    commits = [c.args[0] for c in fake_consumer.commit.await_args_list]
+    assert all(tp0 not in c for c in commits[1:])
+    assert commits[-1] == {tp1: 4}
+    assert consumer._inflight == 0
+
+
+async def test_batch_consumer_parallel_rebalance_listener(mocker):
+    from aiokafka.abc import ConsumerRebalanceListener
+
+    fake_consumer = _getmany_consumer(mocker, [])
+    fake_kafka_cli = mocker.Mock(spec=AsyncKafkaCli)
+    fake_kafka_cli.consumer.return_value = fake_consumer
+    consumer = KafkaBatchConsumer(
+        kafka_cli=fake_kafka_cli,
+        process_func=mocker.AsyncMock(),
+        topic="t",
+        group_id="gid",
+        timeout=0.01,
+        mode="parallel",
+    )
+    revoke = mocker.patch.object(consumer, "_revoke", mocker.AsyncMock())
+    task = asyncio.create_task(consumer.start())
+    await asyncio.sleep(0.02)
+    listener = fake_kafka_cli.consumer.call_args.kwargs["listener"]
+    assert isinstance(listener, ConsumerRebalanceListener)
+    tp0 = mq_cli.TopicPartition("t", 0)
+    await listener.on_partitions_revoked({tp0})
+    revoke.assert_awaited_once_with(fake_consumer, {tp0})
+    await consumer.stop()
+    await asyncio.wait_for(task, 1)
+
+
+async def test_batch_consumer_parallel_backpressure(mocker):
+    msgs = [_keyed(0, i, None) for i in range(10)]
+    fake_consumer = _getmany_consumer(mocker, [{0: msgs[:4]}, {0: msgs[4:]}])
+    gate = asyncio.Event()
+
+    async def process_func(messages):
+        await gate.wait()
+
+    consumer = KafkaBatchConsumer(
+        kafka_cli=mocker.Mock(),
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        batch_size=2,
+        timeout=0.01,
+        mode="parallel",
+        max_inflight=4,
+    )
+    task = asyncio.create_task(consumer._fetch_parallel(fake_consumer))
+    await asyncio.sleep(0.05)
+    # 在途消息达到上限，不再拉取
+    assert consumer._inflight == 4
+    assert fake_consumer.getmany.await_count == 1
+    gate.set()
+    await asyncio.sleep(0.05)
+    assert fake_consumer.getmany.await_args_list[1].kwargs["max_records"] > 0
+    consumer._should_stop.set()
+    await asyncio.wait_for(task, 1)
+    assert consumer._inflight == 0
+
+
+async def test_batch_consumer_deserializer(mocker):
+    from smartutils.infra.mq.deserializer import KafkaDeserializer, KafkaValueFormat
+
+    fetches = [{0: [_Msg(0, 0, b'{"a": 1}'), _Msg(0, 1, b'{"a": 2}')]}]
+    for mode in ("getmany", "parallel"):
+        fake_consumer = _getmany_consumer(mocker, list(fetches))
+        process_func = mocker.AsyncMock()
+        consumer = KafkaBatchConsumer(
+            kafka_cli=mocker.Mock(),
+            process_func=process_func,
+            topic="t",
+            group_id="gid",
+            batch_size=10,
+            timeout=0.01,
+            mode=mode,
+            deserializer=KafkaDeserializer(KafkaValueFormat.JSON),
+        )
+        if mode == "getmany":
+            await consumer._handle(
+                fake_consumer, await consumer._fetch_batch(fake_consumer)
+            )
+        else:
+            task = asyncio.create_task(consumer._fetch_parallel(fake_consumer))
+            await asyncio.sleep(0.03)
+            consumer._should_stop.set()
+            await asyncio.wait_for(task, 1)
+        process_func.assert_awaited_once_with([{"a": 1}, {"a": 2}])
+
+
+def _retry_msg(offset, value=b'{"a": 1}', headers=(), topic="t"):
+    msg = _Msg(0, offset, value)
+    msg.topic = topic
+    msg.key = b"k"
+    msg.headers = list(headers)
+    return msg
+
+
+def _retry_consumer(mocker, process_func, send_results=None, **kwargs):
+    from smartutils.infra.mq.cli import KafkaRetryPolicy, KafkaSendResult
+    from smartutils.infra.mq.deserializer import KafkaDeserializer, KafkaValueFormat
+
+    fake_kafka_cli = mocker.Mock(spec=AsyncKafkaCli)
+    def sent_all(topic, records, raise_on_error=True):
+        return KafkaSendResult(len(records))
+
+    fake_kafka_cli.send_data = mocker.AsyncMock(side_effect=send_results or sent_all)
+    consumer = KafkaBatchConsumer(
+        kafka_cli=fake_kafka_cli,
+        process_func=process_func,
+        topic="t",
+        group_id="gid",
+        timeout=0.01,
+        mode="getmany",
+        deserializer=KafkaDeserializer(KafkaValueFormat.JSON),
+        retry=KafkaRetryPolicy(backoffs=(1, 5)),
+        **kwargs,
+    )
+    return consumer, fake_kafka_cli
+
+
+def _sent(fake_kafka_cli):
+    return {
+        c.args[0]: c.args[1] for c in fake_kafka_cli.send_data.await_args_list
+    }
+
+
+async def test_batch_consumer_retry_failed_and_poison(mocker):
+    fake_consumer = mocker.Mock()
+    fake_consumer.commit = mocker.AsyncMock()
+    process_func = mocker.AsyncMock(return_value={1: "db timeout"})
+    consumer, fake_kafka_cli = _retry_consumer(mocker, process_func)
+    batch = [
+        _retry_msg(0),
+        _retry_msg(1, b"not json"),
+        _retry_msg(2, b'{"a": 2}', headers=[("trace", b"x")]),
+    ]
+    await consumer._handle(fake_consumer, batch)
+
+    # 无法反序列化的消息不交给 process_func，下标按剩余消息计
+    process_func.assert_awaited_once_with([{"a": 1}, {"a": 2}])
+    sent = _sent(fake_kafka_cli)
+    retry, dead = sent["t.retry.0"][0], sent["t.dlq"][0]
+    assert retry.value == b'{"a": 2}' and retry.key == b"k"
+    headers = dict(retry.headers)
+    assert headers["trace"] == b"x"
+    assert headers["x-retry-attempt"] == b"1"
+    assert headers["x-retry-error"] == b"db timeout"
+    assert headers["x-retry-origin-offset"] == b"2"
+    assert int(headers["x-retry-due-ms"]) / 1000 - time.time() > 0.5
+    assert dead.value == b"not json"
+    assert "x-retry-due-ms" not in dict(dead.headers)
+    # 转存按返回结果逐条重发，不抛异常
+    calls = fake_kafka_cli.send_data.await_args_list
+    assert all(c.kwargs == {"raise_on_error": False} for c in calls)
+    # 转存后提交越过失败消息
+    fake_consumer.commit.assert_awaited_once_with({mq_cli.TopicPartition("t", 0): 3})
+
+
+async def test_batch_consumer_retry_tiers_to_dlq(mocker):
+    fake_consumer = mocker.Mock()
+    fake_consumer.commit = mocker.AsyncMock()
+    process_func = mocker.AsyncMock(side_effect=RuntimeError("boom"))
+    consumer, fake_kafka_cli = _retry_consumer(mocker, process_func)
+    tier = consumer._tier_consumers()[1]
+    assert tier.topic == "t.retry.1" and tier._delayed
+
+    origin = [
+        ("x-retry-attempt", b"2"),
+        ("x-retry-origin-topic", b"t"),
+        ("x-retry-origin-offset", b"7"),
+        ("x-retry-due-ms", str(int(time.time() * 1000) + 50).encode()),
+    ]
+    start = time.monotonic()
+    msg = _retry_msg(0, headers=origin, topic="t.retry.1")
+    await tier._handle(fake_consumer, [msg])
+    # 到期后才处理
+    assert time.monotonic() - start >= 0.04
+    dead = _sent(fake_kafka_cli)["t.dlq"][0]
+    headers = dict(dead.headers)
+    assert headers["x-retry-attempt"] == b"3"
+    assert headers["x-retry-origin-offset"] == b"7"
+    assert headers["x-retry-error"] == b"RuntimeError('boom')"
+    fake_consumer.commit.assert_awaited_once()
+
+    # 中间层级失败进入下一层级
+    origin[0] = ("x-retry-attempt", b"1")
+    await consumer._handle(fake_consumer, [_retry_msg(3, headers=origin[:3])])
+    assert "t.retry.1" in _sent(fake_kafka_cli)
+
+
+async def test_batch_consumer_retry_park_fail(mocker):
+    from smartutils.infra.mq.cli import KafkaSendResult
+
+    fake_consumer = mocker.Mock()
+    fake_consumer.commit = mocker.AsyncMock()
+    results = iter([Exception("broker down"), KafkaSendResult(1)])
+
+    async def send(topic, records, raise_on_error=True):
+        ret = next(results)
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    mocker.patch.object(mq_cli.asyncio, "sleep", mocker.AsyncMock())
+    consumer, fake_kafka_cli = _retry_consumer(
+        mocker, mocker.AsyncMock(return_value=[0]), send_results=send
+    )
+    await consumer._handle(fake_consumer, [_retry_msg(0)])
+    assert fake_kafka_cli.send_data.await_count == 2
+    fake_consumer.commit.assert_awaited_once()
+
+    # 停止时放弃转存，不提交
+    fake_consumer.commit.reset_mock()
+    fake_kafka_cli.send_data.side_effect = Exception("broker down")
+    await consumer.stop()
+    await consumer._handle(fake_consumer, [_retry_msg(1)])
+    fake_consumer.commit.assert_not_awaited()
+
+
+async def test_batch_consumer_retry_start_tiers(mocker):
+    consumers = {}
+
+    def make_consumer(topic, group_id, auto_offset_reset="latest", listener=None):
+        consumers[topic] = _getmany_consumer(mocker, [])
+        return consumers[topic]
+
+    consumer, fake_kafka_cli = _retry_consumer(mocker, mocker.AsyncMock())
+    fake_kafka_cli.consumer.side_effect = make_consumer
+    task = asyncio.create_task(consumer.start())
+    await asyncio.sleep(0.03)
+    assert sorted(consumers) == ["t", "t.retry.0", "t.retry.1"]
+    await consumer.stop()
+    await asyncio.wait_for(task, 1)
+    assert all(c.stop.await_count == 1 for c in consumers.values())
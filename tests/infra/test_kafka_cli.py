@@ -72,16 +72,84 @@ async def test_close(setup_kafka_cli):
     fake_producer.stop.assert_awaited()
 
 
-async def test_send_data(setup_kafka_cli):
+def _delivered(ret=None, exc=None) -> asyncio.Future:
+    fut = asyncio.get_running_loop().create_future()
+    if exc:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(ret)
+    return fut
+
+
+async def test_send_data(setup_kafka_cli, mocker):
+    cli, fake_producer, _ = setup_kafka_cli
+    fake_producer.send = mocker.AsyncMock(side_effect=lambda *a, **kw: _delivered())
+    ret = await cli.send_data("topic", [{"k": 1}, {"k": 2}])
+    assert ret.ok and ret.sent == 2
+    fake_producer.send_and_wait.assert_not_awaited()
+    fake_producer.send.assert_awaited_with(
+        "topic",
+        value=b'{"k":2}',
+        key=None,
+        headers=None,
+        partition=None,
+        timestamp_ms=None,
+    )
+
+
+async def test_send_data_record_key_headers(setup_kafka_cli, mocker):
+    from smartutils.infra.mq.cli import KafkaRecord
+
+    cli, fake_producer, _ = setup_kafka_cli
+    fake_producer.send = mocker.AsyncMock(side_effect=lambda *a, **kw: _delivered())
+    records = [
+        KafkaRecord(b"raw", key="user-1", headers={"trace": "abc"}, partition=2),
+        KafkaRecord("text", key=b"k", headers=[("h", b"v")], timestamp_ms=1),
+    ]
+    ret = await cli.send_data("topic", records)
+    assert ret.sent == 2
+    first, second = [c.kwargs for c in fake_producer.send.await_args_list]
+    assert first["value"] == b"raw" and first["key"] == b"user-1"
+    assert first["headers"] == [("trace", b"abc")] and first["partition"] == 2
+    assert second["value"] == b"text" and second["key"] == b"k"
+    assert second["headers"] == [("h", b"v")] and second["timestamp_ms"] == 1
+
+
+async def test_send_data_partial_fail(setup_kafka_cli, mocker):
+    from smartutils.error.sys import MQError
+
     cli, fake_producer, _ = setup_kafka_cli
-    await cli.send_data("topic", [{"k": 1}])
-    fake_producer.send_and_wait.assert_awaited()
+    delivery_err = Exception("leader not available")
+    enqueue_err = ValueError("message too large")
+    outcomes = iter(
+        [_delivered(), _delivered(exc=delivery_err), enqueue_err, _delivered()]
+    )
+
+    async def send(*args, **kwargs):
+        ret = next(outcomes)
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    fake_producer.send = send
+    data = [{"i": i} for i in range(4)]
+    ret = await cli.send_data("topic", data, raise_on_error=False)
+    assert not ret.ok
+    assert ret.sent == 2
+    assert ret.failed == [(1, delivery_err), (2, enqueue_err)]
+
+    fake_producer.send = mocker.AsyncMock(
+        side_effect=lambda *a, **kw: _delivered(exc=delivery_err)
+    )
+    with pytest.raises(MQError):
+        await cli.send_data("topic", data)
 
 
 def test_consumer_create(setup_kafka_cli):
     cli, _, _ = setup_kafka_cli
     c = cli.consumer("mytopic", "gid", "earliest")
     assert c is not None
+    c.subscribe.assert_called_once_with(["mytopic"], listener=None)
 
 
 async def test_start_producer_error(mocker):
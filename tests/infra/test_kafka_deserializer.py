@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+import msgpack
+import orjson
+import pytest
+from pydantic import BaseModel, ValidationError
+
+import smartutils.infra.mq.deserializer as deser_mod
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.mq.deserializer import KafkaDeserializer, KafkaValueFormat
+
+
+class Order(BaseModel):
+    id: int
+    amount: float
+    created: datetime
+
+
+VALUES = [
+    orjson.dumps({"id": i, "amount": i * 1.5, "created": "2024-01-01T00:00:00"})
+    for i in range(10)
+]
+
+
+async def test_deserializer_formats():
+    assert await KafkaDeserializer()(VALUES) == [v.decode() for v in VALUES]
+    raw = await KafkaDeserializer(KafkaValueFormat.BYTES)(VALUES)
+    assert all(a is b for a, b in zip(raw, VALUES))
+    views = await KafkaDeserializer(KafkaValueFormat.MEMORYVIEW)(VALUES)
+    assert views[1].obj is VALUES[1]
+    dicts = await KafkaDeserializer(KafkaValueFormat.JSON)(VALUES)
+    assert dicts[3] == {"id": 3, "amount": 4.5, "created": "2024-01-01T00:00:00"}
+    packed = [msgpack.packb(d) for d in dicts]
+    assert await KafkaDeserializer(KafkaValueFormat.MSGPACK)(packed) == dicts
+    orders = await KafkaDeserializer(KafkaValueFormat.MODEL, model=Order)(VALUES)
+    assert orders[2] == Order(id=2, amount=3.0, created=datetime(2024, 1, 1))
+
+
+async def test_deserializer_model_invalid_message():
+    values = VALUES[:3] + [b'{"id": "x"}']
+    with pytest.raises(ValidationError):
+        await KafkaDeserializer(KafkaValueFormat.MODEL, model=Order)(values)
+
+
+async def test_deserializer_model_keeps_message_positions():
+    # 单条 value 含两个对象，不能拼接成多个模型错位到其他消息
+    values = [VALUES[1] + b"," + VALUES[2], VALUES[3]]
+    with pytest.raises(ValidationError):
+        await KafkaDeserializer(KafkaValueFormat.MODEL, model=Order)(values)
+    assert deser_mod.loads_many(KafkaValueFormat.MODEL, VALUES[:2], Order) == [
+        Order.model_validate_json(v) for v in VALUES[:2]
+    ]
+
+
+@pytest.mark.parametrize("executor_cls", [ThreadPoolExecutor, ProcessPoolExecutor])
+async def test_deserializer_executor(executor_cls, mocker):
+    with executor_cls(max_workers=3) as executor:
+        deserializer = KafkaDeserializer(
+            KafkaValueFormat.MODEL,
+            model=Order,
+            executor=executor,
+            pool_threshold=5,
+            workers=3,
+        )
+        spy = mocker.spy(executor, "submit")
+        # 少于阈值时在事件循环内解析
+        assert len(await deserializer(VALUES[:4])) == 4
+        assert spy.call_count == 0
+        orders = await deserializer(VALUES)
+        assert [o.id for o in orders] == list(range(10))
+        assert spy.call_count == 3
+
+
+def test_deserializer_invalid_args(mocker):
+    with pytest.raises(LibraryUsageError):
+        KafkaDeserializer(KafkaValueFormat.MODEL)
+    with pytest.raises(LibraryUsageError):
+        KafkaDeserializer(pool_threshold=0)
+    with pytest.raises(LibraryUsageError):
+        KafkaDeserializer(workers=0)
+    mocker.patch.object(deser_mod, "msgpack", None)
+    with pytest.raises(LibraryUsageError):
+        KafkaDeserializer(KafkaValueFormat.MSGPACK)
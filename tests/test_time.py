@@ -238,6 +238,11 @@ def test_get_now_stamp_mock(mocker):
     assert mytime.get_now_stamp() == 1714627200
 
 
+def test_get_now_stamp_ms_mock(mocker):
+    mocker.patch.object(mytime, "get_now_stamp_float", return_value=1714627200.9996)
+    assert mytime.get_now_stamp_ms() == 1714627200999
+
+
 def test_get_now_stamp_str_mock(mocker):
     from smartutils import time as mytime
 
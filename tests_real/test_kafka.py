@@ -130,6 +130,98 @@ async def test_send_and_batch_consume(setup_kafka):
     await test()
 
 
+async def test_send_records_with_key_headers(setup_kafka):
+    import uuid
+
+    from smartutils.infra import KafkaManager
+    from smartutils.infra.mq.cli import KafkaRecord
+
+    kafka_mgr = KafkaManager()
+
+    @kafka_mgr.use()
+    async def send_consume():
+        tag = uuid.uuid4().hex
+        records = [
+            KafkaRecord({"i": i, "tag": tag}, key=f"k{i % 2}", headers={"tag": tag})
+            for i in range(200)
+        ]
+        ret = await kafka_mgr.curr.send_data(TEST_TOPIC, records)
+        assert ret.ok and ret.sent == 200
+
+        consumer = kafka_mgr.curr.consumer(
+            TEST_TOPIC, f"pytest-group-{tag}", auto_offset_reset="earliest"
+        )
+        await consumer.start()
+        received = []
+        try:
+            start = time.time()
+            while len(received) < len(records) and time.time() - start < 10:
+                batches = await consumer.getmany(timeout_ms=1000)
+                header = ("tag", tag.encode())
+                for msgs in batches.values():
+                    received.extend(m for m in msgs if header in m.headers)
+        finally:
+            await consumer.stop()
+
+        assert len(received) == 200
+        # 相同 key 进入同一分区
+        partitions = {}
+        for m in received:
+            partitions.setdefault(m.key, set()).add(m.partition)
+        assert all(len(p) == 1 for p in partitions.values())
+
+    await send_consume()
+
+
+async def test_batch_consume_dead_letter(setup_kafka):
+    """失败消息进入死信 topic，主 topic 提交越过失败消息"""
+    import uuid
+
+    from smartutils.infra import KafkaBatchConsumer, KafkaManager
+    from smartutils.infra.mq.cli import KafkaConsumeMode, KafkaRetryPolicy
+
+    kafka_mgr = KafkaManager()
+
+    @kafka_mgr.use()
+    async def test():
+        tag = uuid.uuid4().hex
+        topic, dlq = f"{TEST_TOPIC}-{tag}", f"{TEST_TOPIC}-{tag}.dlq"
+        await kafka_mgr.curr.send_data(topic, [{"i": i} for i in range(4)])
+
+        async def process_func(messages):
+            # 奇数消息处理失败
+            return {i: "odd" for i, m in enumerate(messages) if '"i":1' in m}
+
+        consumer = KafkaBatchConsumer(
+            kafka_mgr.curr,
+            process_func,
+            topic=topic,
+            group_id=f"pytest-group-{tag}",
+            timeout=1,
+            mode=KafkaConsumeMode.GETMANY,
+            retry=KafkaRetryPolicy(backoffs=()),
+        )
+        try:
+            await asyncio.wait_for(consumer.start(), timeout=8)
+        except asyncio.TimeoutError:
+            await consumer.stop()
+
+        dlq_consumer = kafka_mgr.curr.consumer(
+            dlq, f"pytest-group-{tag}", auto_offset_reset="earliest"
+        )
+        await dlq_consumer.start()
+        try:
+            msg = await asyncio.wait_for(dlq_consumer.getone(), timeout=5)
+        finally:
+            await dlq_consumer.stop()
+        assert json.loads(msg.value) == {"i": 1}
+        headers = dict(msg.headers)
+        assert headers["x-retry-error"] == b"odd"
+        assert headers["x-retry-origin-topic"] == topic.encode()
+
+    await test()
+
+
 async def test_kafka_ping(setup_kafka):
     from smartutils.infra import KafkaManager
 
@@ -0,0 +1,166 @@
+"""
+集群模式用例，需要本地集群，如：
+for p in 7001 7002 7003; do redis-server --port $p --cluster-enabled yes \
+    --cluster-config-file nodes-$p.conf --daemonize yes; done
+redis-cli --cluster create 127.0.0.1:7001 127.0.0.1:7002 127.0.0.1:7003 --cluster-yes
+地址可用 REDIS_CLUSTER_HOST/REDIS_CLUSTER_PORT 覆盖，集群不可用时跳过。
+"""
+
+import os
+
+import pytest
+
+from smartutils.config.schema.redis import RedisConf
+from smartutils.error.sys import LibraryUsageError
+from smartutils.infra.cache.ext.queue.abstract import Task
+from smartutils.infra.cache.lua.const import LuaName
+from smartutils.infra.cache.lua.lua_manager import LuaManager
+from smartutils.infra.cache.redis_cli import AsyncRedisCli
+
+
+@pytest.fixture
+async def cluster_cli():
+    conf = RedisConf(
+        host=os.getenv("REDIS_CLUSTER_HOST", "127.0.0.1"),
+        port=int(os.getenv("REDIS_CLUSTER_PORT", "7001")),
+        db=0,
+        cluster=True,
+    )
+    cli = AsyncRedisCli(conf, "cluster")
+    try:
+        await cli._redis.initialize()
+    except Exception:
+        await cli.close()
+        pytest.skip("redis cluster not available.")
+    yield cli
+    LuaManager.forget(cli._redis)
+    await cli.close()
+
+
+async def test_cluster_safe_queue_list(cluster_cli):
+    cli = cluster_cli
+    q, p = "pytest:cluster:queue", "pytest:cluster:pending"
+    await cli.delete("{pytest}:cluster:queue", "{pytest}:cluster:pending")
+    assert await cli.ping()
+
+    await cli.safe_q_list.enqueue_task(q, [Task(id=i) for i in range(5)])
+    assert await cli.safe_q_list.task_num(q) == 5
+    # 实际 key 带哈希标签
+    assert await cli.llen("{pytest}:cluster:queue") == 5
+
+    async with cli.safe_q_list.fetch_task_ctx(q, p) as task:
+        assert task == "0"
+        assert await cli.safe_q_list.is_task_pending(p, task)
+    async with cli.safe_q_list.fetch_tasks_ctx(q, p, 3) as batch:
+        assert list(batch) == ["1", "2", "3"]
+        batch.fail("2")
+    assert await cli.safe_q_list.task_num(q) == 2
+    async with cli.safe_q_list.fetch_task_blocking_ctx(q, p, timeout=1) as task:
+        assert task == "2"
+    moved = await cli.safe_q_list.requeue_stale_tasks(q, p, before=0)
+    assert moved == 0
+
+    with pytest.raises(LibraryUsageError):
+        await cli.safe_q_list.requeue_tasks("a:queue", "b:pending", ["x"])
+    await cli.delete("{pytest}:cluster:queue", "{pytest}:cluster:pending")
+
+
+async def test_cluster_safe_queue_zset_and_delay(cluster_cli):
+    cli = cluster_cli
+    q, p, d = "pytest:zq", "pytest:zp", "pytest:zd"
+    keys = ["{pytest}:zq", "{pytest}:zq:wake", "{pytest}:zp", "{pytest}:zd"]
+    await cli.delete(*keys)
+
+    await cli.safe_q_zset.enqueue_task(q, [Task(id="a", priority=1), Task("b", 2)])
+    async with cli.safe_q_zset.fetch_tasks_ctx(q, p, 2) as batch:
+        assert list(batch) == ["b", "a"]
+        batch.fail("a")
+    assert await cli.safe_q_zset.task_num(q) == 1
+    async with cli.safe_q_zset.fetch_task_blocking_ctx(q, p, timeout=1) as task:
+        assert task == "a"
+
+    await cli.safe_q_delay.schedule_in(d, ["t1", "t2"], 0)
+    assert await cli.safe_q_delay.delayed_num(d) == 2
+    moved, nxt = await cli.safe_q_delay.promote_due_tasks(d, "pytest:dq")
+    assert (moved, nxt) == (2, None)
+    assert await cli.safe_q_delay.task_num("pytest:dq") == 2
+    await cli.delete(*keys, "{pytest}:dq")
+
+
+async def test_cluster_lua_pipeline_by_slot(cluster_cli):
+    cli = cluster_cli
+    keys = [f"pytest:cluster:cnt:{i}" for i in range(20)]
+    nodes = {cli._redis.get_node_from_key(k).name for k in keys}
+    assert len(nodes) > 1
+    await cli.delete(*keys)
+
+    await LuaManager.load_all(cli._redis)
+    pipe = LuaManager.pipeline(cli._redis)
+    for k in keys:
+        pipe.call(LuaName.INCR_DECR, keys=[k], args=["incr", "10"])
+    assert await pipe.execute() == [1] * 20
+
+    async with cli.pipeline(transaction=False) as p:
+        for k in keys:
+            p.incr(k)
+        assert await p.execute() == [2] * 20
+    assert await cli.safe_str.incr(keys[0]) == 3
+    assert await cli.delete(*keys) == 20
+
+
+async def test_cluster_near_cache_not_supported(cluster_cli):
+    with pytest.raises(LibraryUsageError):
+        cluster_cli.near_cache([])
+
+
+async def test_cluster_scan_keys(cluster_cli):
+    keys = [f"pytest:cluster:scan:{i}" for i in range(100)]
+    async with cluster_cli.pipeline(transaction=False) as pipe:
+        for k in keys:
+            pipe.set(k, "v", ex=60)
+        await pipe.execute()
+    infos = [i async for i in cluster_cli.scan_keys("pytest:cluster:scan:*", count=10)]
+    assert sorted(i.key for i in infos) == sorted(keys)
+    assert all(i.type == "string" and i.ttl > 0 and i.memory for i in infos)
+    report = await cluster_cli.keyspace.report("pytest:cluster:scan:*", depth=3)
+    assert report.total.keys == 100
+    await cluster_cli.delete(*keys)
+
+
+async def test_cluster_count_min_sketch_topk(cluster_cli):
+    for key in ["pytest:cluster:cms", "pytest:{cluster}:cms"]:
+        cms = cluster_cli.count_min_sketch(key, width=100, depth=3, topk=2)
+        await cms.clear()
+        await cms.add_many(["a"] * 3 + ["b"] * 2 + ["c"])
+        assert [item for item, _ in await cms.top()] == ["a", "b"]
+        assert await cms.clear() == 2
+
+
+async def test_cluster_worker_pool_drop_dead(cluster_cli):
+    import asyncio
+
+    from smartutils.infra.cache.ext.queue.worker import QueueWorkerPool
+
+    cli = cluster_cli
+    q, p = "pytest:wq", "pytest:wp"
+    keys = ["{pytest}:wq", "{pytest}:wp", "{pytest}:wp:retries"]
+    await cli.delete(*keys)
+
+    async def handler(task):
+        raise ValueError("poison")
+
+    pool = QueueWorkerPool(
+        cli.safe_q_list, q, p, handler, concurrency=1, max_retries=0, blocking=False
+    )
+    await cli.safe_q_list.enqueue_task(q, [Task("bad")])
+    await pool.start()
+    for _ in range(100):
+        if pool.stats.dead:
+            break
+        await asyncio.sleep(0.01)
+    await pool.stop()
+    # 未配置 dead_queue 时从带哈希标签的 pending 中移除，不会被回队器反复回队
+    assert pool.stats.dead == 1
+    assert not await cli.safe_q_list.is_task_pending(p, "bad")
+    assert await cli.exists("{pytest}:wp:retries") == 0
+    await cli.delete(*keys)
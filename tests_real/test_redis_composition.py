@@ -32,6 +32,67 @@ async def test_incr_and_decr(group):
     await test()
 
 
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_buffered_counter(group):
+    import asyncio
+
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    k1, k2 = "pytest:composition:buf:1", "pytest:composition:buf:2"
+    await cli.delete(k1, k2)
+
+    counter = cli.safe_str.buffered(interval=0.1, max_keys=3)
+    for _ in range(100):
+        await counter.incr(k1, ex=10)
+    await counter.decr(k1, 5)
+    await counter.incr(k2, 0)
+    # 未刷写前不访问 Redis
+    assert await cli.get(k1) is None
+    assert counter.pending(k1) == 95
+    assert await counter.flush() == {k1: 95}
+    assert int(await cli.get(k1)) == 95
+    assert 0 < await cli.ttl(k1) <= 10
+    assert await counter.flush() == {}
+
+    # 达到 max_keys 立即刷写
+    for i in range(3):
+        await counter.incr(f"{k2}:{i}")
+    assert counter.pending(f"{k2}:0") == 0
+    assert int(await cli.get(f"{k2}:0")) == 1
+    await cli.delete(*[f"{k2}:{i}" for i in range(3)])
+
+    # 后台按 interval 刷写，stop 时刷写剩余
+    await counter.start()
+    await counter.incr(k2, 7)
+    await asyncio.sleep(0.25)
+    assert int(await cli.get(k2)) == 7
+    await counter.incr(k2, 3)
+    await counter.stop()
+    assert not counter.running
+    assert int(await cli.get(k2)) == 10
+
+    # 单个 key WRONGTYPE：只保留该 key 的增量，其他 key 不重复写入
+    poison = "pytest:composition:buf:poison"
+    await cli.delete(k1, poison)
+    await cli.lpush(poison, "x")
+    for _ in range(3):
+        await counter.incr(k1)
+        await counter.incr(poison, 2)
+        with pytest.raises(Exception):
+            await counter.flush()
+    assert int(await cli.get(k1)) == 3
+    assert counter.pending(k1) == 0
+    assert counter.pending(poison) == 6
+    await cli.delete(poison)
+    assert await counter.flush() == {poison: 6}
+
+    with pytest.raises(LibraryUsageError):
+        cli.safe_str.buffered(interval=0)
+    await cli.delete(k1, k2, poison)
+
+
 @pytest.mark.parametrize("group", ["default", "decode"])
 async def test_safe_queue_by_list(group):
     from smartutils.infra import RedisManager
@@ -214,6 +275,593 @@ async def test_safe_queue_by_zset(group):
     await test()
 
 
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_queue_by_list_batch(group):
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        ready = "pytest:composition:list_ready_batch"
+        pending = "pytest:composition:zset_pending_batch"
+        await cli.delete(ready, pending)
+
+        await cli.safe_q_list.enqueue_task(ready, [Task(f"t{i}") for i in range(5)])
+
+        async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 3) as batch:
+            # 先进先出
+            assert batch.tasks == ["t0", "t1", "t2"]
+            assert len(batch) == 3
+            assert await cli.zcard(pending) == 3
+            batch.fail("t1")
+            with pytest.raises(LibraryUsageError):
+                batch.fail("t9")
+        # 成功任务已ack，失败任务回队且最先被领取
+        assert await cli.zcard(pending) == 0
+        assert await cli.safe_q_list.task_num(ready) == 3
+
+        async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 10) as batch:
+            assert batch.tasks == ["t1", "t3", "t4"]
+            assert batch.succeeded == batch.tasks
+        assert await cli.zcard(pending) == 0
+
+        async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 10) as batch:
+            assert not batch.tasks
+
+        # 异常时保留在pending
+        await cli.safe_q_list.enqueue_task(ready, [Task("t5"), Task("t6")])
+        with pytest.raises(RuntimeError):
+            async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 2) as batch:
+                raise RuntimeError("biz fail")
+        members = await cli.safe_q_list.get_pending_members(pending, limit=2)
+        assert sorted(members) == ["t5", "t6"]
+
+        assert await cli.safe_q_list.requeue_tasks(ready, pending, ["t5", "t6"]) == 2
+        assert await cli.safe_q_list.requeue_tasks(ready, pending, []) == 0
+        assert await cli.zcard(pending) == 0
+        assert await cli.safe_q_list.task_num(ready) == 2
+
+        with pytest.raises(LibraryUsageError):
+            async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 0):
+                ...
+
+        await cli.delete(ready, pending)
+
+    await test()
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_queue_by_zset_batch(group):
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        ready = "pytest:composition:zset_ready_batch"
+        pending = "pytest:composition:zset_pending_batch2"
+        await cli.delete(ready, pending)
+
+        await cli.safe_q_zset.enqueue_task(
+            ready, [Task("a", 1), Task("b", 3), Task("c", 2), Task("d", 0)]
+        )
+
+        async with cli.safe_q_zset.fetch_tasks_ctx(ready, pending, 3) as batch:
+            # 按优先级从高到低
+            assert batch.tasks == ["b", "c", "a"]
+            assert await cli.zcard(pending) == 3
+            batch.fail("c")
+        assert await cli.zcard(pending) == 0
+        ready_members = await cli.zrange(ready, 0, -1, withscores=True)
+        assert ready_members[-1][0] == "c"
+        assert ready_members[-1][1] == max_float()
+
+        async with cli.safe_q_zset.fetch_tasks_ctx(ready, pending, 10) as batch:
+            assert batch.tasks == ["c", "d"]
+        assert await cli.safe_q_zset.task_num(ready) == 0
+
+        await cli.zadd(pending, {"e": 10, "f": 11})
+        assert await cli.safe_q_zset.requeue_tasks(ready, pending, ["e", "f"], 7) == 2
+        ready_members = await cli.zrange(ready, 0, -1, withscores=True)
+        assert ready_members == [("e", 7.0), ("f", 7.0)]
+        assert await cli.zcard(pending) == 0
+
+        await cli.delete(ready, pending)
+
+    await test()
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_queue_requeue_stale(group):
+    from smartutils.infra import RedisManager
+    from smartutils.infra.cache.ext.queue.abstract import LeaderLease
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        ready = "pytest:composition:list_ready_stale"
+        pending = "pytest:composition:zset_pending_stale"
+        leader_key = "pytest:composition:stale:leader"
+        await cli.delete(ready, pending, leader_key)
+
+        await cli.zadd(pending, {"old1": 10, "old2": 20, "old3": 30, "new": 1000})
+        assert await cli.safe_q_list.requeue_stale_tasks(ready, pending, 25) == 2
+        # 最早领取的最先被再次领取
+        async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 10) as batch:
+            assert batch.tasks == ["old1", "old2"]
+
+        lease = LeaderLease(leader_key, "me", 10000)
+        other = LeaderLease(leader_key, "other", 10000)
+        assert (
+            await cli.safe_q_list.requeue_stale_tasks(
+                ready, pending, 100, limit=1, leader=lease
+            )
+            == 1
+        )
+        assert await cli.get(leader_key) in ("me", b"me")
+        assert (
+            await cli.safe_q_list.requeue_stale_tasks(ready, pending, 2000, leader=other)
+            == -1
+        )
+        assert await cli.zcard(pending) == 1
+
+        ready_z = "pytest:composition:zset_ready_stale"
+        await cli.delete(ready_z)
+        assert (
+            await cli.safe_q_zset.requeue_stale_tasks(
+                ready_z, pending, 2000, priority=3, leader=lease
+            )
+            == 1
+        )
+        assert await cli.zrange(ready_z, 0, -1, withscores=True) == [("new", 3.0)]
+
+        await cli.delete(ready, ready_z, pending, leader_key)
+
+    await test()
+
+
+async def test_pending_reaper():
+    import asyncio
+
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    ready = "pytest:composition:list_ready_reaper"
+    pending = "pytest:composition:zset_pending_reaper"
+    leader_key = f"{pending}:reaper:leader"
+    await cli.delete(ready, pending, leader_key)
+    await cli.zadd(pending, {f"t{i}": i for i in range(5)})
+
+    reaper = mgr.reaper(
+        cli.safe_q_list, ready, pending, visibility_timeout=60, batch_size=2
+    )
+    standby = mgr.reaper(cli.safe_q_list, ready, pending, visibility_timeout=60)
+    await reaper.start()
+    await reaper.start()
+    assert reaper.running
+    # 超过batch_size时不等待，连续回队
+    for _ in range(50):
+        if await cli.safe_q_list.task_num(ready) == 5:
+            break
+        await asyncio.sleep(0.01)
+    assert await cli.safe_q_list.task_num(ready) == 5
+    assert await cli.zcard(pending) == 0
+
+    # 非leader不执行
+    await cli.zadd(pending, {"t9": 1})
+    assert await standby.sweep() == -1
+    assert await cli.zcard(pending) == 1
+
+    await reaper.stop()
+    assert not reaper.running
+    # leader释放后，其他实例可接管
+    assert await cli.get(leader_key) is None
+    assert await standby.sweep() == 1
+
+    await mgr.close()
+    assert not standby.running
+    await cli.delete(ready, pending, leader_key)
+
+
+async def test_pending_reaper_invalid_args():
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client()
+    with pytest.raises(LibraryUsageError):
+        mgr.reaper(cli.safe_q_list, "q", "p", visibility_timeout=0)
+    with pytest.raises(LibraryUsageError):
+        mgr.reaper(cli.safe_q_list, "q", "p", visibility_timeout=1, jitter=1)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_queue_blocking_fetch(group):
+    import asyncio
+
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        ready = "pytest:composition:list_ready_block"
+        ready_z = "pytest:composition:zset_ready_block"
+        pending = "pytest:composition:zset_pending_block"
+        processing = cli.safe_q_list.processing_key(pending)
+        await cli.delete(ready, ready_z, pending, processing)
+
+        # 空队列超时返回None
+        async with cli.safe_q_list.fetch_task_blocking_ctx(
+            ready, pending, timeout=0.1
+        ) as msg:
+            assert msg is None
+        async with cli.safe_q_zset.fetch_task_blocking_ctx(
+            ready_z, pending, timeout=0.1
+        ) as msg:
+            assert msg is None
+
+        # 阻塞期间入队，立即被唤醒
+        async def enqueue_later():
+            await asyncio.sleep(0.05)
+            await cli.safe_q_list.enqueue_task(ready, [Task("b1")])
+
+        producer = asyncio.create_task(enqueue_later())
+        async with cli.safe_q_list.fetch_task_blocking_ctx(
+            ready, pending, timeout=2
+        ) as msg:
+            assert msg == "b1"
+            assert await cli.safe_q_list.is_task_pending(pending, msg)
+            assert await cli.llen(processing) == 0
+        await producer
+        assert not await cli.safe_q_list.is_task_pending(pending, "b1")
+
+        await cli.safe_q_zset.enqueue_task(ready_z, [Task("z1", 1), Task("z2", 2)])
+        async with cli.safe_q_zset.fetch_task_blocking_ctx(
+            ready_z, pending, timeout=1
+        ) as msg:
+            assert msg == "z2"
+            assert await cli.safe_q_zset.is_task_pending(pending, msg)
+        assert not await cli.safe_q_zset.is_task_pending(pending, "z2")
+
+        # zset 阻塞在唤醒列表上，入队即被唤醒，领取与放入 pending 原子完成
+        async def enqueue_z_later():
+            await asyncio.sleep(0.05)
+            await cli.safe_q_zset.enqueue_task(ready_z, [Task("z3", 3)])
+
+        await cli.delete(ready_z, f"{ready_z}:wake")
+        producer = asyncio.create_task(enqueue_z_later())
+        start = asyncio.get_running_loop().time()
+        async with cli.safe_q_zset.fetch_task_blocking_ctx(
+            ready_z, pending, timeout=2
+        ) as msg:
+            assert msg == "z3"
+            assert await cli.safe_q_zset.is_task_pending(pending, msg)
+        assert asyncio.get_running_loop().time() - start < 1
+        await producer
+        # 无信号回队的任务，最迟 timeout 后领取
+        await cli.zadd(ready_z, {"z4": 4})
+        async with cli.safe_q_zset.fetch_task_blocking_ctx(
+            ready_z, pending, timeout=0.1
+        ) as msg:
+            assert msg == "z4"
+        # 唤醒列表有上限
+        await cli.safe_q_zset.enqueue_task(
+            ready_z, [Task(f"m{i}") for i in range(cli.safe_q_zset.WAKE_MAX + 10)]
+        )
+        assert await cli.llen(f"{ready_z}:wake") <= cli.safe_q_zset.WAKE_MAX
+
+        # 模拟崩溃残留在processing中的任务
+        await cli.lpush(processing, "p1", "p2")
+        assert await cli.safe_q_list.recover_processing(ready, pending) == 2
+        assert await cli.llen(processing) == 0
+        async with cli.safe_q_list.fetch_tasks_ctx(ready, pending, 2) as batch:
+            assert batch.tasks == ["p1", "p2"]
+
+        await cli.delete(ready, ready_z, f"{ready_z}:wake", pending, processing)
+
+    await test()
+
+
+@pytest.mark.parametrize("blocking", [True, False])
+async def test_queue_worker_pool(blocking):
+    import asyncio
+
+    from smartutils.infra import RedisManager
+    from smartutils.infra.cache.ext.queue.worker import QueueWorkerPool
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    ready = "pytest:composition:list_ready_pool"
+    pending = "pytest:composition:zset_pending_pool"
+    dead = "pytest:composition:list_dead_pool"
+    await cli.delete(ready, pending, dead, f"{pending}:retries")
+
+    done = []
+    flaky = {"t1": 1}
+
+    async def handler(task):
+        await asyncio.sleep(0.01)
+        if task == "bad":
+            raise ValueError("poison")
+        if flaky.get(task, 0) > 0:
+            flaky[task] -= 1
+            raise ValueError("flaky")
+        done.append(task)
+
+    pool = QueueWorkerPool(
+        cli.safe_q_list,
+        ready,
+        pending,
+        handler,
+        concurrency=3,
+        max_retries=2,
+        dead_queue=dead,
+        blocking=blocking,
+        fetch_timeout=0.1,
+        idle_interval=0.01,
+    )
+    await cli.safe_q_list.enqueue_task(
+        ready, [Task(t) for t in ["t0", "t1", "bad", "t3", "t4"]]
+    )
+    await pool.start()
+    await pool.start()
+    assert pool.running
+    for _ in range(200):
+        if len(done) == 4 and await cli.llen(dead) == 1:
+            break
+        await asyncio.sleep(0.01)
+    await pool.stop()
+    assert not pool.running
+
+    assert sorted(done) == ["t0", "t1", "t3", "t4"]
+    assert await cli.lrange(dead, 0, -1) == ["bad"]
+    assert await cli.zcard(pending) == 0
+    assert await cli.hlen(f"{pending}:retries") == 0
+    stats = pool.stats.snapshot()
+    assert stats["succeeded"] == 4
+    # bad: 1次 + 2次重试；t1: 1次
+    assert stats["failed"] == 4
+    assert stats["requeued"] == 3
+    assert stats["dead"] == 1
+    assert stats["fetched"] == 8
+    assert stats["latency_max"] >= 0.01
+    assert stats["throughput"] > 0
+
+    await cli.delete(ready, pending, dead, f"{pending}:retries")
+
+
+async def test_queue_worker_pool_drain():
+    import asyncio
+
+    from smartutils.infra import RedisManager
+    from smartutils.infra.cache.ext.queue.worker import QueueWorkerPool
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    ready = "pytest:composition:zset_ready_pool_drain"
+    pending = "pytest:composition:zset_pending_pool_drain"
+    await cli.delete(ready, pending)
+    started = asyncio.Event()
+
+    async def slow(task):
+        started.set()
+        await asyncio.sleep(10)
+
+    pool = QueueWorkerPool(
+        cli.safe_q_zset,
+        ready,
+        pending,
+        slow,
+        concurrency=1,
+        fetch_timeout=0.1,
+        drain_timeout=0.1,
+    )
+    await cli.safe_q_zset.enqueue_task(ready, [Task("slow")])
+    await pool.start()
+    await asyncio.wait_for(started.wait(), 1)
+    await pool.stop()
+    # 超时未完成的任务留在pending
+    assert await cli.safe_q_zset.is_task_pending(pending, "slow")
+
+    with pytest.raises(LibraryUsageError):
+        QueueWorkerPool(cli.safe_q_zset, ready, pending, slow, concurrency=0)
+
+    await cli.delete(ready, pending)
+
+
+async def test_queue_worker_pool_ack_and_fetch_error():
+    import asyncio
+    from contextlib import asynccontextmanager
+
+    from smartutils.infra import RedisManager
+    from smartutils.infra.cache.ext.queue.worker import QueueWorkerPool
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    ready = "pytest:composition:list_ready_pool_err"
+    pending = "pytest:composition:zset_pending_pool_err"
+    handled = []
+
+    async def handler(task):
+        handled.append(task)
+
+    pool = QueueWorkerPool(
+        cli.safe_q_list, ready, pending, handler, blocking=True, idle_interval=0.05
+    )
+
+    @asynccontextmanager
+    async def ack_fail():
+        yield "t0"
+        raise ConnectionError("ack")
+
+    # handler 成功后确认失败，不计为任务失败，不回队重跑
+    pool._fetch = ack_fail  # type: ignore
+    assert await pool.process_one() is True
+    assert handled == ["t0"]
+    stats = pool.stats.snapshot()
+    assert stats["succeeded"] == 1
+    assert stats["failed"] == 0
+    assert stats["requeued"] == 0
+    assert await cli.llen(ready) == 0
+
+    calls = 0
+
+    @asynccontextmanager
+    async def fetch_fail():
+        nonlocal calls
+        calls += 1
+        raise ConnectionError("down")
+        yield
+
+    # 阻塞模式领取出错同样退避，不空转
+    pool._fetch = fetch_fail  # type: ignore
+    await pool.start()
+    await asyncio.sleep(0.2)
+    await pool.stop()
+    assert 0 < calls <= 4 * 5
+
+    await cli.delete(ready, pending)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_delay_queue(group):
+    from smartutils.infra import RedisManager
+    from smartutils.time import get_now_stamp_float, get_now_stamp_ms
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        delayed = "pytest:composition:zset_delayed"
+        ready = "pytest:composition:list_ready_delay"
+        pending = "pytest:composition:zset_pending_delay"
+        await cli.delete(delayed, ready, pending)
+
+        now = get_now_stamp_float()
+        assert await cli.safe_q_delay.schedule_at(delayed, ["d2"], now - 1) == 1
+        assert await cli.safe_q_delay.schedule_at(delayed, ["d1"], now - 2) == 1
+        assert await cli.safe_q_delay.schedule_in(delayed, ["later"], 60) == 1
+        assert await cli.safe_q_delay.schedule_in(delayed, ["gone"], 60) == 1
+        assert await cli.safe_q_delay.cancel(delayed, ["gone"]) == 1
+        assert await cli.safe_q_delay.delayed_num(delayed) == 3
+        # 毫秒精度
+        score = await cli.zscore(delayed, "later")
+        assert abs(score - get_now_stamp_ms() - 60000) < 1000
+
+        moved, nxt = await cli.safe_q_delay.promote_due_tasks(delayed, ready)
+        assert moved == 2
+        assert nxt == int(score)
+        # 按到期先后出队
+        async with cli.safe_q_delay.fetch_tasks_ctx(ready, pending, 10) as batch:
+            assert batch.tasks == ["d1", "d2"]
+
+        moved, nxt = await cli.safe_q_delay.promote_due_tasks(delayed, ready)
+        assert (moved, nxt) == (0, int(score))
+        await cli.safe_q_delay.cancel(delayed, ["later"])
+        assert await cli.safe_q_delay.promote_due_tasks(delayed, ready) == (0, None)
+
+        await cli.delete(delayed, ready, pending)
+
+    await test()
+
+
+async def test_delay_promoter():
+    import asyncio
+
+    from smartutils.infra import RedisManager
+    from smartutils.infra.cache.ext.queue.delay import DelayPromoter
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    delayed = "pytest:composition:zset_delayed_promoter"
+    ready = "pytest:composition:list_ready_promoter"
+    await cli.delete(delayed, ready)
+
+    promoter = DelayPromoter(cli.safe_q_delay, delayed, ready, batch_size=2)
+    await cli.safe_q_delay.schedule_in(delayed, ["a", "b", "c"], 0)
+    await cli.safe_q_delay.schedule_in(delayed, ["soon"], 0.2)
+    await promoter.start()
+    await promoter.start()
+    assert promoter.running
+    await asyncio.sleep(0.05)
+    # 超过batch_size连续转移
+    assert await cli.llen(ready) == 3
+    # 休眠到下一个到期时间
+    await asyncio.sleep(0.3)
+    assert await cli.llen(ready) == 4
+
+    await cli.safe_q_delay.schedule_in(delayed, ["now"], 0)
+    promoter.notify()
+    await asyncio.sleep(0.05)
+    assert await cli.llen(ready) == 5
+
+    await promoter.stop()
+    assert not promoter.running
+    with pytest.raises(LibraryUsageError):
+        DelayPromoter(cli.safe_q_delay, delayed, ready, max_sleep=0)
+    await cli.delete(delayed, ready)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_safe_queue_stream_batch(group):
+    import asyncio
+
+    from smartutils.infra import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def test():
+        cli = mgr.curr
+        q = cli.safe_q_stream
+        stream, gp = "pytest:composition:stream_batch", "pytestbatchgroup"
+        await cli.delete(stream)
+
+        ids = await q.add_batch(stream, [{"n": i} for i in range(5)], maxlen=1000)
+        assert len(ids) == 5 and all(isinstance(i, str) for i in ids)
+        assert await q.add_batch(stream, []) == []
+
+        async with q.read_batch_ctx(stream, gp, count=3) as batch:
+            assert [m.fields for m in batch] == [{"n": "0"}, {"n": "1"}, {"n": "2"}]
+            assert [m.id for m in batch] == ids[:3]
+            batch.fail(ids[1])
+            with pytest.raises(LibraryUsageError):
+                batch.fail("0-1")
+        # 消费组只创建一次
+        assert (stream, gp) in q._groups
+        pending = await cli.xpending(stream, gp)
+        assert pending["pending"] == 1
+
+        with pytest.raises(RuntimeError):
+            async with q.read_batch_ctx(stream, gp, count=10) as batch:
+                assert len(batch) == 2
+                raise RuntimeError("biz fail")
+        assert (await cli.xpending(stream, gp))["pending"] == 3
+
+        async with q.read_batch_ctx(stream, gp, count=10, block=10) as batch:
+            assert len(batch) == 0
+
+        await asyncio.sleep(0.02)
+        async with q.reclaim_ctx(stream, gp, min_idle_ms=10, count=10) as batch:
+            assert [m.id for m in batch] == [ids[1], ids[3], ids[4]]
+        assert (await cli.xpending(stream, gp))["pending"] == 0
+
+        next_id, messages = await q.reclaim(stream, gp, min_idle_ms=0)
+        assert next_id == "0-0" and messages == []
+
+        await cli.delete(stream)
+
+    await test()
+
+
 async def test_bitmap():
     """
     真正执行RedisBitmapUtil的端到端测试。
@@ -353,3 +1001,832 @@ async def test_ZSetHelper():
         await cli.delete(zset_key)
 
     await biz()
+
+
+async def _wait_until(cond, timeout: float = 2):
+    import asyncio
+
+    for _ in range(int(timeout / 0.01)):
+        if cond():
+            return True
+        await asyncio.sleep(0.01)
+    return cond()
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_near_cache_lru_ttl(group):
+    import asyncio
+
+    from smartutils.infra.cache.ext.near import (
+        NearCacheInvalidation,
+        NearCachePolicy,
+    )
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def biz():
+        cli = mgr.curr
+        keys = [f"pytest:near:lru:{i}" for i in range(3)]
+        await cli.delete(*keys, "pytest:near:other")
+        near = cli.near_cache(
+            [
+                NearCachePolicy("pytest:near:", ttl=0.2, max_entries=2),
+                NearCachePolicy("pytest:near:lru:", ttl=10, max_entries=2),
+            ],
+            NearCacheInvalidation.NONE,
+        )
+        await cli.set(keys[0], "v0")
+
+        assert await near.get(keys[0]) == "v0"
+        await cli.set(keys[0], "changed")
+        # 本地命中，未失效
+        assert await near.get(keys[0]) == "v0"
+        assert near.stats.hits == 1 and near.stats.misses == 1
+
+        # 未缓存的 key 也会缓存为 None
+        assert await near.mget(keys) == ["v0", None, None]
+        assert near.stats.evictions == 1
+        assert len(near) == 2
+
+        # 最长前缀策略 ttl 10s；短前缀策略过期
+        await cli.set("pytest:near:other", "o")
+        assert await near.get("pytest:near:other") == "o"
+        await cli.set("pytest:near:other", "o2")
+        await asyncio.sleep(0.25)
+        assert await near.get("pytest:near:other") == "o2"
+        assert near.stats.expired == 1
+
+        assert await near.set(keys[0], "v1")
+        assert await near.get(keys[0]) == "v1"
+        assert await near.delete(keys[0]) == 1
+        assert await near.get(keys[0]) is None
+        assert near.stats.snapshot()["hit_rate"] > 0
+
+        await cli.delete(*keys, "pytest:near:other")
+
+    await biz()
+
+
+@pytest.mark.parametrize(
+    "group,invalidation",
+    [
+        ("default", "pubsub"),
+        ("decode", "pubsub"),
+        ("default", "tracking"),
+        ("decode", "tracking"),
+    ],
+)
+async def test_near_cache_invalidation(group, invalidation):
+    from smartutils.infra.cache.ext.near import NearCachePolicy
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use(group)
+    async def biz():
+        cli = mgr.curr
+        key = "pytest:near:inv:conf"
+        await cli.delete(key)
+        policies = [
+            NearCachePolicy("pytest:near:inv:", ttl=60),
+            NearCachePolicy("pytest:near:inv:conf", ttl=60),
+        ]
+        writer = cli.near_cache(policies, invalidation)
+        reader = cli.near_cache(policies, invalidation)
+        await writer.start()
+        await reader.start()
+        assert await _wait_until(lambda: writer.ready and reader.ready)
+
+        await cli.set(key, "v1")
+        assert await reader.get(key) == "v1"
+        assert await reader.get(key) == "v1"
+        assert reader.stats.hits == 1
+
+        # 其他实例写入后失效
+        await writer.set(key, "v2")
+        assert await _wait_until(lambda: reader.stats.invalidations == 1)
+        assert await reader.get(key) == "v2"
+
+        await writer.delete(key)
+        assert await _wait_until(lambda: reader.stats.invalidations == 2)
+        assert await reader.get(key) is None
+
+        if invalidation == "tracking":
+            # 服务端跟踪：绕过 NearCache 的写入也会失效
+            await cli.set(key, "v3")
+            assert await _wait_until(lambda: reader.stats.invalidations == 3)
+            assert await reader.get(key) == "v3"
+
+        await reader.stop()
+        assert not reader.ready and len(reader) == 0
+        # 监听停止后直接读 Redis
+        await cli.set(key, "v4")
+        assert await reader.get(key) == "v4"
+
+        await cli.delete(key)
+
+    await biz()
+
+
+async def test_near_cache_idle_channel():
+    import asyncio
+
+    from smartutils.infra.cache.ext.near import NearCachePolicy
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use("decode")
+    async def biz():
+        cli = mgr.curr
+        key = "pytest:near:idle:conf"
+        await cli.set(key, "v1")
+        policies = [NearCachePolicy("pytest:near:idle:", ttl=60)]
+        near = cli.near_cache(policies, health_check_interval=0.05)
+        writer = cli.near_cache(policies)
+        await near.start()
+        assert await _wait_until(lambda: near.ready)
+        conn = near._conn
+        # 不继承连接池的读超时
+        assert conn.socket_timeout is None
+        assert await near.get(key) == "v1"
+
+        # 频道空闲多个探活周期：不断线、不清空本地缓存
+        await asyncio.sleep(0.3)
+        assert near.ready and near._conn is conn
+        assert len(near) == 1
+        assert await near.get(key) == "v1"
+        assert near.stats.hits == 1
+
+        await writer.set(key, "v2")
+        assert await _wait_until(lambda: near.stats.invalidations == 1)
+        assert await near.get(key) == "v2"
+
+        await near.stop()
+        await cli.delete(key)
+
+    await biz()
+
+
+async def test_near_cache_policy_check():
+    from smartutils.infra.cache.ext.near import NearCachePolicy
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+
+    @mgr.use("default")
+    async def biz():
+        cli = mgr.curr
+        with pytest.raises(LibraryUsageError):
+            cli.near_cache([])
+        with pytest.raises(LibraryUsageError):
+            cli.near_cache([NearCachePolicy("a:", ttl=0)])
+        with pytest.raises(LibraryUsageError):
+            cli.near_cache([NearCachePolicy("a:", ttl=1), NearCachePolicy("a:", 2)])
+
+    await biz()
+
+
+async def test_cached_single_flight():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    calls = []
+
+    @mgr.cached(key="pytest:cached:user:{uid}", ttl=60, group="decode")
+    async def get_user(uid: int, detail: bool = False):
+        # 被装饰函数内仍可使用 curr
+        assert mgr.curr is mgr.client("decode")
+        calls.append(uid)
+        await asyncio.sleep(0.05)
+        return {"uid": uid, "detail": detail}
+
+    await get_user.invalidate(1)
+    rets = await asyncio.gather(*(get_user(1) for _ in range(20)))
+    assert all(r == {"uid": 1, "detail": False} for r in rets)
+    assert calls == [1]
+
+    assert await get_user(uid=1) == {"uid": 1, "detail": False}
+    assert calls == [1]
+    ttl = await mgr.client("decode").pttl("pytest:cached:user:1")
+    assert 54000 <= ttl <= 66000
+
+    assert await get_user.invalidate(1) == 1
+    assert await get_user(1) == {"uid": 1, "detail": False}
+    assert calls == [1, 1]
+    await get_user.invalidate(1)
+
+
+async def test_cached_stale_while_revalidate():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    version = {"v": 0}
+
+    @mgr.cached(key=lambda name: f"pytest:cached:conf:{name}", ttl=0.1, stale_ttl=5)
+    async def get_conf(name: str):
+        version["v"] += 1
+        return version["v"]
+
+    await get_conf.invalidate("a")
+    assert await get_conf("a") == 1
+    await asyncio.sleep(0.15)
+    # 过期后先返回旧值，只触发一次后台刷新
+    assert await asyncio.gather(get_conf("a"), get_conf("a")) == [1, 1]
+    for _ in range(50):
+        if version["v"] == 2:
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.02)
+    assert await get_conf("a") == 2
+    assert version["v"] == 2
+    await get_conf.invalidate("a")
+
+
+async def test_cached_wait_other_loader():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client()
+    key = "pytest:cached:locked"
+    await cli.delete(key, f"{key}:lock")
+    # 模拟其他实例持有加载锁
+    await cli.set(f"{key}:lock", "other", px=2000)
+
+    @mgr.cached(key=key, ttl=60, lock_ttl=1, lock_poll=0.02)
+    async def load():
+        return "mine"
+
+    async def other_loader():
+        await asyncio.sleep(0.1)
+        await cli.set(key, '{"v":"theirs","t":9999999999999}', px=60000)
+
+    ret, _ = await asyncio.gather(load(), other_loader())
+    assert ret == "theirs"
+
+    # 锁一直不释放时，超时后自行加载
+    await cli.delete(key)
+    assert await load() == "mine"
+    await cli.delete(key, f"{key}:lock")
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_lua_manager_cache_and_pipeline(group):
+    from smartutils.infra.cache.lua.const import LUAS, LuaName
+    from smartutils.infra.cache.lua.lua_manager import LuaManager
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    redis = cli._redis
+    keys = [f"pytest:lua:pipe:{i}" for i in range(5)]
+    await cli.delete(*keys)
+
+    # 初始化时已预加载
+    await mgr.load_luas()
+    lua = await LuaManager.get(LuaName.INCR_DECR, redis)
+    assert await LuaManager.get(LuaName.INCR_DECR, redis) is lua
+    assert all(await redis.script_exists(*[lua.sha]))
+    assert len([k for k in LuaManager._luas if k[0] == id(redis)]) == len(LUAS)
+
+    # 服务端脚本被清空后，批量调用自动加载并只重试失败的调用
+    await redis.script_flush()
+    pipe = LuaManager.pipeline(redis)
+    for key in keys:
+        pipe.call(LuaName.INCR_DECR, keys=[key], args=["incr", 10])
+    pipe.call(LuaName.INCR_DECR, keys=[keys[0]], args=["decr", None])
+    assert len(pipe) == 6
+    assert await pipe.execute() == [1, 1, 1, 1, 1, 0]
+    assert len(pipe) == 0
+    assert await pipe.execute() == []
+    assert 0 < await cli.ttl(keys[1]) <= 10
+
+    await cli.set(keys[0], "not-int")
+    pipe.call(LuaName.INCR_DECR, keys=[keys[0]], args=["incr", None])
+    pipe.call(LuaName.INCR_DECR, keys=[keys[1]], args=["incr", None])
+    rets = await pipe.execute(raise_on_error=False)
+    assert isinstance(rets[0], Exception) and rets[1] == 2
+    pipe.call(LuaName.INCR_DECR, keys=[keys[0]], args=["incr", None])
+    with pytest.raises(Exception):
+        await pipe.execute()
+
+    await cli.delete(*keys)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+async def test_bitmap_chunked_scan(use_numpy, mocker):
+    import random
+
+    import smartutils.infra.cache.ext.bitmap as bitmap_mod
+    from smartutils.infra.cache.redis import RedisManager
+
+    if not use_numpy:
+        mocker.patch.object(bitmap_mod, "np", None)
+
+    mgr = RedisManager()
+    cli = mgr.client("default")
+    key = "pytest:composition:bitmap:chunked"
+    await cli.delete(key)
+    assert len(await cli.bitmap.get_set_bits(key)) == 0
+
+    rnd = random.Random(7)
+    # 稀疏分布 + 中间大段全零 + 块边界附近
+    offsets = sorted(
+        set(rnd.sample(range(0, 20000), 300))
+        | {8 * 64 - 1, 8 * 64, 2_000_000, 2_000_007}
+    )
+    async with cli._redis.pipeline(transaction=False) as pipe:
+        for off in offsets:
+            pipe.setbit(key, off, 1)
+        await pipe.execute()
+
+    chunks = [
+        list(c) async for c in cli.bitmap.iter_set_bits(key, chunk_bytes=64)
+    ]
+    assert [b for c in chunks for b in c] == offsets
+    assert all(c == sorted(c) and c for c in chunks)
+
+    bits = await cli.bitmap.get_set_bits(key, chunk_bytes=100)
+    if use_numpy:
+        assert bits.dtype.name == "int64"
+    else:
+        assert bits.typecode == "q"
+    assert list(bits) == offsets
+
+    bits = await cli.bitmap.get_set_bits(key, max_offset=2_000_006)
+    assert list(bits) == offsets[:-1]
+    bits = await cli.bitmap.get_set_bits(key, max_offset=offsets[10] - 1)
+    assert list(bits) == offsets[:10]
+    assert await cli.bitmap.get_all_set_bits(key) == set(offsets)
+
+    with pytest.raises(LibraryUsageError):
+        await cli.bitmap.get_set_bits(key, chunk_bytes=0)
+    await cli.delete(key)
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+async def test_bitmap_set_algebra(use_numpy, mocker):
+    import smartutils.infra.cache.ext.bitmap as bitmap_mod
+    from smartutils.infra.cache.ext.bitmap import BitOp
+    from smartutils.infra.cache.redis import RedisManager
+
+    if not use_numpy:
+        mocker.patch.object(bitmap_mod, "np", None)
+
+    mgr = RedisManager()
+    cli = mgr.client("default")
+    active, paid, churned = (
+        "pytest:bitmap:active",
+        "pytest:bitmap:paid",
+        "pytest:bitmap:churned",
+    )
+    dest = "pytest:bitmap:dest"
+    await cli.delete(active, paid, churned, dest)
+
+    active_ids = set(range(0, 3000, 2))
+    paid_ids = set(range(0, 3000, 3))
+    # churned 比 active 短，NOT 直接求补会漏掉后段
+    churned_ids = set(range(0, 600, 5))
+    async with cli._redis.pipeline(transaction=False) as pipe:
+        for name, ids in (
+            (active, active_ids),
+            (paid, paid_ids),
+            (churned, churned_ids),
+        ):
+            for i in ids:
+                pipe.setbit(name, i, 1)
+        await pipe.execute()
+
+    tmp = await cli.bitmap.bitop(BitOp.AND, [active, paid])
+    assert tmp.startswith(cli.bitmap.tmp_prefix)
+    assert 0 < await cli.ttl(tmp) <= 60
+    assert await cli.bitmap.count(tmp) == len(active_ids & paid_ids)
+    assert await cli.bitmap.op_count(BitOp.AND, [active, paid]) == len(
+        active_ids & paid_ids
+    )
+    assert await cli.bitmap.op_count("OR", [active, paid]) == len(
+        active_ids | paid_ids
+    )
+    # 前两个字节：0..15
+    assert await cli.bitmap.count(active, 0, 1) == 8
+
+    ret = await cli.bitmap.difference(tmp, [churned], dest=dest, ttl=None)
+    assert ret == dest and await cli.ttl(dest) == -1
+    expect = sorted((active_ids & paid_ids) - churned_ids)
+    assert list(await cli.bitmap.get_set_bits(dest)) == expect
+    ret = await cli.bitmap.difference(active, [paid, churned])
+    assert list(await cli.bitmap.get_set_bits(ret)) == sorted(
+        active_ids - paid_ids - churned_ids
+    )
+
+    bits, cursor = await cli.bitmap.page(dest, limit=10)
+    assert list(bits) == expect[:10] and cursor == expect[9] + 1
+    bits, cursor = await cli.bitmap.page(dest, cursor, limit=len(expect))
+    assert list(bits) == expect[10:] and cursor is None
+    pages = [list(p) async for p in cli.bitmap.iter_pages(dest, 7, chunk_bytes=16)]
+    assert all(len(p) == 7 for p in pages[:-1])
+    assert [b for p in pages for b in p] == expect
+
+    with pytest.raises(LibraryUsageError):
+        await cli.bitmap.bitop(BitOp.NOT, [active, paid])
+    with pytest.raises(LibraryUsageError):
+        await cli.bitmap.difference(active, [])
+    with pytest.raises(LibraryUsageError):
+        await cli.bitmap.page(dest, limit=0)
+    await cli.delete(active, paid, churned, dest, tmp, ret)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_bloom_filter(group):
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    key = "pytest:bloom:urls"
+    await cli.delete(key)
+    bloom = cli.bloom_filter(key, capacity=5000, error_rate=0.01, batch_size=300)
+    assert bloom.hashes == 7 and bloom.memory_bytes < 6000
+
+    urls = [f"https://example.com/{i}" for i in range(5000)]
+    added = await bloom.add_many(urls[:2000] + [urls[0]])
+    # 同批内重复元素第二次不再是新增
+    assert added[0] and not added[-1]
+    assert sum(added) >= 1980
+    assert all(await bloom.contains_many(urls[:2000]))
+    assert await bloom.contains(urls[1]) and not await bloom.add(urls[1])
+    false_positive = sum(await bloom.contains_many(urls[2000:]))
+    assert false_positive < 3000 * 0.03
+    assert abs(await bloom.approx_count() - 2000) < 100
+    assert await bloom.add_many([]) == []
+    assert await bloom.add(b"raw-bytes") and await bloom.contains(b"raw-bytes")
+    assert await bloom.add(12345) and await bloom.contains("12345")
+
+    with pytest.raises(LibraryUsageError):
+        cli.bloom_filter(key, capacity=0)
+    with pytest.raises(LibraryUsageError):
+        cli.bloom_filter(key, capacity=10, error_rate=1)
+    with pytest.raises(LibraryUsageError):
+        cli.bloom_filter(key, capacity=10**10, error_rate=1e-9)
+    assert await bloom.clear() == 1
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_hyperloglog(group):
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    day1, day2, week = "pytest:hll:d1", "pytest:hll:d2", "pytest:hll:week"
+    await cli.delete(day1, day2, week)
+    cli.hll._batch_size = 1000
+
+    assert await cli.hll.add(day1, (f"u{i}" for i in range(5000)))
+    assert not await cli.hll.add(day1, ["u1", "u2"])
+    assert not await cli.hll.add(day1, [])
+    assert await cli.hll.add(day2, [f"u{i}" for i in range(2500, 7500)])
+    assert abs(await cli.hll.count(day1) - 5000) < 5000 * 0.03
+    assert abs(await cli.hll.count(day1, day2) - 7500) < 7500 * 0.03
+    assert await cli.hll.merge(week, day1, day2)
+    assert await cli.hll.count(week) == await cli.hll.count(day1, day2)
+
+    with pytest.raises(LibraryUsageError):
+        await cli.hll.count()
+    with pytest.raises(LibraryUsageError):
+        await cli.hll.merge(week)
+    await cli.delete(day1, day2, week)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_count_min_sketch(group):
+    from smartutils.infra.cache.ext.cms import RedisCountMinSketch
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    key = "pytest:cms:url"
+    width, depth = RedisCountMinSketch.dimensions(0.001, 0.01)
+    assert (width, depth) == (2719, 5)
+    cms = cli.count_min_sketch(key, width, depth, topk=3, batch_size=50)
+    await cms.clear()
+
+    stream = []
+    for i in range(300):
+        n = 1 + (i == 7) * 500 + (i == 42) * 300 + (i == 9) * 100
+        stream.extend([f"url{i}"] * n)
+    ret = await cms.add_many(stream)
+    assert ret["url7"] >= 501 and ret["url42"] >= 301
+    assert await cms.incr("url7", 10) >= 511
+    estimates = await cms.estimate_many(["url7", "url42", "url9", "url0", "never"])
+    total = len(stream) + 10
+    assert 511 <= estimates[0] <= 511 + total * 0.001 * 2
+    assert estimates[1] >= 301 and estimates[2] >= 101
+    assert estimates[3] >= 1 and estimates[4] <= total * 0.001 * 2
+    assert await cms.estimate("url0") == estimates[3]
+    top = await cms.top()
+    assert [item for item, _ in top] == ["url7", "url42", "url9"]
+    assert top[0][1] == estimates[0]
+    assert len(await cms.top(1)) == 1
+    assert await cli.zcard(cms.topk_key) == 3
+
+    with pytest.raises(LibraryUsageError):
+        await cms.incrby({"x": 0})
+    with pytest.raises(LibraryUsageError):
+        await cli.count_min_sketch(key).top()
+    assert await cms.clear() == 2
+
+
+@pytest.mark.parametrize("algo", ["token_bucket", "sliding_log", "sliding_window"])
+async def test_rate_limiter(algo):
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client("decode")
+    limiter = cli.rate_limiter(limit=10, window=0.5, algo=algo, prefix="pytest:rl")
+    await limiter.reset("u1")
+    await limiter.reset("u2")
+
+    rets = [await limiter.acquire("u1") for _ in range(10)]
+    assert all(r.allowed for r in rets)
+    assert rets[-1].remaining < 1
+
+    denied = await limiter.acquire("u1")
+    assert not denied.allowed and not denied.local
+    assert 0 < denied.retry_after <= 0.5
+    # 耗尽期间本地直接拒绝
+    local = await limiter.acquire("u1")
+    assert not local.allowed and local.local
+    # 其他 key 不受影响；acquire N 原子，不足时不扣
+    ret = await limiter.acquire("u2", 6)
+    assert ret.allowed
+    assert not (await limiter.acquire("u2", 5)).allowed
+    assert (await limiter.acquire("u2", 4)).allowed
+
+    await asyncio.sleep(denied.retry_after + 0.6)
+    assert (await limiter.acquire("u1")).allowed
+
+    await limiter.reset("u1")
+    await limiter.reset("u2")
+    rets = await limiter.acquire_many([("u1", 5), ("u2", 3), ("u1", 5), ("u1", 1)])
+    assert [r.allowed for r in rets] == [True, True, True, False]
+    rets = await limiter.acquire_many([("u1", 1), ("u2", 7)])
+    assert rets[0].local and rets[1].allowed
+
+    with pytest.raises(LibraryUsageError):
+        await limiter.acquire("u1", 0)
+    with pytest.raises(LibraryUsageError):
+        await limiter.acquire("u1", 11)
+    with pytest.raises(LibraryUsageError):
+        cli.rate_limiter(limit=0)
+    # burst 只放大令牌桶容量，窗口算法单次申请不能超过 limit
+    bursty = cli.rate_limiter(
+        limit=10, window=1, algo=algo, burst=20, prefix="pytest:rl"
+    )
+    await bursty.reset("u3")
+    if algo == "token_bucket":
+        assert (await bursty.acquire("u3", 15)).allowed
+    else:
+        with pytest.raises(LibraryUsageError):
+            await bursty.acquire("u3", 15)
+    await bursty.reset("u3")
+    await limiter.reset("u1")
+    await limiter.reset("u2")
+
+
+async def test_rate_limiter_token_bucket_refill():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client("default")
+    limiter = cli.rate_limiter(
+        limit=20, window=1, burst=5, prefix="pytest:rl", local_block=False
+    )
+    await limiter.reset("tb")
+    rets = await limiter.acquire_many([("tb", 1)] * 6)
+    assert [r.allowed for r in rets] == [True] * 5 + [False]
+    assert not rets[-1].local
+    # 每秒补充 20 个，约 50ms 一个
+    assert 0 < rets[-1].retry_after <= 0.06
+    await asyncio.sleep(0.12)
+    assert (await limiter.acquire("tb", 2)).allowed
+    await limiter.reset("tb")
+
+
+async def test_sharded_redis():
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    sharded = mgr.sharded(["default", "decode"])
+    assert sharded.nodes == ["default", "decode"]
+    keys = [f"pytest:sharded:{i}" for i in range(50)]
+    await sharded.delete(*keys)
+    groups = sharded.group(keys)
+    assert set(groups) == {"default", "decode"}
+
+    assert await sharded.mset({k: i for i, k in enumerate(keys)})
+    vals = await sharded.mget(keys + ["pytest:sharded:missing"])
+    assert vals == [str(i) for i in range(50)] + [None]
+    assert await sharded.get(keys[3]) == "3"
+    assert await sharded.set(keys[3], "x")
+    assert await mgr.client(sharded.node_for(keys[3])).get(keys[3]) == "x"
+
+    pipe = sharded.pipeline()
+    for k in keys[10:20]:
+        pipe.incr(k)
+    pipe.hset("pytest:sharded:{h}", "f", "v").hgetall("pytest:sharded:{h}")
+    assert len(pipe) == 12
+    rets = await pipe.execute()
+    assert rets[:10] == list(range(11, 21))
+    assert rets[10:] == [1, {"f": "v"}]
+    assert len(pipe) == 0
+
+    assert await sharded.delete(*keys, "pytest:sharded:{h}") == 51
+    assert await sharded.delete() == 0
+    with pytest.raises(LibraryUsageError):
+        mgr.sharded(["default", "missing"])
+
+
+async def test_redis_lock():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client("default")
+    await cli.delete("lock:{pytest:lock}", "lock:{pytest:lock}:fence")
+    locker = mgr.locker(ttl=0.3, retry_interval=0.01)
+
+    h1 = await locker.acquire("pytest:lock")
+    assert h1 and h1.token == 1 and locker.running
+    assert await locker.acquire("pytest:lock") is None
+    # 看门狗续期，超过 ttl 仍持有
+    await asyncio.sleep(0.5)
+    assert not h1.lost
+    assert 0 < await cli.pttl("lock:{pytest:lock}") <= 300
+    assert await locker.acquire("pytest:lock", timeout=0.05) is None
+
+    async def release_later():
+        await asyncio.sleep(0.05)
+        assert await locker.release(h1)
+
+    task = asyncio.create_task(release_later())
+    h2 = await locker.acquire("pytest:lock", timeout=1)
+    await task
+    # fencing token 单调递增
+    assert h2 and h2.token == 2
+    assert await locker.extend(h2, ttl=5)
+    assert await cli.pttl("lock:{pytest:lock}") > 300
+
+    # 被他人抢占后续期失败，标记 lost，释放不会误删
+    await cli.set("lock:{pytest:lock}", "other")
+    assert not await locker.extend(h2)
+    assert h2.lost
+    assert not await locker.release(h2)
+    await cli.delete("lock:{pytest:lock}")
+    await asyncio.sleep(0.15)
+    assert not locker.running
+
+    await locker.stop()
+    await cli.delete("lock:{pytest:lock}", "lock:{pytest:lock}:fence")
+
+
+async def test_redis_lock_keyed():
+    import asyncio
+
+    from smartutils.infra.cache.redis import RedisManager
+
+    mgr = RedisManager()
+    cli = mgr.client("default")
+    await cli.delete("lock:{pytest:keyed}", "lock:{pytest:keyed}:fence")
+    calls = []
+    locker = mgr.locker(keyed=True, stripes=8)
+    origin = cli._redis.evalsha
+
+    async def counted(*args, **kwargs):
+        calls.append(args)
+        return await origin(*args, **kwargs)
+
+    cli._redis.evalsha = counted
+    order = []
+
+    async def worker(i):
+        async with mgr.lock("pytest:keyed", timeout=None) as held:
+            assert held
+            order.append(("in", i, held.token))
+            await asyncio.sleep(0.01)
+            order.append(("out", i))
+
+    async with locker.lock("pytest:other", timeout=0) as held:
+        assert held
+    calls.clear()
+    await asyncio.gather(*(worker(i) for i in range(5)))
+    del cli._redis.evalsha
+    # 同进程互斥，本地排队：每次持有只有一次加锁、一次解锁调用
+    assert [o[0] for o in order] == ["in", "out"] * 5
+    assert [o[2] for o in order if o[0] == "in"] == [1, 2, 3, 4, 5]
+    assert len(calls) == 10
+
+    async with mgr.lock("pytest:keyed") as held:
+        assert held
+        async with mgr.lock("pytest:keyed", timeout=0.01) as again:
+            assert again is None
+    # 分段冲突：不同锁名落在同一分段，timeout=0 时仍直接尝试 Redis
+    single = mgr.locker(keyed=True, stripes=1, fencing=False)
+    async with single.lock("pytest:keyed") as held:
+        assert held
+        async with single.lock("pytest:other", timeout=0) as other:
+            assert other
+        async with single.lock("pytest:keyed", timeout=0) as again:
+            assert again is None
+    with pytest.raises(LibraryUsageError):
+        mgr.locker(ttl=0)
+    await cli.delete("lock:{pytest:keyed}", "lock:{pytest:keyed}:fence")
+    await cli.delete("lock:{pytest:other}", "lock:{pytest:other}:fence")
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_codec_obj(group):
+    from dataclasses import dataclass
+
+    from smartutils.infra.cache.common.codec import (
+        CodecFormat,
+        Compression,
+        RedisCodec,
+    )
+    from smartutils.infra.cache.redis import RedisManager
+
+    @dataclass
+    class Item:
+        id: int
+        name: str
+
+    mgr = RedisManager()
+    cli = mgr.client(group)
+    keys = [f"pytest:codec:{i}" for i in range(3)]
+    await cli.delete(*keys)
+
+    assert await cli.set_obj(keys[0], Item(1, "a"), ex=10)
+    assert await cli.get_obj(keys[0], Item) == Item(1, "a")
+    assert await cli.get_obj(keys[0]) == {"id": 1, "name": "a"}
+    assert await cli.get_obj("pytest:codec:missing", Item) is None
+
+    codec = RedisCodec(CodecFormat.MSGPACK, Compression.LZ4, threshold=128)
+    blob = {"rows": [{"id": i, "name": "row"} for i in range(500)]}
+    assert await cli.mset_obj({keys[1]: blob, keys[2]: [1, 2]}, ex=10, codec=codec)
+    assert await cli.mget_obj(keys[1:] + ["pytest:codec:missing"]) == [
+        blob,
+        [1, 2],
+        None,
+    ]
+    assert await cli.strlen(keys[1]) < len(str(blob)) / 3
+    assert 0 < await cli.ttl(keys[1]) <= 10
+    assert await cli.mset_obj({keys[2]: Item(2, "b")})
+    assert (await cli.mget_obj([keys[2]], Item)) == [Item(2, "b")]
+    assert await cli.mget_obj([]) == []
+    await cli.delete(*keys)
+
+
+@pytest.mark.parametrize("group", ["default", "decode"])
+async def test_scan_keys(group):
+    from smartutils.infra.cache.redis import RedisManager
+
+    cli = RedisManager().client(group)
+    prefix = f"pytest:scan:{group}"
+    keys = [f"{prefix}:str:{i}" for i in range(250)]
+    stale = [i.key async for i in cli.scan_keys(f"{prefix}:*", memory=False)]
+    if stale:
+        await cli.delete(*stale)
+    await cli.mset({k: "v" * 100 for k in keys})
+    await cli.expire(keys[0], 100)
+    await cli.hset(f"{prefix}:hash:1", mapping={"a": "1"})
+
+    infos = [i async for i in cli.scan_keys(f"{prefix}:*", count=50)]
+    assert sorted(i.key for i in infos) == sorted(keys + [f"{prefix}:hash:1"])
+    by_key = {i.key: i for i in infos}
+    assert by_key[keys[0]].type == "string" and 0 < by_key[keys[0]].ttl <= 100
+    assert by_key[keys[1]].ttl == -1 and by_key[keys[1]].memory > 100
+    assert by_key[f"{prefix}:hash:1"].type == "hash"
+
+    hashes = [i async for i in cli.scan_keys(f"{prefix}:*", type_="hash")]
+    assert [i.key for i in hashes] == [f"{prefix}:hash:1"]
+    no_mem = [i async for i in cli.scan_keys(f"{prefix}:hash:*", memory=False)]
+    assert no_mem[0].memory is None
+
+    report = await cli.keyspace.report(f"{prefix}:*", depth=4, top=3)
+    stat = report.prefixes[f"{prefix}:str"]
+    assert (stat.keys, stat.no_ttl) == (250, 249)
+    assert report.prefixes[f"{prefix}:hash"].types == {"hash": 1}
+    assert report.sorted()[0].prefix == f"{prefix}:str"
+    assert len(report.biggest) == 3
+    await cli.delete(*keys, f"{prefix}:hash:1")